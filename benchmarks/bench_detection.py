@@ -0,0 +1,85 @@
+"""
+Benchmark de la detección automática de transitorios (detection.py).
+
+Para cada estación de data/station* compara la detección STA/LTA
+vectorizada de una sola pasada, la misma detección por bloques (streaming)
+y, como referencia, classic_sta_lta + trigger_onset de ObsPy aplicados a
+cada componente por separado.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_detection.py
+    python benchmarks/bench_detection.py --bloque 300 --lta 60
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from detection import detect_transients  # noqa: E402
+from load_data import DataLoader, identify_component  # noqa: E402
+
+
+def cronometrar(func, repeticiones):
+    mejor = np.inf
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = func()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+
+def obspy_por_componente(datos, samples, sta, lta, umbral_on, umbral_off):
+    """Detección de referencia: ObsPy sobre cada componente, con bucle por componente."""
+    from obspy.signal.trigger import classic_sta_lta, trigger_onset
+
+    disparos = 0
+    for comp in ('z', 'n', 'e'):
+        x = np.asarray(datos[comp]['data'], dtype=np.float64)
+        ratio = classic_sta_lta(x - x.mean(), int(sta * samples), int(lta * samples))
+        disparos += len(trigger_onset(ratio, umbral_on, umbral_off))
+    return disparos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datos', default=os.path.join(RAIZ, 'data'))
+    parser.add_argument('--sta', type=float, default=1.0)
+    parser.add_argument('--lta', type=float, default=30.0)
+    parser.add_argument('--umbral-on', type=float, default=2.5)
+    parser.add_argument('--umbral-off', type=float, default=1.5)
+    parser.add_argument('--bloque', type=float, default=600.0, help="segundos por bloque en streaming")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    kwargs = dict(sta=args.sta, lta=args.lta, umbral_on=args.umbral_on, umbral_off=args.umbral_off)
+    print(f"{'estación':<10} {'muestras':>9} {'una pasada (s)':>15} {'bloques (s)':>12} "
+          f"{'ObsPy x3 (s)':>13} {'intervalos':>11} {'rechazado (s)':>14} {'iguales':>8}")
+    for directorio in sorted(glob.glob(os.path.join(args.datos, 'station*'))):
+        rutas = {identify_component(os.path.basename(r)): r for r in glob.glob(os.path.join(directorio, '*'))}
+        if not all(rutas.get(comp) for comp in ('z', 'n', 'e')):
+            continue
+        datos = DataLoader.load_triple(rutas['z'], rutas['n'], rutas['e'])
+        samples = datos['z']['sampling_rate']
+        z, n, e = (datos[comp]['data'] for comp in ('z', 'n', 'e'))
+
+        t_una, una = cronometrar(lambda: detect_transients(z, n, e, samples, **kwargs), args.repeticiones)
+        t_bloques, bloques = cronometrar(
+            lambda: detect_transients(z, n, e, samples, bloque=int(args.bloque * samples), **kwargs),
+            args.repeticiones)
+        try:
+            t_obspy, _ = cronometrar(lambda: obspy_por_componente(datos, samples, **kwargs), args.repeticiones)
+        except ImportError:
+            t_obspy = np.nan
+        iguales = len(una) == len(bloques) and np.allclose(una.to_list(), bloques.to_list())
+        print(f"{os.path.basename(directorio):<10} {len(z):>9} {t_una:>15.3f} {t_bloques:>12.3f} "
+              f"{t_obspy:>13.3f} {len(una):>11} {una.total():>14.1f} {str(iguales):>8}")
+
+
+if __name__ == '__main__':
+    main()
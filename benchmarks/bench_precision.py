@@ -0,0 +1,86 @@
+"""
+Benchmark de la política de precisión (precision.py): float32 frente a float64.
+
+Para cada estación de data/station* ejecuta el flujo filtro pasa bandas +
+calculate_hvsr_helper con cada política e informa el tiempo (mejor de N),
+el pico de memoria (tracemalloc), los bytes de las trazas filtradas y la
+diferencia de la curva H/V y de f0 respecto a float64.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_precision.py
+    python benchmarks/bench_precision.py --filtro 0.1 20 --repeticiones 5
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+import precision  # noqa: E402
+from batch import DEFAULT_PARAMS  # noqa: E402
+from hvsr_calculator import calculate_hvsr_helper  # noqa: E402
+from load_data import DataLoader, identify_component  # noqa: E402
+from process import ProcessData  # noqa: E402
+
+
+def flujo(datos, samples, filtro):
+    p = DEFAULT_PARAMS
+    filtrados = ProcessData({c: datos[c]['data'] for c in 'zne'}, samples).bandpass_filter(*filtro)
+    resultado = calculate_hvsr_helper(filtrados['z'], filtrados['n'], filtrados['e'], p['sm'], p['method'],
+                                      p['window'], p['ancho'], p['overlap'], p['detr'], p['confianza'], p['b'],
+                                      samples)
+    return resultado, sum(filtrados[c].nbytes for c in 'zne')
+
+
+def medir(func, repeticiones):
+    """Mejor tiempo de `repeticiones` ejecuciones y pico de memoria de una ejecución adicional."""
+    mejor = np.inf
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        func()
+        mejor = min(mejor, time.perf_counter() - t0)
+    tracemalloc.start()
+    resultado = func()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return mejor, pico, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datos', default=os.path.join(RAIZ, 'data'))
+    parser.add_argument('--filtro', type=float, nargs=2, default=(0.1, 20.0), metavar=('FMIN', 'FMAX'))
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'estación':<10} {'precisión':<9} {'tiempo (s)':>10} {'pico (MiB)':>11} {'trazas (MiB)':>13} "
+          f"{'dif. máx.':>10} {'dif. mediana':>13} {'Δf0 (Hz)':>9}")
+    for directorio in sorted(glob.glob(os.path.join(args.datos, 'station*'))):
+        rutas = {identify_component(os.path.basename(r)): r for r in glob.glob(os.path.join(directorio, '*'))}
+        if not all(rutas.get(comp) for comp in ('z', 'n', 'e')):
+            continue
+        datos = DataLoader.load_triple(rutas['z'], rutas['n'], rutas['e'], lazy=False)
+        samples = datos['z']['sampling_rate']
+
+        referencia = None
+        for politica in ('float64', 'float32'):
+            with precision.use(politica):
+                tiempo, pico, ((f, HV, _, _, _, f0, _, _), trazas) = medir(
+                    lambda: flujo(datos, samples, args.filtro), args.repeticiones)
+            if referencia is None:
+                referencia = (HV, f0)
+            banda = (f >= args.filtro[0]) & (f <= args.filtro[1])
+            dif = np.abs(HV[banda].astype(np.float64) / referencia[0][banda] - 1)
+            print(f"{os.path.basename(directorio):<10} {politica:<9} {tiempo:>10.3f} {pico / 2**20:>11.1f} "
+                  f"{trazas / 2**20:>13.1f} {dif.max():>10.2e} {np.median(dif):>13.2e} "
+                  f"{abs(f0 - referencia[1]):>9.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compara la desviación estándar móvil del bucle original de
+calculate_hvsr_helper con los modos 'legacy' y 'fast' de rolling.moving_sd.
+
+Uso:
+    python benchmarks/bench_rolling.py [--ventana 100] [--repeticiones 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from rolling import moving_sd  # noqa: E402
+
+
+def sd_moving_bucle(HV, window_size=100):
+    sd = np.std(HV[:window_size])
+    sd_moving = np.zeros_like(HV)
+    for i in range(window_size, len(HV)):
+        sd_moving[i - window_size:i] = sd
+        sd = np.std(HV[i - window_size + 1:i + 1])
+    return sd_moving
+
+
+def cronometrar(func, repeticiones):
+    mejor = np.inf
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = func()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ventana', type=int, default=100)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[1_000, 10_000, 100_000, 500_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'N':>9} {'bucle (s)':>11} {'legacy (s)':>11} {'fast (s)':>10} {'x legacy':>9} {'x fast':>8} {'err. máx fast':>14}")
+    for n in args.tamanos:
+        HV = 1 + np.abs(rng.normal(size=n)).cumsum() / n
+        t_bucle, ref = cronometrar(lambda: sd_moving_bucle(HV, args.ventana), 1 if n > 100_000 else args.repeticiones)
+        t_legacy, legacy = cronometrar(lambda: moving_sd(HV, args.ventana, mode='legacy'), args.repeticiones)
+        t_fast, fast = cronometrar(lambda: moving_sd(HV, args.ventana, mode='fast'), args.repeticiones)
+        assert np.array_equal(ref, legacy)
+        error = np.max(np.abs(ref - fast))
+        print(f"{n:>9} {t_bucle:>11.4f} {t_legacy:>11.4f} {t_fast:>10.4f} "
+              f"{t_bucle / t_legacy:>9.1f} {t_bucle / t_fast:>8.1f} {error:>14.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Tiempo de importación del arranque de la interfaz (hvsr_gui).
+
+Importa el módulo en procesos nuevos con `python -X importtime`, informa
+el mejor tiempo acumulado de varias repeticiones y los módulos que más
+aportan, y comprueba que las dependencias pesadas que se cargan bajo
+demanda (ObsPy, scipy.signal, scipy.interpolate, geopandas, shapely) no se
+importan al arrancar. Termina con estado 1 si alguna se importa o si se
+supera el presupuesto de --max-segundos.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --max-segundos 1.5 --repeticiones 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(RAIZ, 'src')
+
+# Módulos que no deben cargarse al abrir la ventana principal
+DIFERIDOS = ('obspy', 'scipy.signal', 'scipy.interpolate', 'geopandas', 'shapely')
+
+
+def importar(modulo):
+    """
+    Importa `modulo` en un proceso nuevo.
+
+    Retorna:
+    - tiempos: {módulo: (propio, acumulado)} en segundos, según -X importtime
+    - cargados: módulos diferidos presentes en sys.modules tras la importación
+    """
+    codigo = (f"import sys; sys.path.insert(0, {SRC!r}); import {modulo}; "
+              f"print(','.join(m for m in {DIFERIDOS!r} if m in sys.modules))")
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], capture_output=True, text=True,
+                             env=dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen')))
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+    tiempos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        propio, acumulado, nombre = linea.split(':', 1)[1].split('|')
+        tiempos[nombre.strip()] = (int(propio) / 1e6, int(acumulado) / 1e6)
+    cargados = [m for m in proceso.stdout.strip().split(',') if m]
+    return tiempos, cargados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modulo', default='hvsr_gui')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--max-segundos', type=float, default=None,
+                        help="presupuesto del tiempo de importación acumulado")
+    parser.add_argument('--top', type=int, default=12, help="módulos más costosos a mostrar")
+    args = parser.parse_args()
+
+    mejor = None
+    for _ in range(args.repeticiones):
+        tiempos, cargados = importar(args.modulo)
+        if mejor is None or tiempos[args.modulo][1] < mejor[0][args.modulo][1]:
+            mejor = (tiempos, cargados)
+    tiempos, cargados = mejor
+    total = tiempos[args.modulo][1]
+
+    print(f"Importar {args.modulo}: {total:.3f} s (mejor de {args.repeticiones})")
+    print(f"{'módulo':<48} {'propio (s)':>10} {'acumulado (s)':>14}")
+    for nombre, (propio, acumulado) in sorted(tiempos.items(), key=lambda item: -item[1][1])[1:args.top + 1]:
+        print(f"{nombre:<48} {propio:>10.3f} {acumulado:>14.3f}")
+
+    fallos = []
+    if cargados:
+        fallos.append(f"se importan al arrancar: {', '.join(cargados)}")
+    if args.max_segundos is not None and total > args.max_segundos:
+        fallos.append(f"{total:.3f} s supera el presupuesto de {args.max_segundos:.3f} s")
+    for fallo in fallos:
+        print(f"ERROR: {fallo}")
+    return 1 if fallos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+Suite de benchmarks del flujo de procesamiento HVSR.
+
+Mide el tiempo de pared (mejor de N repeticiones) y el pico de memoria
+(tracemalloc, en una ejecución aparte) de cada etapa:
+
+    carga            DataLoader.load_triple (lectura completa)
+    filtro           ProcessData.bandpass_filter
+    rechazo          ProcessData.reject_time_windows (10 intervalos)
+    detrend          detrend_components
+    welch            compute_spectra
+    konno_ohmachi    smooth_components
+    sd_movil         combine_hv + moving_sd
+    pico             pick_peak
+    helper           calculate_hvsr_helper completo
+
+sobre las estaciones de data/station* y sobre señales sintéticas (escritas
+como SAC en un directorio temporal) de duración y frecuencia de muestreo
+crecientes. Los resultados se guardan en JSON junto con el commit y las
+versiones de las dependencias; con --comparar se contrastan con una
+ejecución anterior y se señalan las etapas más lentas que la tolerancia.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --rapido --salida base.json
+    python benchmarks/run_benchmarks.py --comparar base.json --tolerancia 1.2
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import scipy
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from batch import DEFAULT_PARAMS  # noqa: E402
+from hvsr_calculator import (  # noqa: E402
+    calculate_hvsr_helper,
+    combine_hv,
+    compute_spectra,
+    detrend_components,
+    pick_peak,
+    smooth_components,
+)
+from load_data import DataLoader, identify_component  # noqa: E402
+from process import ProcessData  # noqa: E402
+from rolling import moving_sd  # noqa: E402
+
+ETAPAS = ('carga', 'filtro', 'rechazo', 'detrend', 'welch', 'konno_ohmachi', 'sd_movil', 'pico', 'helper')
+
+
+def medir(func, repeticiones):
+    """Mejor tiempo de pared de `repeticiones` llamadas y pico de memoria de una llamada."""
+    mejor = np.inf
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        func()
+        mejor = min(mejor, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        func()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return mejor, pico
+
+
+def escribir_sinteticos(directorio, duracion, samples, semilla=0):
+    """Escribe una tripleta SAC de ruido con un pico H/V en 1 Hz y retorna sus rutas."""
+    from obspy import Trace
+
+    rng = np.random.default_rng(semilla)
+    t = np.arange(int(duracion * samples)) / samples
+    rutas = {}
+    for comp in ('z', 'n', 'e'):
+        data = rng.normal(size=t.size)
+        if comp != 'z':
+            data += 2 * np.sin(2 * np.pi * 1.0 * t + rng.uniform(0, 2 * np.pi))
+        rutas[comp] = os.path.join(directorio, f'SYN_{int(duracion)}s_{int(samples)}hz.{comp}.sac')
+        Trace(data.astype(np.float32), header={'sampling_rate': samples}).write(rutas[comp], format='SAC')
+    return rutas
+
+
+def casos_estaciones(raiz):
+    for directorio in sorted(glob.glob(os.path.join(raiz, 'station*'))):
+        rutas = {identify_component(os.path.basename(r)): r for r in glob.glob(os.path.join(directorio, '*'))}
+        if all(rutas.get(comp) for comp in ('z', 'n', 'e')):
+            yield os.path.basename(directorio), rutas
+
+
+def medir_caso(rutas, params, repeticiones):
+    """Mide todas las etapas sobre una tripleta; retorna (muestras, samples, {etapa: (tiempo, memoria)})."""
+    p = params
+    medidas = {}
+    medidas['carga'] = medir(lambda: DataLoader.load_triple(rutas['z'], rutas['n'], rutas['e'], lazy=False),
+                             repeticiones)
+    datos = DataLoader.load_triple(rutas['z'], rutas['n'], rutas['e'], lazy=False)
+    samples = datos['z']['sampling_rate']
+    z, n, e = (np.asarray(datos[comp]['data']) for comp in ('z', 'n', 'e'))
+    componentes = {'z': z, 'n': n, 'e': e}
+
+    highcut = min(20.0, 0.4 * samples)
+    medidas['filtro'] = medir(lambda: ProcessData(componentes, samples).bandpass_filter(0.1, highcut),
+                              repeticiones)
+
+    duracion = len(z) / samples
+    intervalos = [(t, t + 5.0) for t in np.linspace(0, duracion, 12)[1:-1]]
+
+    def rechazo():
+        copia = dict(componentes)
+        tiempos = {comp: np.arange(len(copia[comp])) / samples for comp in copia}
+        ProcessData(copia, samples).reject_time_windows(intervalos, tiempos)
+
+    medidas['rechazo'] = medir(rechazo, repeticiones)
+
+    medidas['detrend'] = medir(lambda: detrend_components(z, n, e), repeticiones)
+    x = detrend_components(z, n, e)
+    espectros = lambda: compute_spectra(x, p['sm'], p['window'], p['ancho'], p['overlap'], p['detr'], samples)  # noqa: E731
+    medidas['welch'] = medir(espectros, repeticiones)
+    f, P = espectros()
+    medidas['konno_ohmachi'] = medir(lambda: smooth_components(f, P, p['b']), repeticiones)
+    f, (ko_Pz, ko_Pn, ko_Pe) = smooth_components(f, P, p['b'])
+    medidas['sd_movil'] = medir(lambda: moving_sd(combine_hv(ko_Pz, ko_Pn, ko_Pe, p['method']), 100),
+                                repeticiones)
+    HV = combine_hv(ko_Pz, ko_Pn, ko_Pe, p['method'])
+    sd_moving = moving_sd(HV, 100)
+    medidas['pico'] = medir(lambda: pick_peak(f, HV, sd_moving, p['confianza']), repeticiones)
+    medidas['helper'] = medir(lambda: calculate_hvsr_helper(
+        z, n, e, p['sm'], p['method'], p['window'], p['ancho'], p['overlap'], p['detr'],
+        p['confianza'], p['b'], samples), repeticiones)
+    return len(z), samples, medidas
+
+
+def metadatos():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def comparar(actual, base, tolerancia):
+    """Imprime la razón de tiempos frente a `base` y retorna las etapas que empeoran."""
+    anteriores = {(r['caso'], r['etapa']): r for r in base['resultados']}
+    regresiones = []
+    print(f"\nComparación con {base['meta'].get('commit')} ({base['meta'].get('fecha')}):")
+    print(f"{'caso':<16} {'etapa':<14} {'antes (s)':>10} {'ahora (s)':>10} {'razón':>7} {'memoria':>8}")
+    for r in actual['resultados']:
+        previo = anteriores.get((r['caso'], r['etapa']))
+        if previo is None:
+            continue
+        razon = r['tiempo'] / previo['tiempo'] if previo['tiempo'] > 0 else np.inf
+        razon_mem = r['memoria_pico'] / previo['memoria_pico'] if previo['memoria_pico'] > 0 else np.inf
+        marca = '  <-- más lento' if razon > tolerancia else ''
+        print(f"{r['caso']:<16} {r['etapa']:<14} {previo['tiempo']:>10.4f} {r['tiempo']:>10.4f} "
+              f"{razon:>7.2f} {razon_mem:>8.2f}{marca}")
+        if razon > tolerancia:
+            regresiones.append((r['caso'], r['etapa'], razon))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datos', default=os.path.join(RAIZ, 'data'))
+    parser.add_argument('--duraciones', type=float, nargs='+', default=[600, 3600, 14400],
+                        help="duraciones (s) de las señales sintéticas")
+    parser.add_argument('--frecuencias', type=float, nargs='+', default=[50, 100, 200],
+                        help="frecuencias de muestreo (Hz) de las señales sintéticas")
+    parser.add_argument('--sin-estaciones', action='store_true', help="omite data/station*")
+    parser.add_argument('--rapido', action='store_true',
+                        help="una repetición y solo la señal sintética más corta a cada frecuencia")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--salida', help="archivo JSON de resultados "
+                                         "(por defecto benchmarks/resultados/<commit>.json)")
+    parser.add_argument('--comparar', help="JSON de una ejecución anterior")
+    parser.add_argument('--tolerancia', type=float, default=1.2,
+                        help="razón de tiempos a partir de la que se señala una regresión")
+    args = parser.parse_args()
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    duraciones = sorted(args.duraciones)[:1] if args.rapido else args.duraciones
+    params = dict(DEFAULT_PARAMS)
+    meta = metadatos()
+    resultados = []
+
+    def registrar(caso, rutas):
+        muestras, samples, medidas = medir_caso(rutas, params, repeticiones)
+        for etapa in ETAPAS:
+            tiempo, memoria = medidas[etapa]
+            resultados.append({'caso': caso, 'muestras': muestras, 'samples': samples, 'etapa': etapa,
+                               'tiempo': tiempo, 'memoria_pico': memoria})
+            print(f"{caso:<16} {muestras:>9} {samples:>6.0f} {etapa:<14} {tiempo:>10.4f} "
+                  f"{memoria / 2**20:>10.1f}")
+
+    print(f"{'caso':<16} {'muestras':>9} {'fs':>6} {'etapa':<14} {'tiempo (s)':>10} {'pico (MiB)':>10}")
+    if not args.sin_estaciones:
+        for caso, rutas in casos_estaciones(args.datos):
+            registrar(caso, rutas)
+    with tempfile.TemporaryDirectory() as directorio:
+        for samples in args.frecuencias:
+            for duracion in duraciones:
+                registrar(f'syn_{int(duracion)}s_{int(samples)}hz',
+                          escribir_sinteticos(directorio, duracion, samples))
+
+    salida = args.salida or os.path.join(RAIZ, 'benchmarks', 'resultados', f"{meta['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    actual = {'meta': meta, 'params': params, 'repeticiones': repeticiones, 'resultados': resultados}
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(actual, f, indent=2)
+    print(f"\nResultados guardados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        regresiones = comparar(actual, base, args.tolerancia)
+        if regresiones:
+            print(f"\n{len(regresiones)} etapa(s) más lentas que {args.tolerancia:.2f}x la referencia.")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Procesamiento HVSR por lotes, sin interfaz gráfica.
+
+Busca tripletas Z/N/E en un directorio (con las mismas reglas de nombres que
+la ventana principal), calcula el HVSR de cada estación con los parámetros de
+un archivo de configuración JSON y escribe una curva por estación y una tabla
+de puntos compatible con example/hvsr_puntos.csv.
+
+Uso:
+    python src/batch.py data/ --config example/batch_config.json --salida resultados/
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from functools import partial
+
+import precision
+import profiling
+from cache import DiskCache, default_directory
+from hvsr_calculator import calculate_hvsr_helper
+from load_data import EXTENSIONES, DataLoader, identify_component, start_time, station_name
+from parallel import run_parallel
+from streaming import calculate_hvsr_stream, iter_chunks
+
+# Mismos valores por defecto que la ventana de cálculo HVSR
+DEFAULT_PARAMS = {
+    'method': 'Nakamura',
+    'window': 'hamming',
+    'ancho': 82.02,
+    'overlap': 5.0,
+    'sm': 1,
+    'detr': 'linear',
+    'confianza': 100.0,
+    'b': 188.5,
+    'huecos': 'enmascarar',
+    'fmax_analisis': None,
+    'n_frecuencias': None,
+    'promedio_bloque': 'mean',
+}
+
+
+def discover_triplets(raiz):
+    """
+    Busca tripletas Z/N/E en un árbol de directorios.
+
+    Los archivos se agrupan por directorio y nombre de estación. Retorna una
+    lista ordenada de diccionarios {'estacion', 'z', 'n', 'e'} con las
+    tripletas completas y otra con las incompletas.
+    """
+    grupos = {}
+    for dirpath, _, archivos in os.walk(raiz):
+        for fname in sorted(archivos):
+            if not fname.lower().endswith(EXTENSIONES):
+                continue
+            comp = identify_component(fname)
+            if comp is None:
+                continue
+            clave = (dirpath, station_name(fname))
+            grupos.setdefault(clave, {})[comp] = os.path.join(dirpath, fname)
+
+    completas, incompletas = [], []
+    for (dirpath, nombre), rutas in sorted(grupos.items()):
+        entrada = {'estacion': nombre, 'z': rutas.get('z'), 'n': rutas.get('n'), 'e': rutas.get('e')}
+        if None in (entrada['z'], entrada['n'], entrada['e']):
+            incompletas.append(entrada)
+        else:
+            completas.append(entrada)
+    return completas, incompletas
+
+
+def load_config(ruta=None):
+    """
+    Lee el archivo de configuración JSON y completa los parámetros faltantes
+    con los valores por defecto. La clave opcional 'estaciones' asigna
+    coordenadas {'lat', 'lon'} por nombre de estación, 'huecos' elige el
+    tratamiento de los huecos de los registros (load_data.GAP_POLICIES),
+    'fmax_analisis' (Hz) activa la decimación antialias previa a Welch,
+    'n_frecuencias' suaviza sobre una malla logarítmica de ese tamaño y
+    'promedio_bloque' elige el promedio de los segmentos con --bloque.
+    """
+    params = dict(DEFAULT_PARAMS)
+    params['estaciones'] = {}
+    if ruta:
+        with open(ruta, encoding='utf-8') as f:
+            params.update(json.load(f))
+    return params
+
+
+def process_station(tripleta, params, cache_dir=None, bloque=None):
+    """
+    Carga una tripleta y calcula su HVSR.
+
+    Con cache_dir se usa una caché en disco (cache.DiskCache) para las trazas
+    y los espectros, de modo que una nueva ejecución omite las etapas ya
+    calculadas. Con bloque (segundos) la tripleta se procesa por bloques con
+    streaming.calculate_hvsr_stream; la carga, el recorte y los huecos se
+    tratan igual, pero no se usa la caché ni se admite 'fmax_analisis' (no hay
+    decimación por bloques). Los segmentos se promedian con
+    params['promedio_bloque']: 'mean' (por defecto) mantiene la memoria del
+    cálculo constante; 'median' reproduce la curva del modo completo pero
+    guarda los periodogramas de todos los segmentos. Las muestras solo se
+    leen del disco por bloques en los SAC de una traza (memoria mapeada);
+    los archivos con varias trazas o de otros formatos se cargan completos.
+
+    Retorna un diccionario con la estación, las rutas, la curva HVSR, la
+    frecuencia del sitio, las coordenadas (de la configuración o de la
+    cabecera SAC, si existen), los aciertos/fallos de la caché y, con la
+    instrumentación activada (profiling), el desglose de tiempos por etapa.
+    """
+    if bloque and params['fmax_analisis'] is not None:
+        raise ValueError("El procesamiento por bloques no admite 'fmax_analisis'; quítelo de la configuración "
+                         "o procese sin --bloque.")
+    with profiling.profile(tripleta['estacion']) as perfil:
+        cache = DiskCache(cache_dir) if cache_dir and not bloque else None
+        datos, huecos = DataLoader.load_triple_merged(tripleta['z'], tripleta['n'], tripleta['e'],
+                                                      politica=params['huecos'], cache=cache)
+        rechazos = huecos if params['huecos'] == 'enmascarar' else None
+        if params['huecos'] == 'dividir':
+            # Se usa el tramo continuo más largo
+            datos = max(datos, key=lambda tramo: len(tramo['z']['data']))
+        samples = datos['z']['sampling_rate']
+        if bloque:
+            muestras_bloque = max(1, int(bloque * samples))
+            f, HV, sd_moving, _, _, frecuencia_sitio, _, _ = calculate_hvsr_stream(
+                lambda: iter_chunks(datos['z']['data'], datos['n']['data'], datos['e']['data'], muestras_bloque),
+                params['sm'], params['method'], params['window'], params['ancho'],
+                params['overlap'], params['detr'], params['confianza'], params['b'], samples,
+                average=params['promedio_bloque'], n_frecuencias=params['n_frecuencias'],
+                rechazos=rechazos, t0=start_time(datos['z'])
+            )
+        else:
+            f, HV, sd_moving, _, _, frecuencia_sitio, _, _ = calculate_hvsr_helper(
+                datos['z']['data'], datos['n']['data'], datos['e']['data'],
+                params['sm'], params['method'], params['window'], params['ancho'],
+                params['overlap'], params['detr'], params['confianza'], params['b'], samples,
+                n_frecuencias=params['n_frecuencias'], cache=cache, rechazos=rechazos,
+                t0=start_time(datos['z']), fmax_analisis=params['fmax_analisis']
+            )
+
+    coords = params.get('estaciones', {}).get(tripleta['estacion'])
+    if coords is not None:
+        lat, lon = coords['lat'], coords['lon']
+    else:
+        leidas = DataLoader.read_coordinates(tripleta['z'])
+        lat, lon = leidas if leidas is not None else (None, None)
+
+    return {
+        'estacion': tripleta['estacion'],
+        'rutas': tripleta,
+        'frecuencias': f,
+        'HVSR': HV,
+        'sd_moving': sd_moving,
+        'frecuencia_sitio': frecuencia_sitio,
+        'lat': lat,
+        'lon': lon,
+        'cache': None if cache is None else {'hits': cache.hits, 'misses': cache.misses},
+        'perfil': perfil.to_dict() if perfil else None,
+    }
+
+
+def write_curve(ruta, resultado):
+    """Escribe la curva HVSR de una estación como CSV (frecuencia, hvsr, sd_moving)."""
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['frecuencia', 'hvsr', 'sd_moving'])
+        for fila in zip(resultado['frecuencias'], resultado['HVSR'], resultado['sd_moving']):
+            writer.writerow([float(v) for v in fila])
+
+
+def write_points(ruta, resultados):
+    """Escribe la tabla de puntos georreferenciados (lat, lon, frecuencia)."""
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['lat', 'lon', 'frecuencia'])
+        for res in resultados:
+            if res.get('lat') is not None and res.get('lon') is not None:
+                writer.writerow([res['lat'], res['lon'], res['frecuencia_sitio']])
+
+
+def write_summary(ruta, resultados):
+    """Escribe el resumen por estación, incluidas las que fallaron."""
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['estacion', 'lat', 'lon', 'frecuencia', 'tiempo_s', 'z', 'n', 'e', 'error'])
+        for res in resultados:
+            rutas = res['rutas']
+            writer.writerow([res['estacion'], res.get('lat'), res.get('lon'), res.get('frecuencia_sitio'),
+                             res.get('tiempo'), rutas['z'], rutas['n'], rutas['e'], res.get('error', '')])
+
+
+def run_batch(raiz, params, salida, log=print, workers=1, chunksize=1, ordered=True, max_in_flight=None,
+              cache_dir=None, bloque=None, catalogo=None):
+    """
+    Procesa todas las tripletas de `raiz` y escribe los resultados en `salida`.
+
+    Con workers > 1 las estaciones se procesan en paralelo con
+    parallel.run_parallel; max_in_flight limita cuántas tripletas están
+    cargadas a la vez. Un error en una estación se registra en el resumen
+    sin detener el lote. Con cache_dir las trazas y espectros se guardan en
+    una caché en disco compartida entre ejecuciones y con bloque (segundos)
+    cada estación se procesa por bloques. Con catalogo (ruta de un
+    catalog.Catalog) las tripletas se buscan en el catálogo SQLite, que
+    solo vuelve a leer las cabeceras de los archivos nuevos o modificados.
+    Retorna la lista de resultados en el orden en que se completaron.
+    """
+    os.makedirs(salida, exist_ok=True)
+    if catalogo is not None:
+        from catalog import Catalog
+
+        indice = Catalog(catalogo or None)
+        cambios = indice.scan(raiz)
+        log(f"Catálogo {indice.ruta}: {cambios['nuevos']} nuevos, {cambios['actualizados']} actualizados, "
+            f"{cambios['sin_cambios']} sin cambios, {cambios['eliminados']} eliminados, "
+            f"{cambios['errores']} con errores")
+        tripletas, incompletas = indice.triplets(raiz)
+    else:
+        tripletas, incompletas = discover_triplets(raiz)
+    for entrada in incompletas:
+        log(f"Tripleta incompleta, se omite: {entrada['estacion']}")
+    log(f"{len(tripletas)} estaciones encontradas en {raiz}")
+
+    resultados = []
+    tarea = partial(process_station, params=params, cache_dir=cache_dir, bloque=bloque)
+    ejecucion = run_parallel(tarea, tripletas, workers=workers, chunksize=chunksize,
+                             ordered=ordered, max_in_flight=max_in_flight)
+    for item in ejecucion:
+        tripleta = item['tarea']
+        if item['error'] is not None:
+            error = item['error'].splitlines()[0]
+            resultados.append({'estacion': tripleta['estacion'], 'rutas': tripleta,
+                               'error': error, 'tiempo': item['tiempo']})
+            log(f"{tripleta['estacion']}: error: {error}")
+            continue
+        res = item['resultado']
+        res['tiempo'] = item['tiempo']
+        write_curve(os.path.join(salida, f"{res['estacion']}_hvsr.csv"), res)
+        resultados.append(res)
+        log(f"{res['estacion']}: f0 = {res['frecuencia_sitio']:.3f} Hz ({item['tiempo']:.2f} s)")
+
+    write_points(os.path.join(salida, 'hvsr_puntos.csv'), resultados)
+    write_summary(os.path.join(salida, 'resumen.csv'), resultados)
+    if cache_dir:
+        log(cache_summary(resultados))
+    perfiles = [dict(r['perfil'], tiempo_total=r['tiempo']) for r in resultados if r.get('perfil')]
+    if perfiles:
+        with open(os.path.join(salida, 'perfiles.json'), 'w', encoding='utf-8') as f:
+            json.dump(perfiles, f, indent=2)
+        log(f"Desglose de tiempos por etapa en {os.path.join(salida, 'perfiles.json')}")
+    return resultados
+
+
+def cache_summary(resultados):
+    """Suma los aciertos y fallos de caché de todas las estaciones."""
+    hits, misses = {}, {}
+    for res in resultados:
+        conteo = res.get('cache') or {}
+        for total, parcial in ((hits, conteo.get('hits', {})), (misses, conteo.get('misses', {}))):
+            for espacio, valor in parcial.items():
+                total[espacio] = total.get(espacio, 0) + valor
+    espacios = sorted(set(hits) | set(misses))
+    return "Caché: " + ', '.join(f"{e}: {hits.get(e, 0)} aciertos / {misses.get(e, 0)} fallos" for e in espacios)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directorio', help="Directorio con los archivos de la campaña")
+    parser.add_argument('--config', help="Archivo JSON con los parámetros HVSR")
+    parser.add_argument('--salida', default='resultados_hvsr', help="Directorio de salida")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos en paralelo (0 = todos los núcleos; 1 = sin paralelismo)")
+    parser.add_argument('--chunksize', type=int, default=1, help="Estaciones enviadas juntas a cada proceso")
+    parser.add_argument('--max-en-vuelo', type=int, default=None,
+                        help="Bloques pendientes como máximo (acota la memoria; por defecto 2 x workers)")
+    parser.add_argument('--cache', nargs='?', const='', default=None,
+                        help="Usar la caché en disco (opcionalmente en el directorio indicado)")
+    parser.add_argument('--bloque', type=float, default=None,
+                        help="Procesar cada estación por bloques de estos segundos (registros largos; "
+                             "promedio de segmentos según 'promedio_bloque')")
+    parser.add_argument('--desordenado', action='store_true',
+                        help="Entregar los resultados según terminan, sin conservar el orden")
+    parser.add_argument('--catalogo', nargs='?', const='', default=None,
+                        help="Buscar las tripletas con el catálogo SQLite de cabeceras (opcionalmente en la ruta indicada)")
+    parser.add_argument('--perfil', nargs='?', const='tiempo', choices=['tiempo', 'memoria'], default=None,
+                        help="Registrar el tiempo (y opcionalmente el pico de memoria) de cada etapa en perfiles.json")
+    parser.add_argument('--precision', choices=precision.POLICIES, default=None,
+                        help="Precisión de trazas, espectros y curvas (float32 reduce a la mitad la memoria)")
+    args = parser.parse_args(argv)
+
+    if args.precision:
+        precision.set_precision(args.precision)
+    if args.perfil:
+        profiling.enable(memoria=args.perfil == 'memoria')
+    params = load_config(args.config)
+    if args.bloque and params['fmax_analisis'] is not None:
+        parser.error("--bloque no admite 'fmax_analisis' en la configuración (no hay decimación por bloques)")
+    resultados = run_batch(args.directorio, params, args.salida, workers=args.workers or None,
+                           chunksize=args.chunksize, ordered=not args.desordenado,
+                           max_in_flight=args.max_en_vuelo,
+                           cache_dir=None if args.cache is None else (args.cache or default_directory()),
+                           bloque=args.bloque, catalogo=args.catalogo)
+    return 0 if all('error' not in r for r in resultados) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Presupuesto de disco por defecto (bytes)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Versión de los resultados guardados. Forma parte de todas las claves: debe
+# incrementarse cuando cambian los valores que produce una etapa en caché
+# (unión de trazas, Welch, detrend, suavizado), para no servir resultados de
+# versiones anteriores guardados en la caché persistente
+CACHE_VERSION = 1
+
+
+def default_directory():
+    """Directorio de la caché: $HVSRLEARN_CACHE o ~/.cache/hvsrlearn."""
+    return os.environ.get('HVSRLEARN_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'hvsrlearn')
+
+
+def file_key(ruta, hash_contenido=False):
+    """
+    Identificador de un archivo: ruta absoluta, tamaño y fecha de modificación.
+    Con hash_contenido=True se usa además el SHA-1 del contenido.
+    """
+    ruta = os.path.abspath(ruta)
+    st = os.stat(ruta)
+    partes = [ruta, str(st.st_size), str(st.st_mtime_ns)]
+    if hash_contenido:
+        h = hashlib.sha1()
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloque)
+        partes.append(h.hexdigest())
+    return hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()
+
+
+def params_key(params):
+    """
+    Hash canónico de un diccionario de parámetros (independiente del orden),
+    junto con CACHE_VERSION.
+    """
+    def normalizar(v):
+        if isinstance(v, np.generic):
+            return v.item()
+        return str(v)
+    texto = json.dumps({'version': CACHE_VERSION, 'params': params}, sort_keys=True, default=normalizar)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def array_key(*arrays):
+    """Hash del contenido, forma y tipo de uno o varios arreglos."""
+    h = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f'{a.dtype.str}{a.shape}'.encode('utf-8'))
+        h.update(a.data)
+    return h.hexdigest()
+
+
+class DiskCache:
+    """
+    Caché persistente en disco de trazas decodificadas y espectros.
+
+    Cada entrada es un directorio <espacio>/<clave>/ con un archivo .npy por
+    arreglo, de modo que puede leerse con memoria mapeada. Cuando el tamaño
+    total supera max_bytes se eliminan las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, directorio=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directorio = directorio or default_directory()
+        self.max_bytes = max_bytes
+        self.hits = {}
+        self.misses = {}
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def _ruta(self, espacio, clave):
+        return os.path.join(self.directorio, espacio, clave)
+
+    def get(self, espacio, clave, mmap=False):
+        """
+        Retorna el diccionario de arreglos guardado o None si no existe.
+        Con mmap=True los arreglos se abren con memoria mapeada.
+        """
+        ruta = self._ruta(espacio, clave)
+        try:
+            nombres = [f for f in os.listdir(ruta) if f.endswith('.npy')]
+            arrays = {os.path.splitext(f)[0]: np.load(os.path.join(ruta, f), mmap_mode='r' if mmap else None)
+                      for f in nombres}
+        except (OSError, ValueError):
+            self.misses[espacio] = self.misses.get(espacio, 0) + 1
+            return None
+        # La fecha de modificación del directorio registra el último uso (LRU)
+        os.utime(ruta)
+        self.hits[espacio] = self.hits.get(espacio, 0) + 1
+        return arrays
+
+    def put(self, espacio, clave, arrays):
+        """Guarda un diccionario {nombre: arreglo} de forma atómica."""
+        destino = self._ruta(espacio, clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(destino))
+        try:
+            for nombre, valor in arrays.items():
+                np.save(os.path.join(tmp, f'{nombre}.npy'), np.asarray(valor), allow_pickle=False)
+            if os.path.isdir(destino):
+                shutil.rmtree(destino, ignore_errors=True)
+            os.replace(tmp, destino)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def _entradas(self):
+        """Lista (último uso, tamaño, ruta) de todas las entradas."""
+        entradas = []
+        for espacio in os.listdir(self.directorio):
+            base = os.path.join(self.directorio, espacio)
+            if not os.path.isdir(base):
+                continue
+            for clave in os.listdir(base):
+                ruta = os.path.join(base, clave)
+                if clave.startswith('.tmp-') or not os.path.isdir(ruta):
+                    continue
+                try:
+                    tamano = sum(e.stat().st_size for e in os.scandir(ruta))
+                    entradas.append((os.stat(ruta).st_mtime, tamano, ruta))
+                except OSError:
+                    continue
+        return entradas
+
+    def size(self):
+        """Tamaño total de la caché en bytes."""
+        return sum(tamano for _, tamano, _ in self._entradas())
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta respetar max_bytes."""
+        entradas = sorted(self._entradas())
+        total = sum(tamano for _, tamano, _ in entradas)
+        for _, tamano, ruta in entradas:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(ruta, ignore_errors=True)
+            total -= tamano
+
+    def clear(self):
+        """Borra todas las entradas y los contadores."""
+        for espacio in os.listdir(self.directorio):
+            shutil.rmtree(os.path.join(self.directorio, espacio), ignore_errors=True)
+        self.hits.clear()
+        self.misses.clear()
+
+    def report(self):
+        """Resumen de aciertos y fallos por espacio y del uso de disco."""
+        entradas = self._entradas()
+        return {
+            'directorio': self.directorio,
+            'entradas': len(entradas),
+            'bytes': sum(tamano for _, tamano, _ in entradas),
+            'max_bytes': self.max_bytes,
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+        }
+
+    def summary(self):
+        """Resumen de una línea para la terminal de la aplicación."""
+        rep = self.report()
+        espacios = sorted(set(rep['hits']) | set(rep['misses']))
+        detalle = ', '.join(f"{e}: {rep['hits'].get(e, 0)} aciertos / {rep['misses'].get(e, 0)} fallos"
+                            for e in espacios)
+        return f"Caché ({rep['bytes'] / 1024 ** 2:.1f} MB en {rep['entradas']} entradas) {detalle}".rstrip()
+
+
+def open_default_cache():
+    """Abre la caché por defecto o retorna None si el directorio no es utilizable."""
+    try:
+        return DiskCache()
+    except OSError:
+        return None
@@ -0,0 +1,35 @@
+"""
+Puntos de cancelación cooperativa de los cálculos largos.
+
+TaskRunner instala, en el hilo de cada tarea, la comprobación de su
+contexto (TaskContext.check). Los bucles por bloques del flujo HVSR
+(segmentos de Welch, bloques del filtro, componentes al cargar) llaman a
+checkpoint(), que lanza TaskCancelled si se pidió cancelar la tarea y no
+hace nada fuera de una tarea (scripts, lotes, pruebas).
+
+Uso:
+    with cancellation.scope(contexto.check):
+        calculate_hvsr_helper(...)
+"""
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+@contextmanager
+def scope(check):
+    """Activa `check` como comprobación de cancelación del hilo actual dentro del bloque."""
+    anterior = getattr(_local, 'check', None)
+    _local.check = check
+    try:
+        yield
+    finally:
+        _local.check = anterior
+
+
+def checkpoint():
+    """Comprueba la cancelación de la tarea del hilo actual (si la hay)."""
+    check = getattr(_local, 'check', None)
+    if check is not None:
+        check()
@@ -0,0 +1,375 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from cache import default_directory
+from load_data import (
+    _SAC_HEADER_BYTES,
+    _SAC_IFTYPE,
+    _SAC_LEVEN,
+    _SAC_NVHDR,
+    EXTENSIONES,
+    identify_component,
+    read,
+    station_name,
+)
+
+# Versión del esquema; un catálogo con otra versión se reconstruye
+_VERSION = 2
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS archivos (
+    ruta TEXT PRIMARY KEY,
+    directorio TEXT NOT NULL,
+    grupo TEXT NOT NULL,
+    por_cabecera INTEGER NOT NULL,
+    componente TEXT,
+    tamano INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    formato TEXT,
+    red TEXT,
+    estacion TEXT,
+    ubicacion TEXT,
+    canal TEXT,
+    inicio REAL,
+    fin REAL,
+    sampling_rate REAL,
+    npts INTEGER,
+    trazas INTEGER,
+    huecos INTEGER,
+    huecos_s REAL,
+    lat REAL,
+    lon REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS archivos_grupo ON archivos (directorio, grupo);
+"""
+
+_COLUMNAS = ('ruta', 'directorio', 'grupo', 'por_cabecera', 'componente', 'tamano', 'mtime_ns', 'formato', 'red', 'estacion',
+             'ubicacion', 'canal', 'inicio', 'fin', 'sampling_rate', 'npts', 'trazas', 'huecos', 'huecos_s',
+             'lat', 'lon', 'error')
+
+# Posiciones en la cabecera SAC: palabras de 4 bytes (DELTA, B, STLA, STLO,
+# NZYEAR..NZMSEC, NPTS) y, en bytes desde el inicio de la sección de texto,
+# KSTNM (0), KHOLE, KCMPNM y KNETWK
+_SAC_DELTA, _SAC_B, _SAC_STLA, _SAC_STLO = 0, 5, 31, 32
+_SAC_NZ, _SAC_NPTS = 70, 79
+_SAC_TEXTO = 440
+_SAC_KHOLE, _SAC_KCMPNM, _SAC_KNETWK = 24, 160, 168
+
+_EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Último carácter del código de canal SEED -> componente
+_ORIENTACION = {'z': 'z', 'n': 'n', '1': 'n', 'e': 'e', '2': 'e'}
+
+
+def default_path():
+    """Catálogo por defecto: catalogo.sqlite en el directorio de la caché."""
+    return os.path.join(default_directory(), 'catalogo.sqlite')
+
+
+def _sac_text(cabecera, inicio, largo):
+    texto = cabecera[_SAC_TEXTO + inicio:_SAC_TEXTO + inicio + largo].decode('ascii', 'replace').strip(' \x00')
+    return '' if texto == '-12345' else texto
+
+
+def read_sac_header(ruta):
+    """
+    Lee directamente los 632 bytes de cabecera de un archivo SAC, sin ObsPy.
+
+    Retorna el mismo diccionario que read_header, o None si el archivo no
+    es un SAC de serie de tiempo uniforme con el tiempo de referencia
+    completo (en ese caso se usa ObsPy).
+    """
+    with open(ruta, 'rb') as f:
+        cabecera = f.read(_SAC_HEADER_BYTES)
+    if len(cabecera) < _SAC_HEADER_BYTES:
+        return None
+    for orden in ('<', '>'):
+        enteros = np.frombuffer(cabecera, dtype=f'{orden}i4')
+        if enteros[_SAC_NVHDR] in (6, 7):
+            break
+    else:
+        return None
+    reales = np.frombuffer(cabecera, dtype=f'{orden}f4')
+    tiempo = enteros[_SAC_NZ:_SAC_NZ + 6]
+    delta, b, npts = reales[_SAC_DELTA], reales[_SAC_B], int(enteros[_SAC_NPTS])
+    if (enteros[_SAC_IFTYPE] != 1 or enteros[_SAC_LEVEN] != 1 or np.any(tiempo == -12345)
+            or delta == -12345.0 or delta <= 0 or npts < 0):
+        return None
+
+    # Mismas convenciones que ObsPy: b nulo = 0, Δt redondeado a microsegundos
+    # y tiempos en nanosegundos enteros desde la época
+    ano, dia, hora, minuto, segundo, ms = (int(v) for v in tiempo)
+    referencia = datetime(ano, 1, 1, tzinfo=timezone.utc) + timedelta(
+        days=dia - 1, hours=hora, minutes=minuto, seconds=segundo)
+    referencia_ns = (referencia - _EPOCA) // timedelta(seconds=1) * 10**9 + ms * 10**6
+    sampling_rate = 1.0 / round(float(delta), 6)
+    inicio_ns = referencia_ns + (0 if b == -12345.0 else round(float(b) * 1e9))
+    fin_ns = inicio_ns + (round((npts - 1) / sampling_rate * 1e9) if npts else 0)
+    lat, lon = reales[_SAC_STLA], reales[_SAC_STLO]
+    componente_canal = _sac_text(cabecera, _SAC_KCMPNM, 8)
+    return {
+        'componente': _ORIENTACION.get(componente_canal[-1:].lower()) or identify_component(ruta),
+        'formato': 'SAC',
+        'red': _sac_text(cabecera, _SAC_KNETWK, 8),
+        'estacion': _sac_text(cabecera, 0, 8),
+        'ubicacion': _sac_text(cabecera, _SAC_KHOLE, 8),
+        'canal': componente_canal,
+        'inicio': inicio_ns / 1e9,
+        'fin': fin_ns / 1e9,
+        'sampling_rate': sampling_rate,
+        'npts': npts,
+        'trazas': 1,
+        'huecos': 0,
+        'huecos_s': 0.0,
+        'lat': None if lat == -12345.0 else float(lat),
+        'lon': None if lon == -12345.0 else float(lon),
+    }
+
+
+def read_header(ruta):
+    """
+    Lee solo las cabeceras de un archivo sísmico.
+
+    Los SAC se leen directamente (read_sac_header); los demás formatos con
+    ObsPy (headonly). La componente se toma del código de canal (Z/N/E,
+    1/2) y, si no lo indica, del nombre del archivo. Los archivos con varios
+    tramos (p. ej. miniSEED con huecos) se resumen en un único registro con
+    el número de huecos y su duración total.
+
+    Retorna:
+    - diccionario con las columnas del catálogo (salvo ruta, tamaño y fecha)
+    """
+    if ruta.lower().endswith('.sac'):
+        cabecera = read_sac_header(ruta)
+        if cabecera is not None:
+            return cabecera
+    stream = read(ruta, headonly=True)
+    stats = stream[0].stats
+    canal = stats.channel or ''
+    componente = _ORIENTACION.get(canal[-1:].lower()) or identify_component(ruta)
+    inicio = min(tr.stats.starttime for tr in stream)
+    huecos = [g[6] for g in stream.get_gaps() if g[6] > 0]
+    sac = stats.get('sac', {})
+    return {
+        'componente': componente,
+        'formato': stats._format,
+        'red': stats.network,
+        'estacion': stats.station,
+        'ubicacion': stats.location,
+        'canal': canal,
+        'inicio': float(inicio.timestamp),
+        'fin': float(max(tr.stats.endtime for tr in stream).timestamp),
+        'sampling_rate': float(stats.sampling_rate),
+        'npts': int(sum(tr.stats.npts for tr in stream)),
+        'trazas': len(stream),
+        'huecos': len(huecos),
+        'huecos_s': float(sum(huecos)),
+        'lat': float(sac['stla']) if 'stla' in sac else None,
+        'lon': float(sac['stlo']) if 'stlo' in sac else None,
+    }
+
+
+def _group(ruta, cabecera):
+    """
+    Grupo de un archivo: (nombre, por_cabecera).
+
+    Si el nombre del archivo indica la componente, el grupo es
+    load_data.station_name, igual que en batch.discover_triplets. Si no, se
+    agrupan los archivos de la misma red, estación, ubicación y banda de la
+    cabecera, y triplets() los separa después por solapamiento en el tiempo.
+    """
+    if identify_component(ruta) is not None or cabecera is None:
+        return station_name(ruta), 0
+    return '.'.join((cabecera['red'], cabecera['estacion'], cabecera['ubicacion'], cabecera['canal'][:2])), 1
+
+
+def _split_by_time(filas):
+    """
+    Separa los archivos de un grupo de cabecera en registros simultáneos:
+    un archivo se une al registro abierto si se solapa con él y aún no tiene
+    esa componente. Retorna una lista de (nombre, {componente: fila}).
+    """
+    registros = []
+    for fila in sorted(filas, key=lambda f: (f['inicio'], f['ruta'])):
+        actual = registros[-1][1] if registros else None
+        if (actual is None or fila['componente'] in actual
+                or fila['inicio'] > min(f['fin'] for f in actual.values())):
+            actual = {}
+            inicio = datetime.fromtimestamp(fila['inicio'], tz=timezone.utc)
+            registros.append((f"{fila['estacion'] or 'sta'}_{inicio:%Y%m%d_%H%M%S}", actual))
+        actual[fila['componente']] = fila
+    return registros
+
+
+class Catalog:
+    """
+    Catálogo SQLite de los archivos de una campaña, construido solo con las
+    cabeceras (estación, canal, inicio/fin, frecuencia de muestreo,
+    muestras, huecos y coordenadas).
+
+    Los reescaneos son incrementales: solo se vuelven a leer los archivos
+    cuyo tamaño o fecha de modificación cambió, y se eliminan los que ya no
+    existen. Las consultas de tripletas Z/N/E no abren ningún archivo
+    sísmico. Cada operación abre su propia conexión, por lo que el catálogo
+    puede usarse desde hilos de trabajo.
+
+    Parámetros:
+    - ruta: archivo SQLite (por defecto default_path())
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        with closing(self._connect()) as conexion, conexion:
+            if conexion.execute('PRAGMA user_version').fetchone()[0] != _VERSION:
+                conexion.execute('DROP TABLE IF EXISTS archivos')
+                conexion.execute(f'PRAGMA user_version = {_VERSION}')
+            conexion.executescript(_ESQUEMA)
+
+    def _connect(self):
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        conexion.row_factory = sqlite3.Row
+        return conexion
+
+    @staticmethod
+    def _prefix(raiz):
+        return os.path.join(os.path.abspath(raiz), '')
+
+    def scan(self, raiz, progress=None):
+        """
+        Indexa (o actualiza) los archivos sísmicos bajo `raiz`.
+
+        Parámetros:
+        - raiz: directorio de la campaña
+        - progress: función opcional progress(leidos, total) llamada
+          durante la lectura de cabeceras
+
+        Retorna:
+        - diccionario con el número de archivos 'nuevos', 'actualizados',
+          'sin_cambios', 'eliminados' y 'errores'
+        """
+        prefijo = self._prefix(raiz)
+        encontrados = {}
+        for dirpath, _, archivos in os.walk(prefijo):
+            for fname in archivos:
+                if fname.lower().endswith(EXTENSIONES):
+                    ruta = os.path.join(dirpath, fname)
+                    try:
+                        st = os.stat(ruta)
+                    except OSError:
+                        continue
+                    encontrados[ruta] = (st.st_size, st.st_mtime_ns)
+
+        with closing(self._connect()) as conexion:
+            previos = {fila['ruta']: (fila['tamano'], fila['mtime_ns']) for fila in conexion.execute(
+                'SELECT ruta, tamano, mtime_ns FROM archivos WHERE substr(ruta, 1, ?) = ?',
+                (len(prefijo), prefijo))}
+        eliminados = [ruta for ruta in previos if ruta not in encontrados]
+        pendientes = sorted(ruta for ruta, firma in encontrados.items() if previos.get(ruta) != firma)
+
+        filas = []
+        errores = 0
+        for i, ruta in enumerate(pendientes):
+            try:
+                cabecera = read_header(ruta)
+                error = None
+            except Exception as err:
+                cabecera, error = None, f"{type(err).__name__}: {err}"
+                errores += 1
+            fila = dict.fromkeys(_COLUMNAS)
+            if cabecera is not None:
+                fila.update((k, v) for k, v in cabecera.items() if k in fila)
+            else:
+                fila['componente'] = identify_component(ruta)
+            grupo, por_cabecera = _group(ruta, cabecera)
+            fila.update(ruta=ruta, directorio=os.path.dirname(ruta), grupo=grupo, por_cabecera=por_cabecera,
+                        tamano=encontrados[ruta][0], mtime_ns=encontrados[ruta][1], error=error)
+            filas.append(tuple(fila[c] for c in _COLUMNAS))
+            if progress is not None and (i % 100 == 0 or i == len(pendientes) - 1):
+                progress(i + 1, len(pendientes))
+
+        with closing(self._connect()) as conexion, conexion:
+            conexion.executemany('DELETE FROM archivos WHERE ruta = ?', ((r,) for r in eliminados))
+            conexion.executemany(
+                f"INSERT OR REPLACE INTO archivos ({', '.join(_COLUMNAS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNAS))})", filas)
+
+        nuevos = sum(1 for ruta in pendientes if ruta not in previos)
+        return {
+            'nuevos': nuevos,
+            'actualizados': len(pendientes) - nuevos,
+            'sin_cambios': len(encontrados) - len(pendientes),
+            'eliminados': len(eliminados),
+            'errores': errores,
+        }
+
+    def files(self, raiz=None):
+        """Registros (diccionarios) de los archivos indexados, opcionalmente bajo `raiz`."""
+        consulta, args = 'SELECT * FROM archivos', ()
+        if raiz is not None:
+            prefijo = self._prefix(raiz)
+            consulta, args = consulta + ' WHERE substr(ruta, 1, ?) = ?', (len(prefijo), prefijo)
+        with closing(self._connect()) as conexion:
+            return [dict(fila) for fila in conexion.execute(consulta + ' ORDER BY ruta', args)]
+
+    def triplets(self, raiz=None, estacion=None):
+        """
+        Agrupa los archivos indexados en tripletas Z/N/E por directorio y nombre.
+
+        Parámetros:
+        - raiz: limita la consulta a un directorio
+        - estacion: limita la consulta a un nombre de tripleta
+
+        Retorna:
+        - completas, incompletas: listas ordenadas de diccionarios
+          {'estacion', 'z', 'n', 'e'} como batch.discover_triplets; las
+          completas incluyen además 'inicio', 'fin' (comunes a las tres
+          componentes), 'sampling_rate', 'huecos' y 'lat'/'lon'
+        """
+        condiciones, args = ['error IS NULL', 'componente IS NOT NULL'], []
+        if raiz is not None:
+            prefijo = self._prefix(raiz)
+            condiciones.append('substr(ruta, 1, ?) = ?')
+            args += [len(prefijo), prefijo]
+        consulta = (f"SELECT * FROM archivos WHERE {' AND '.join(condiciones)} "
+                    "ORDER BY directorio, grupo, ruta")
+        grupos = {}
+        with closing(self._connect()) as conexion:
+            for fila in conexion.execute(consulta, args):
+                grupos.setdefault((fila['directorio'], fila['grupo'], fila['por_cabecera']), []).append(fila)
+
+        registros = []
+        for (_, nombre, por_cabecera), filas in grupos.items():
+            if por_cabecera:
+                registros.extend(_split_by_time(filas))
+            else:
+                componentes = {}
+                for fila in filas:
+                    componentes.setdefault(fila['componente'], fila)
+                registros.append((nombre, componentes))
+
+        completas, incompletas = [], []
+        for nombre, filas in registros:
+            if estacion is not None and nombre != estacion:
+                continue
+            entrada = {'estacion': nombre}
+            entrada.update((comp, filas[comp]['ruta'] if comp in filas else None) for comp in ('z', 'n', 'e'))
+            if not all(comp in filas for comp in ('z', 'n', 'e')):
+                incompletas.append(entrada)
+                continue
+            tres = [filas[comp] for comp in ('z', 'n', 'e')]
+            entrada.update(
+                inicio=max(f['inicio'] for f in tres),
+                fin=min(f['fin'] for f in tres),
+                sampling_rate=tres[0]['sampling_rate'],
+                huecos=sum(f['huecos'] for f in tres),
+                lat=tres[0]['lat'],
+                lon=tres[0]['lon'],
+            )
+            completas.append(entrada)
+        return completas, incompletas
@@ -0,0 +1,116 @@
+import numpy as np
+
+# Puntos por curva suficientes para la resolución de pantalla
+DEFAULT_POINTS = 2000
+
+
+def log_bin_envelope(f, y, n_bins=DEFAULT_POINTS):
+    """
+    Reduce una curva f-y (f creciente) a su envolvente en bandas de
+    frecuencia logarítmicas, para dibujarla en un eje logarítmico.
+
+    Las bandas con una sola muestra conservan el punto original; las demás se
+    representan con su mínimo y su máximo en el centro geométrico de la banda,
+    de modo que los picos estrechos siguen siendo visibles.
+
+    Parámetros:
+    - f: frecuencias crecientes (se descartan las no positivas)
+    - y: valores de la curva
+    - n_bins: número de bandas logarítmicas
+
+    Retorna:
+    - x, y reducidos (como mucho 2 * n_bins puntos)
+    """
+    f = np.asarray(f)
+    y = np.asarray(y)
+    positivas = f > 0
+    f, y = f[positivas], y[positivas]
+    if len(f) <= 2 * n_bins:
+        return f, y
+
+    bordes = np.geomspace(f[0], f[-1], n_bins + 1)
+    inicios = np.unique(np.searchsorted(f, bordes[:-1], side='left'))
+    inicios = inicios[inicios < len(f)]
+    finales = np.append(inicios[1:], len(f))
+    minimos = np.minimum.reduceat(y, inicios)
+    maximos = np.maximum.reduceat(y, inicios)
+
+    # Las bandas de una sola muestra se dibujan en su frecuencia exacta
+    unica = (finales - inicios) == 1
+    centros = np.where(unica, f[inicios], np.sqrt(f[inicios] * f[finales - 1]))
+    x_out = np.repeat(centros, 2)
+    y_out = np.column_stack((minimos, maximos)).ravel()
+    conservar = np.ones(len(x_out), dtype=bool)
+    conservar[1::2] = ~unica
+    return x_out[conservar], y_out[conservar]
+
+
+class EnvelopePyramid:
+    """
+    Pirámide de envolventes mínimo/máximo de una serie de tiempo.
+
+    El nivel k agrupa bloques de `bloque * factor**(k-1)` muestras; para una
+    vista dada se usa el nivel más grueso que aún tiene al menos n_puntos
+    bloques visibles, de modo que el número de vértices dibujados no depende
+    de la longitud del registro. La pirámide ocupa del orden de
+    2 / (bloque - 1) veces la memoria de la serie.
+
+    Parámetros:
+    - data: serie de tiempo (1D)
+    - bloque: muestras por bloque del primer nivel
+    - factor: reducción entre niveles consecutivos
+    """
+
+    def __init__(self, data, bloque=16, factor=4):
+        self.data = data
+        self.npts = len(data)
+        self.tamanos = []
+        self.minimos = []
+        self.maximos = []
+
+        tamano = bloque
+        minimos = maximos = None
+        while self.npts // tamano >= 1:
+            if minimos is None:
+                inicios = np.arange(0, self.npts, tamano)
+                minimos = np.minimum.reduceat(data, inicios)
+                maximos = np.maximum.reduceat(data, inicios)
+            else:
+                inicios = np.arange(0, len(minimos), factor)
+                minimos = np.minimum.reduceat(minimos, inicios)
+                maximos = np.maximum.reduceat(maximos, inicios)
+            self.tamanos.append(tamano)
+            self.minimos.append(minimos)
+            self.maximos.append(maximos)
+            if len(minimos) <= 1:
+                break
+            tamano *= factor
+
+    def view(self, i0, i1, n_puntos=DEFAULT_POINTS):
+        """
+        Vértices para dibujar las muestras [i0, i1).
+
+        Retorna:
+        - indices: posición (en muestras) de cada vértice
+        - valores: valores de la serie o de la envolvente min/max
+        """
+        i0 = int(np.clip(i0, 0, self.npts))
+        i1 = int(np.clip(i1, i0, self.npts))
+        if i1 - i0 <= 2 * n_puntos:
+            return np.arange(i0, i1), np.asarray(self.data[i0:i1])
+
+        nivel = None
+        for k, tamano in enumerate(self.tamanos):
+            if (i1 - i0) / tamano >= n_puntos:
+                nivel = k
+        if nivel is None:
+            return np.arange(i0, i1), np.asarray(self.data[i0:i1])
+
+        tamano = self.tamanos[nivel]
+        b0, b1 = i0 // tamano, -(-i1 // tamano)
+        minimos = self.minimos[nivel][b0:b1]
+        maximos = self.maximos[nivel][b0:b1]
+        inicios = np.arange(b0, b0 + len(minimos)) * tamano
+        indices = np.column_stack((inicios, inicios + tamano // 2)).ravel()
+        valores = np.column_stack((minimos, maximos)).ravel()
+        return indices, valores
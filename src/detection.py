@@ -0,0 +1,172 @@
+import numpy as np
+
+from intervals import IntervalIndex
+from rolling import rolling_mean
+
+
+def characteristic_function(x, media=None):
+    """
+    Energía combinada de las componentes: suma de (x - media)**2.
+
+    Parámetros:
+    - x: arreglo (n_componentes, nsamples)
+    - media: nivel medio de cada componente (n_componentes,) o None para no restarlo
+
+    Retorna:
+    - arreglo (nsamples,) en float64
+    """
+    x = np.asarray(x)
+    if media is not None:
+        x = x - np.asarray(media, dtype=np.float64)[:, None]
+    return np.sum(np.square(x, dtype=np.float64), axis=0)
+
+
+def sta_lta(cf, nsta, nlta):
+    """
+    Cociente STA/LTA clásico de una función característica.
+
+    Ambas medias terminan en la muestra evaluada; las muestras anteriores a
+    la primera LTA completa valen 1 (sin información).
+    """
+    ratio = np.ones(cf.shape[-1])
+    if nlta > cf.shape[-1] or nsta > nlta:
+        return ratio
+    sta = rolling_mean(cf, nsta)[nlta - nsta:]
+    lta = rolling_mean(cf, nlta)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio[nlta - 1:] = np.where(lta > 0, sta / lta, 1.0)
+    return ratio
+
+
+class StreamingDetector:
+    """
+    Detector de transitorios STA/LTA y de amplitud por bloques.
+
+    Recibe las tres componentes en bloques consecutivos y propone intervalos
+    de rechazo sin mantener el registro completo en memoria: conserva solo
+    las últimas nlta - 1 muestras de la función característica y el disparo
+    abierto al final del bloque anterior, de modo que el resultado no
+    depende del tamaño de los bloques.
+
+    Un disparo empieza cuando el cociente STA/LTA alcanza umbral_on (o una
+    componente supera la amplitud absoluta `amplitud`) y se extiende
+    mientras el cociente se mantiene por encima de umbral_off.
+
+    Parámetros:
+    - samples: frecuencia de muestreo
+    - sta, lta: longitudes (s) de las ventanas corta y larga
+    - umbral_on, umbral_off: umbrales de activación y desactivación del cociente
+    - amplitud: umbral absoluto de |x| en cualquier componente (None lo desactiva)
+    - margen: segundos añadidos a cada lado de los intervalos (por defecto sta)
+    - t0: tiempo de la primera muestra
+    - media: nivel medio de cada componente; con None se estima en el primer bloque
+    """
+
+    def __init__(self, samples, sta=1.0, lta=30.0, umbral_on=2.5, umbral_off=1.5,
+                 amplitud=None, margen=None, t0=0.0, media=None):
+        if umbral_off > umbral_on:
+            raise ValueError("umbral_off no puede ser mayor que umbral_on.")
+        self.samples = samples
+        self.nsta = max(1, int(sta * samples))
+        self.nlta = max(self.nsta, int(lta * samples))
+        self.umbral_on = umbral_on
+        self.umbral_off = umbral_off
+        self.amplitud = amplitud
+        self.margen = sta if margen is None else margen
+        self.t0 = t0
+        self.media = None if media is None else np.asarray(media, dtype=np.float64)
+        self.intervalos = IntervalIndex()
+        self.nsamples = 0
+        self._historia = np.empty(0)
+        self._abierto = None  # (muestra inicial, alcanzó umbral_on)
+
+    def update(self, z, n, e):
+        """Procesa un bloque de las tres componentes."""
+        x = np.stack([np.asarray(z), np.asarray(n), np.asarray(e)])
+        m = x.shape[-1]
+        if m == 0:
+            return
+        if self.media is None:
+            self.media = np.mean(x, axis=-1, dtype=np.float64)
+        cf = characteristic_function(x, self.media)
+
+        h = len(self._historia)
+        ratio = sta_lta(np.concatenate((self._historia, cf)), self.nsta, self.nlta)[h:]
+        disparo = ratio >= self.umbral_on
+        sostener = ratio > self.umbral_off
+        if self.amplitud is not None:
+            pico = np.max(np.abs(x - self.media[:, None]), axis=0) > self.amplitud
+            disparo |= pico
+            sostener |= pico
+
+        # Tramos consecutivos con el cociente sobre umbral_off
+        bordes = np.diff(np.concatenate(([0], sostener.view(np.int8), [0])))
+        inicios = np.flatnonzero(bordes == 1)
+        finales = np.flatnonzero(bordes == -1)
+        acumulado = np.concatenate(([0], np.cumsum(disparo)))
+        activados = (acumulado[finales] - acumulado[inicios]) > 0
+        inicios = inicios + self.nsamples
+        finales = finales + self.nsamples
+
+        if self._abierto is not None:
+            inicio, activado = self._abierto
+            if len(inicios) and inicios[0] == self.nsamples:
+                # El tramo abierto continúa en este bloque
+                inicios[0] = inicio
+                activados[0] |= activado
+            elif activado:
+                self._emit(inicio, self.nsamples)
+            self._abierto = None
+        if len(inicios) and sostener[-1]:
+            self._abierto = (int(inicios[-1]), bool(activados[-1]))
+            inicios, finales, activados = inicios[:-1], finales[:-1], activados[:-1]
+        for inicio, fin in zip(inicios[activados], finales[activados]):
+            self._emit(inicio, fin)
+
+        self._historia = np.concatenate((self._historia, cf))[-(self.nlta - 1):] if self.nlta > 1 else np.empty(0)
+        self.nsamples += m
+
+    def _emit(self, inicio, fin):
+        """Registra las muestras [inicio, fin) como intervalo de tiempo con margen."""
+        self.intervalos.add(self.t0 + inicio / self.samples - self.margen,
+                            self.t0 + (fin - 1) / self.samples + self.margen)
+
+    def finish(self):
+        """Cierra un disparo abierto al final del registro y retorna los intervalos."""
+        if self._abierto is not None:
+            inicio, activado = self._abierto
+            if activado:
+                self._emit(inicio, self.nsamples)
+            self._abierto = None
+        return self.intervalos
+
+
+def detect_transients(z, n, e, samples, sta=1.0, lta=30.0, umbral_on=2.5, umbral_off=1.5,
+                      amplitud=None, margen=None, t0=0.0, bloque=None):
+    """
+    Propone intervalos de rechazo para todo el registro en una sola pasada.
+
+    Combina la energía de las tres componentes en una función característica,
+    calcula su cociente STA/LTA de forma vectorizada y convierte los
+    disparos (y las muestras que superan `amplitud`) en intervalos de tiempo.
+    El resultado puede pasarse como rechazos a calculate_hvsr_helper o a
+    ProcessData.reject_time_windows.
+
+    Parámetros:
+    - z, n, e: componentes (pueden ser memmaps)
+    - samples: frecuencia de muestreo
+    - sta, lta, umbral_on, umbral_off, amplitud, margen, t0: como en StreamingDetector
+    - bloque: muestras por bloque (None procesa el registro de una vez)
+
+    Retorna:
+    - intervals.IntervalIndex con los intervalos detectados
+    """
+    media = [np.mean(c, dtype=np.float64) for c in (z, n, e)]
+    detector = StreamingDetector(samples, sta=sta, lta=lta, umbral_on=umbral_on, umbral_off=umbral_off,
+                                 amplitud=amplitud, margen=margen, t0=t0, media=media)
+    nsamples = min(len(z), len(n), len(e))
+    paso = int(bloque) if bloque else max(nsamples, 1)
+    for i0 in range(0, nsamples, paso):
+        i1 = min(i0 + paso, nsamples)
+        detector.update(z[i0:i1], n[i0:i1], e[i0:i1])
+    return detector.finish()
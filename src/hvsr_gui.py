@@ -5,18 +5,17 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import geopandas as gpd
-from shapely.geometry import Point
 import os
 from PyQt5.QtGui import QIcon
-import numpy as np
-from scipy.interpolate import griddata
 
-from process_window import ProcessWindow
-from load_data import DataLoader
+# Las ventanas de procesamiento y HVSR (scipy.signal) se importan al abrirlas
+from load_data import DataLoader, identify_component
+from cache import open_default_cache
+from intervals import IntervalIndex
 from plot_data import DataPlotter
-from hvsr_window import HVSRWindow
-from learn import LearnWindow
+from hvsr_plot import HVSRMap, HVSRPlot
+from tasks import TaskRunner, TaskStatus
+import profiling
 
 class ProcessingDialog(QDialog):
     def __init__(self, parent=None):
@@ -40,6 +39,15 @@ class HvsrMainWindow(QMainWindow):
         icon_path = os.path.join(project_root, "images", "icono-hvsr.png")
         self.setWindowIcon(QIcon(icon_path))
         self.setGeometry(100, 100, 1200, 800)
+        # Caché en disco de trazas y espectros (None si no hay directorio utilizable)
+        self.cache = open_default_cache()
+        # Tareas en segundo plano (carga de datos) fuera del hilo de la interfaz
+        self.tasks = TaskRunner(self)
+        self.tasks.profiled.connect(self.show_profile)
+        # Intervalos de tiempo rechazados de los datos cargados
+        self.rechazos = IntervalIndex()
+        # Gráfica de las trazas cargadas (sus niveles de detalle siguen al zoom)
+        self.plotter_datos = None
         self.init_ui()
 
     def init_ui(self):
@@ -52,6 +60,11 @@ class HvsrMainWindow(QMainWindow):
         load_action.triggered.connect(self.load_data)
         toolbar.addAction(load_action)
 
+        # Botón Abrir campaña: tripletas de un directorio desde el catálogo de cabeceras
+        survey_action = QAction("Abrir campaña", self)
+        survey_action.triggered.connect(self.open_survey)
+        toolbar.addAction(survey_action)
+
         # Botón Procesamiento
         proc_action = QAction("Procesamiento", self)
         proc_action.triggered.connect(self.open_processing_dialog)
@@ -66,6 +79,13 @@ class HvsrMainWindow(QMainWindow):
         learn_action.triggered.connect(self.open_learn_window)
         toolbar.addAction(learn_action)
 
+        # Desglose de tiempos por etapa en la terminal (también con HVSRLEARN_PROFILE)
+        profile_action = QAction("Perfilar", self)
+        profile_action.setCheckable(True)
+        profile_action.setChecked(profiling.is_enabled())
+        profile_action.toggled.connect(self.toggle_profiling)
+        toolbar.addAction(profile_action)
+
         # Widget central: tabs de figuras + terminal
         central_widget = QWidget(self)
         self.setCentralWidget(central_widget)
@@ -91,6 +111,7 @@ class HvsrMainWindow(QMainWindow):
         self.figure_hvsr = Figure(figsize=(8, 6))
         self.canvas_hvsr = FigureCanvas(self.figure_hvsr)
         tab2_layout.addWidget(self.canvas_hvsr, stretch=3)
+        self.hvsr_plot = HVSRPlot(self.figure_hvsr, pico=False)
 
         # Resumen HVSR (a la derecha del gráfico)
         self.hvsr_summary = QLabel("Aquí aparecerá el resumen del cálculo HVSR.")
@@ -106,6 +127,7 @@ class HvsrMainWindow(QMainWindow):
         self.figure_map = Figure(figsize=(6, 5))
         self.canvas_map = FigureCanvas(self.figure_map)
         tab_map_layout.addWidget(self.canvas_map)
+        self.hvsr_map = HVSRMap(self.figure_map)
 
         self.interp_checkbox = QCheckBox("Mostrar contorno")
         tab_map_layout.addWidget(self.interp_checkbox)
@@ -125,6 +147,10 @@ class HvsrMainWindow(QMainWindow):
         self.terminal.setFixedHeight(120)
         main_layout.addWidget(self.terminal, stretch=1)
 
+        # Progreso de las tareas en segundo plano
+        self.task_status = TaskStatus(self.tasks)
+        self.statusBar().addPermanentWidget(self.task_status)
+
     def load_data(self):
         file_dialog = QFileDialog(self)
         file_dialog.setFileMode(QFileDialog.ExistingFiles)
@@ -138,31 +164,88 @@ class HvsrMainWindow(QMainWindow):
             # Identificar cada componente por su nombre de archivo
             rutas = {'z': None, 'n': None, 'e': None}
             for f in files:
-                fname = f.lower()
-                if '.z.' in fname or fname.endswith('z.sac') or fname.endswith('z.gcf'):
-                    rutas['z'] = f
-                elif '.n.' in fname or fname.endswith('n.sac') or fname.endswith('n.gcf'):
-                    rutas['n'] = f
-                elif '.e.' in fname or fname.endswith('e.sac') or fname.endswith('e.gcf'):
-                    rutas['e'] = f
+                comp = identify_component(f)
+                if comp is not None:
+                    rutas[comp] = f
 
             if None in rutas.values():
                 self.terminal.append("No se pudieron identificar las tres componentes (Z, N, E).")
                 return
 
-            datos = DataLoader.load_triple(rutas['z'], rutas['n'], rutas['e'])
-            self.datos = datos
-            self.terminal.append(f"Archivos cargados:\nZ: {rutas['z']}\nN: {rutas['n']}\nE: {rutas['e']}")
+            self.load_triplet(rutas)
 
-            plotter = DataPlotter(self.figure_datos)
-            plotter.plot_triple_component(datos)
-            self.canvas_datos.draw()
+    def load_triplet(self, rutas):
+        """Carga en segundo plano la tripleta {'z', 'n', 'e'} indicada."""
+        self.terminal.append("Cargando datos...")
+        self.tasks.submit(
+            'cargar', self._load_job, rutas,
+            on_result=lambda datos: self._on_data_loaded(rutas, datos),
+            on_error=lambda error: self.terminal.append(f"Error al cargar los datos: {error}")
+        )
+
+    def open_survey(self):
+        """Indexa un directorio de campaña y carga la tripleta elegida."""
+        raiz = QFileDialog.getExistingDirectory(self, "Directorio de la campaña")
+        if not raiz:
+            return
+        import sqlite3
+
+        from catalog import Catalog
+        from survey_window import SurveyWindow
+
+        try:
+            catalogo = Catalog()
+        except (OSError, sqlite3.Error) as err:
+            # Directorio no utilizable o catálogo dañado o bloqueado
+            self.terminal.append(f"No se pudo abrir el catálogo: {err}")
+            return
+        dlg = SurveyWindow(raiz, self, catalogo=catalogo)
+        if dlg.exec_() and dlg.seleccion is not None:
+            self.load_triplet({comp: dlg.seleccion[comp] for comp in ('z', 'n', 'e')})
+
+    def _load_job(self, ctx, rutas):
+        """Carga la tripleta en un hilo de trabajo."""
+        ctx.progress(0, "Cargando datos...")
+        return DataLoader.load_triple_merged(rutas['z'], rutas['n'], rutas['e'], cache=self.cache)
+
+    def _on_data_loaded(self, rutas, resultado):
+        datos, huecos = resultado
+        self.datos = datos
+        # Las ventanas que tocan los huecos del registro se descartan como las rechazadas a mano
+        self.rechazos = huecos
+        self.terminal.append(f"Archivos cargados:\nZ: {rutas['z']}\nN: {rutas['n']}\nE: {rutas['e']}")
+        if len(huecos):
+            self.terminal.append(f"Huecos en el registro: {len(huecos)} ({huecos.total():.1f} s en total); "
+                                 f"las ventanas que los tocan se descartan.")
+        if self.cache is not None:
+            self.terminal.append(self.cache.summary())
+
+        # matplotlib guarda los callbacks con referencias débiles: se conserva el plotter
+        self.plotter_datos = DataPlotter(self.figure_datos)
+        self.plotter_datos.plot_triple_component(datos, rechazos=huecos)
+        self.canvas_datos.draw()
 
     def open_learn_window(self):
+        from learn import LearnWindow
+
         dlg = LearnWindow(self)
         dlg.exec_()
+
+    def toggle_profiling(self, activo):
+        if activo:
+            profiling.enable()
+            self.terminal.append("Perfilado activado: se mostrará el tiempo de cada etapa.")
+        else:
+            profiling.disable()
+            self.terminal.append("Perfilado desactivado.")
+
+    def show_profile(self, perfil):
+        """Muestra en la terminal el desglose de tiempos de una tarea."""
+        self.terminal.append(perfil.report())
         
     def open_processing_dialog(self):
+        from process_window import ProcessWindow
+
         dlg = ProcessWindow(self.datos, self)
         dlg.exec_()
         self.terminal.append("Ventana de procesamiento abierta.")
@@ -171,6 +254,8 @@ class HvsrMainWindow(QMainWindow):
         if not hasattr(self, 'datos') or self.datos is None:
             self.terminal.append("Primero debes cargar y procesar los datos.")
             return
+        from hvsr_window import HVSRWindow
+
         dlg = HVSRWindow(self.datos, self)
         dlg.exec_()
         self.terminal.append("Ventana de cocientes espectrales abierta.")
@@ -179,8 +264,7 @@ class HvsrMainWindow(QMainWindow):
         print("Dibujando HVSR")  # Debug
         if not self.hvsr_results:
             self.hvsr_summary.setText("No hay resultados HVSR guardados.")
-            self.figure_hvsr.clear()
-            self.canvas_hvsr.draw()
+            self.hvsr_plot.update(None)
             return
 
         res = self.hvsr_results
@@ -192,33 +276,17 @@ class HvsrMainWindow(QMainWindow):
             f"<b>Overlap:</b> {res['params']['overlap']} %<br>"
             f"<b>Konno-Ohmachi b:</b> {res['params']['b']}<br>"
         )
+        ventanas = res.get("ventanas")
+        if ventanas is not None:
+            resumen += (
+                f"<b>Ventanas aceptadas:</b> {int(ventanas['ventanas_aceptadas'].sum())}"
+                f" de {len(ventanas['ventanas_aceptadas'])}<br>"
+                f"<b>f0 por ventana:</b> {ventanas['f0_media']:.3f} Hz"
+                f" (σ ln = {ventanas['f0_std']:.3f})<br>"
+            )
         self.hvsr_summary.setText(resumen)
 
-        self.figure_hvsr.clear()
-        ax = self.figure_hvsr.add_subplot(1, 1, 1)
-        f = res["frecuencias"]
-        HV = res["HVSR"]
-        sd_moving = res["sd_moving"]
-        HV_f = res["HV_f"]
-        pos = res["pos"]
-        frecuencia_sitio = res["frecuencia_sitio"]
-
-        ax.set_title(f'HVSR - Método: {res["params"]["method"]}')
-        ax.plot(f, HV - sd_moving, '--', lw=0.5, c='black')
-        ax.plot(f, HV + sd_moving, '--', lw=0.5, c='black')
-        ax.fill_between(f, HV - sd_moving, HV + sd_moving, color='gray', alpha=0.5)
-        ax.plot(f, HV, label='HVSR', color='purple')
-        if len(HV_f) > 0:
-            ax.axvline(frecuencia_sitio, c='red', label='Frecuencia del sitio')
-        ax.set_xlim(0.1, 20)
-        ax.set_ylim(0, max(HV) * 1.1)
-        ax.grid(True, which='both', linestyle='--', linewidth=0.5)
-        ax.set_xlabel('Frecuencia (Hz)', fontsize=12)
-        ax.set_ylabel('HVSR', fontsize=12)
-        ax.legend()
-        ax.set_xscale('log')
-        self.figure_hvsr.tight_layout()
-        self.canvas_hvsr.draw()
+        self.hvsr_plot.update(res)
         self.tabs.setCurrentWidget(self.tab_hvsr)
 
     def export_hvsr_points_csv(self):
@@ -237,51 +305,8 @@ class HvsrMainWindow(QMainWindow):
         QMessageBox.information(self, "Exportar CSV", f"Archivo guardado: {path}")
 
     def show_hvsr_map(self):
-        if not self.hvsr_points:
-            self.figure_map.clear()
-            self.canvas_map.draw()
-            return
-
-        gdf = gpd.GeoDataFrame(
-            self.hvsr_points,
-            geometry=[Point(p["lon"], p["lat"]) for p in self.hvsr_points],
-            crs="EPSG:4326"
-        )
-
-        self.figure_map.clear()
-        ax = self.figure_map.add_subplot(1, 1, 1)
-
-        show_contour = hasattr(self, "interp_checkbox") and self.interp_checkbox.isChecked() and len(self.hvsr_points) >= 3
-
-        # Puntos
-        gdf.plot(
-            ax=ax,
-            column="frecuencia",
-            cmap="viridis",
-            legend=not show_contour,  # Solo muestra la barra si NO hay contorno
-            markersize=80,
-            edgecolor="black"
-        )
-
-        # Interpolación lineal y contorno si hay al menos 3 puntos
-        if show_contour:
-            lons = gdf.geometry.x.values
-            lats = gdf.geometry.y.values
-            freqs = gdf["frecuencia"].values
-
-            xi = np.linspace(lons.min(), lons.max(), 100)
-            yi = np.linspace(lats.min(), lats.max(), 100)
-            xi, yi = np.meshgrid(xi, yi)
-            zi = griddata((lons, lats), freqs, (xi, yi), method='linear')
-
-            contour = ax.contourf(xi, yi, zi, levels=10, cmap="viridis", alpha=0.5)
-            self.figure_map.colorbar(contour, ax=ax, label="Frecuencia fundamental (Hz)")
-
-        ax.set_title("Mapa de isofrecuencias")
-        ax.set_xlabel("Longitud")
-        ax.set_ylabel("Latitud")
-        self.figure_map.tight_layout()
-        self.canvas_map.draw()
+        show_contour = hasattr(self, "interp_checkbox") and self.interp_checkbox.isChecked()
+        self.hvsr_map.update(self.hvsr_points, contorno=show_contour)
 
 
     def save_map_figure(self):
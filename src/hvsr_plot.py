@@ -0,0 +1,279 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+
+
+class HVSRPlot:
+    """
+    Gráfica H/V que crea sus artistas una sola vez y solo actualiza sus datos.
+
+    Cada nuevo cálculo modifica las líneas (set_data), el pico
+    (set_offsets), la banda de desviación (vértices del polígono) y las
+    curvas por ventana (set_segments) en lugar de reconstruir la figura. La
+    línea de frecuencia elegida por el usuario es un artista animado que se
+    actualiza con blitting, sin redibujar el resto de la figura.
+
+    Parámetros:
+    - figure: Figure de matplotlib (con su canvas)
+    - pico: dibujar la estrella del pico
+    """
+
+    def __init__(self, figure, pico=True):
+        self.figure = figure
+        self.figure.clear()
+        self.ax = ax = figure.add_subplot(1, 1, 1)
+        self._con_pico = pico
+        self._fondo = None
+        self._maquetado = False
+
+        # Curva simple con su banda de desviación móvil
+        self.banda = ax.fill_between([1.0, 2.0], [0.0, 0.0], [0.0, 0.0], color='gray', alpha=0.5)
+        self.sd_menos, = ax.plot([], [], '--', lw=0.5, c='black')
+        self.sd_mas, = ax.plot([], [], '--', lw=0.5, c='black')
+        self.curva, = ax.plot([], [], label='HVSR', color='purple')
+
+        # Estadística por ventanas
+        self.aceptadas = LineCollection([], colors='gray', linewidths=0.3, alpha=0.6, label='Ventanas aceptadas')
+        self.rechazadas = LineCollection([], colors='lightcoral', linewidths=0.3, alpha=0.6,
+                                         label='Ventanas rechazadas')
+        ax.add_collection(self.aceptadas)
+        ax.add_collection(self.rechazadas)
+        self.log_menos, = ax.plot([], [], '--', lw=0.8, c='black')
+        self.log_mas, = ax.plot([], [], '--', lw=0.8, c='black', label='Media ± 1σ (lognormal)')
+        self.media, = ax.plot([], [], label='HVSR (media lognormal)', color='purple')
+
+        self.pico = ax.scatter([], [], s=100, marker='*', c='violet', label='Pico')
+        self.f0 = ax.axvline(1.0, c='red', label='Frecuencia del sitio')
+        self.usuario = ax.axvline(1.0, c='orange', linestyle='--', label='Frecuencia usuario',
+                                  animated=True, visible=False)
+
+        ax.set_xscale('log')
+        ax.set_xlim(0.1, 20)
+        ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+        ax.set_xlabel('Frecuencia (Hz)', fontsize=12)
+        ax.set_ylabel('HVSR', fontsize=12)
+        self._set_visible(False, False)
+
+        self._cid = figure.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _set_visible(self, simple, ventanas):
+        for artista in (self.banda, self.sd_menos, self.sd_mas, self.curva):
+            artista.set_visible(simple)
+        for artista in (self.aceptadas, self.rechazadas, self.log_menos, self.log_mas, self.media):
+            artista.set_visible(ventanas)
+
+    def update(self, res):
+        """
+        Actualiza la gráfica con un diccionario de resultados HVSR
+        (como HVSRWindow.hvsr_results). Con res=None se vacía.
+        """
+        if not res:
+            self._set_visible(False, False)
+            for artista in (self.pico, self.f0, self.usuario):
+                artista.set_visible(False)
+            self.ax.set_title('')
+            self._redraw()
+            return
+
+        f = np.asarray(res["frecuencias"])
+        frecuencia_sitio = res["frecuencia_sitio"]
+        ventanas = res.get("ventanas")
+        self.ax.set_title(f'HVSR - Método: {res["params"]["method"]}')
+
+        if ventanas is not None:
+            HV = ventanas["HV_media"]
+            validas = f > 0
+            HV_ventanas = ventanas["HV_ventanas"]
+            aceptadas = ventanas["ventanas_aceptadas"]
+            for coleccion, mask in ((self.aceptadas, aceptadas), (self.rechazadas, ~aceptadas)):
+                curvas = np.stack(np.broadcast_arrays(f[validas], HV_ventanas[mask][:, validas]), axis=-1)
+                coleccion.set_segments(curvas)
+            self.log_menos.set_data(f, ventanas["HV_menos"])
+            self.log_mas.set_data(f, ventanas["HV_mas"])
+            self.media.set_data(f, HV)
+            self._set_visible(False, True)
+            self.rechazadas.set_visible(bool((~aceptadas).any()))
+            hay_pico = np.isfinite(frecuencia_sitio)
+            y_pico = np.interp(frecuencia_sitio, f, HV) if hay_pico else np.nan
+        else:
+            HV = res["HVSR"]
+            sd_moving = res["sd_moving"]
+            self.sd_menos.set_data(f, HV - sd_moving)
+            self.sd_mas.set_data(f, HV + sd_moving)
+            self.curva.set_data(f, HV)
+            self.banda.set_verts([self._band_vertices(f, HV - sd_moving, HV + sd_moving)])
+            self._set_visible(True, False)
+            hay_pico = len(res["HV_f"]) > 0
+            y_pico = res["HV_f"][res["pos"]] if hay_pico else np.nan
+
+        self.f0.set_xdata([frecuencia_sitio, frecuencia_sitio])
+        self.f0.set_visible(bool(hay_pico))
+        self.pico.set_offsets([[frecuencia_sitio, y_pico]] if hay_pico else np.empty((0, 2)))
+        self.pico.set_visible(self._con_pico and bool(hay_pico))
+
+        self.ax.set_ylim(0, np.nanmax(HV) * 1.1)
+        self._update_legend()
+        self._redraw()
+
+    @staticmethod
+    def _band_vertices(f, inferior, superior):
+        """Polígono de fill_between entre dos curvas (sin puntos no finitos ni f <= 0)."""
+        validos = (f > 0) & np.isfinite(inferior) & np.isfinite(superior)
+        x = f[validos]
+        return np.concatenate((np.column_stack((x, inferior[validos])),
+                               np.column_stack((x[::-1], superior[validos][::-1]))))
+
+    def _update_legend(self):
+        artistas = [a for a in (self.curva, self.aceptadas, self.rechazadas, self.log_mas, self.media,
+                                self.pico, self.f0, self.usuario) if a.get_visible()]
+        self.ax.legend(handles=artistas)
+
+    def _redraw(self):
+        if not self._maquetado:
+            self.figure.tight_layout()
+            self._maquetado = True
+        self.figure.canvas.draw_idle()
+
+    def set_user_frequency(self, frecuencia):
+        """
+        Mueve la línea de frecuencia del usuario (None o <= 0 la oculta) con
+        blitting: se restaura el fondo guardado y solo se dibuja la línea.
+        """
+        visible = frecuencia is not None and frecuencia > 0
+        cambio_leyenda = visible != self.usuario.get_visible()
+        if visible:
+            self.usuario.set_xdata([frecuencia, frecuencia])
+        self.usuario.set_visible(visible)
+
+        canvas = self.figure.canvas
+        if cambio_leyenda or self._fondo is None or not getattr(canvas, 'supports_blit', False):
+            # La leyenda cambia: se necesita un redibujado completo
+            self._update_legend()
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self._fondo)
+        self.ax.draw_artist(self.usuario)
+        canvas.blit(self.ax.bbox)
+
+    def _on_draw(self, evento):
+        """Guarda el fondo tras cada dibujado completo y añade la línea animada."""
+        canvas = self.figure.canvas
+        if not getattr(canvas, 'supports_blit', False):
+            return
+        self._fondo = canvas.copy_from_bbox(self.ax.bbox)
+        if self.usuario.get_visible():
+            self.ax.draw_artist(self.usuario)
+
+
+class HVSRMap:
+    """
+    Mapa de puntos HVSR con artistas persistentes: la dispersión se actualiza
+    con set_offsets/set_array y la barra de color se reutiliza. Solo el
+    contorno interpolado (opcional) se vuelve a generar.
+    """
+
+    def __init__(self, figure):
+        self.figure = figure
+        self.figure.clear()
+        self.ax = ax = figure.add_subplot(1, 1, 1)
+        self.puntos = ax.scatter([], [], c=[], cmap='viridis', s=80, edgecolors='black', zorder=3)
+        self.colorbar = figure.colorbar(self.puntos, ax=ax, label="Frecuencia fundamental (Hz)")
+        self.contorno = None
+        ax.set_title("Mapa de isofrecuencias")
+        ax.set_xlabel("Longitud")
+        ax.set_ylabel("Latitud")
+        self._maquetado = False
+
+    def update(self, puntos, contorno=False):
+        """
+        Dibuja los puntos [{'lat', 'lon', 'frecuencia'}, ...] y, con
+        contorno=True y al menos 3 puntos, la interpolación lineal.
+        """
+        if self.contorno is not None:
+            self.contorno.remove()
+            self.contorno = None
+
+        lons = np.array([p["lon"] for p in puntos], dtype=float)
+        lats = np.array([p["lat"] for p in puntos], dtype=float)
+        freqs = np.array([p["frecuencia"] for p in puntos], dtype=float)
+        self.puntos.set_offsets(np.column_stack((lons, lats)) if len(puntos) else np.empty((0, 2)))
+        self.puntos.set_array(freqs)
+
+        if len(puntos):
+            self.puntos.set_clim(np.nanmin(freqs), np.nanmax(freqs))
+            margen_x = max(1e-4, 0.05 * np.ptp(lons))
+            margen_y = max(1e-4, 0.05 * np.ptp(lats))
+            self.ax.set_xlim(lons.min() - margen_x, lons.max() + margen_x)
+            self.ax.set_ylim(lats.min() - margen_y, lats.max() + margen_y)
+
+        if contorno and len(puntos) >= 3:
+            from scipy.interpolate import griddata
+
+            xi, yi = np.meshgrid(np.linspace(lons.min(), lons.max(), 100),
+                                 np.linspace(lats.min(), lats.max(), 100))
+            zi = griddata((lons, lats), freqs, (xi, yi), method='linear')
+            self.contorno = self.ax.contourf(xi, yi, zi, levels=10, cmap="viridis", alpha=0.5,
+                                             norm=self.puntos.norm)
+
+        if not self._maquetado:
+            self.figure.tight_layout()
+            self._maquetado = True
+        self.figure.canvas.draw_idle()
+
+
+class AzimuthPlot:
+    """
+    Gráfica polar del HVSR direccional: el ángulo es el azimut (desde el
+    norte, en sentido horario), el radio la frecuencia en escala logarítmica
+    y el color la amplitud H/V. Cada azimut se repite en la dirección opuesta
+    (el espectro de potencia es el mismo) y una línea blanca une las
+    frecuencias del pico.
+
+    La malla de color se regenera en cada cálculo (su forma depende del
+    número de azimuts y de frecuencias); la línea del pico y la barra de
+    color se reutilizan.
+    """
+
+    def __init__(self, figure, fmin=0.1, fmax=20.0):
+        self.figure = figure
+        self.figure.clear()
+        self.ax = ax = figure.add_subplot(1, 1, 1, projection='polar')
+        ax.set_theta_zero_location('N')
+        ax.set_theta_direction(-1)
+        self.fmin, self.fmax = fmin, fmax
+        self.malla = None
+        self.colorbar = None
+        self.pico, = ax.plot([], [], c='white', lw=1.0)
+        ax.set_title("HVSR direccional")
+        self._maquetado = False
+
+    def update(self, res):
+        """Dibuja el diccionario de calculate_hvsr_azimuthal."""
+        f = res["frecuencias"]
+        banda = (f > 0) & (f >= self.fmin) & (f <= self.fmax)
+        r = np.log10(f[banda])
+        theta = np.deg2rad(np.concatenate((res["azimuts"], res["azimuts"] + 180.0)))
+        HV = res["HV"][:, banda]
+        HV = np.concatenate((HV, HV))
+
+        if self.malla is not None:
+            self.malla.remove()
+        self.malla = self.ax.pcolormesh(theta, r, HV.T, shading='nearest', cmap='viridis', zorder=1)
+        if self.colorbar is None:
+            self.colorbar = self.figure.colorbar(self.malla, ax=self.ax, pad=0.1, label="H/V")
+        else:
+            self.colorbar.update_normal(self.malla)
+
+        f_pico = np.concatenate((res["frecuencia_pico"], res["frecuencia_pico"]))
+        self.pico.set_data(np.append(theta, theta[0]), np.log10(np.append(f_pico, f_pico[0])))
+        self.pico.set_zorder(2)
+
+        marcas = np.array([0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50])
+        marcas = marcas[(marcas >= f[banda].min()) & (marcas <= f[banda].max())] if len(r) else marcas[:0]
+        self.ax.set_yticks(np.log10(marcas), [f"{m:g}" for m in marcas])
+        if len(r):
+            self.ax.set_ylim(r.min(), r.max())
+
+        if not self._maquetado:
+            self.figure.tight_layout()
+            self._maquetado = True
+        self.figure.canvas.draw_idle()
@@ -5,7 +5,12 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QIcon
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-from hvsr_calculator import calculate_hvsr_helper
+import numpy as np
+from hvsr_calculator import calculate_hvsr_azimuthal, calculate_hvsr_helper, calculate_hvsr_windows
+from smoothing import DEFAULT_N_FRECUENCIAS
+from hvsr_plot import AzimuthPlot, HVSRPlot
+from load_data import start_time
+from tasks import TaskRunner, TaskStatus
 
 class HVSRWindow(QDialog):
     def __init__(self, datos, parent=None):
@@ -14,6 +19,10 @@ class HVSRWindow(QDialog):
         self.datos = datos
         self.parent = parent
         self.hvsr_results = None
+        # El cálculo se ejecuta en segundo plano; solo se muestra la última solicitud
+        self.tasks = TaskRunner(self)
+        if hasattr(parent, 'show_profile'):
+            self.tasks.profiled.connect(parent.show_profile)
         self.init_ui()
         self.resize(500, 500)  # Ajusta el tamaño inicial
 
@@ -52,10 +61,56 @@ class HVSRWindow(QDialog):
         self.b_edit = QLineEdit("188.5")
         form_layout.addRow("Konno-Ohmachi b:", self.b_edit)
 
+        # Estadística por ventanas y rechazo de ventanas
+        ventanas_layout = QHBoxLayout()
+        self.windows_checkbox = QCheckBox("Estadística por ventanas")
+        self.windows_checkbox.setToolTip("Calcula el H/V de cada ventana y su media y desviación lognormal.")
+        ventanas_layout.addWidget(self.windows_checkbox)
+        self.rechazo_box = QComboBox()
+        self.rechazo_box.addItems(["Sin rechazo", "Consistencia del pico", "STA/LTA"])
+        self.rechazo_box.setDisabled(True)
+        ventanas_layout.addWidget(QLabel("Rechazo:"))
+        ventanas_layout.addWidget(self.rechazo_box)
+        form_layout.addRow("Ventanas:", ventanas_layout)
+        self.windows_checkbox.stateChanged.connect(
+            lambda state: self.rechazo_box.setDisabled(not state)
+        )
+
+        # Decimación antialias previa a Welch
+        self.decimate_checkbox = QCheckBox("Decimar a la banda del pico (hasta 20 Hz)")
+        self.decimate_checkbox.setToolTip("Reduce la frecuencia de muestreo con un filtro antialias antes de "
+                                          "calcular los espectros: más rápido, sin frecuencias por encima de "
+                                          "la nueva Nyquist.")
+        form_layout.addRow("Decimación:", self.decimate_checkbox)
+
+        # Suavizado sobre una malla logarítmica en lugar de las frecuencias de la FFT
+        self.log_grid_checkbox = QCheckBox(f"Malla logarítmica ({DEFAULT_N_FRECUENCIAS} frecuencias)")
+        self.log_grid_checkbox.setToolTip("Suaviza con Konno-Ohmachi sobre una malla logarítmica de frecuencias: "
+                                          "operador mucho menor en registros largos o de muestreo alto. La "
+                                          "ventana de desviación estándar móvil se cuenta en puntos de esa malla.")
+        form_layout.addRow("Suavizado:", self.log_grid_checkbox)
+
+        # HVSR direccional (azimuts de la componente horizontal rotada)
+        direccional_layout = QHBoxLayout()
+        self.azimuth_checkbox = QCheckBox("HVSR direccional")
+        self.azimuth_checkbox.setToolTip("Calcula el H/V de la componente horizontal rotada a cada azimut "
+                                         "a partir de los mismos espectros de N, E y su espectro cruzado.")
+        direccional_layout.addWidget(self.azimuth_checkbox)
+        self.azimuth_edit = QLineEdit("36")
+        self.azimuth_edit.setDisabled(True)
+        direccional_layout.addWidget(QLabel("Azimuts:"))
+        direccional_layout.addWidget(self.azimuth_edit)
+        form_layout.addRow("Direccional:", direccional_layout)
+        self.azimuth_checkbox.stateChanged.connect(
+            lambda state: self.azimuth_edit.setDisabled(not state)
+        )
+
         # Frecuencia fundamental
         self.freq_edit = QLineEdit()
         self.freq_edit.setPlaceholderText("Automática")
-        self.freq_edit.setToolTip("Frecuencia fundamental detectada. Puedes editarla para marcar otra frecuencia.")
+        self.freq_edit.setToolTip("Frecuencia fundamental detectada. Puedes editarla (o hacer clic en la gráfica) "
+                                  "para marcar otra frecuencia.")
+        self.freq_edit.textChanged.connect(self._on_user_frequency)
         form_layout.addRow("Frecuencia fundamental (Hz):", self.freq_edit)
 
         # Georreferenciación
@@ -88,6 +143,16 @@ class HVSRWindow(QDialog):
         self.canvas = FigureCanvas(self.figure)
         layout.addWidget(QLabel("Cociente espectral H/V"))
         layout.addWidget(self.canvas)
+        # Los artistas se crean una vez y se actualizan en cada cálculo
+        self.plot = HVSRPlot(self.figure)
+        self.canvas.mpl_connect('button_press_event', self._on_canvas_click)
+
+        # Gráfica polar del HVSR direccional (visible cuando hay resultado)
+        self.figure_polar = Figure(figsize=(4, 4))
+        self.canvas_polar = FigureCanvas(self.figure_polar)
+        self.canvas_polar.setVisible(False)
+        layout.addWidget(self.canvas_polar)
+        self.plot_polar = AzimuthPlot(self.figure_polar)
 
         btn_layout = QHBoxLayout()
         btn_calc = QPushButton("Calcular HVSR")
@@ -103,6 +168,7 @@ class HVSRWindow(QDialog):
         btn_layout.addWidget(btn_export)
 
         layout.addLayout(btn_layout)
+        layout.addWidget(TaskStatus(self.tasks))
         self.setLayout(layout)
 
     def calculate_hvsr(self):
@@ -133,10 +199,83 @@ class HVSRWindow(QDialog):
             QMessageBox.warning(self, "Error", "nfft debe ser mayor o igual que nperseg.")
             return
 
-        f, HV, sd_moving, f_rejected, rejected_data, frecuencia_sitio, HV_f, pos = calculate_hvsr_helper(
-            z, n, e, sm, method, window, ancho, overlap, detr, confianza, b, samples
+        azimuts = None
+        if self.azimuth_checkbox.isChecked():
+            try:
+                azimuts = int(self.azimuth_edit.text())
+            except ValueError:
+                azimuts = 0
+            if azimuts < 1:
+                QMessageBox.warning(self, "Error", "El número de azimuts debe ser un entero positivo.")
+                return
+
+        rechazo = None
+        if self.windows_checkbox.isChecked():
+            rechazo = {"Sin rechazo": None, "Consistencia del pico": "consistencia", "STA/LTA": "sta_lta"}[
+                self.rechazo_box.currentText()]
+        params = {
+            "method": method,
+            "window": window,
+            "ancho": ancho,
+            "overlap": overlap,
+            "sm": sm,
+            "detr": detr,
+            "confianza": confianza,
+            "b": b,
+            "sampling_rate": samples,
+            "fmax_analisis": 20.0 if self.decimate_checkbox.isChecked() else None,
+            "n_frecuencias": DEFAULT_N_FRECUENCIAS if self.log_grid_checkbox.isChecked() else None,
+            "azimuts": azimuts
+        }
+        # Intervalos rechazados en la ventana de procesamiento
+        rechazos = getattr(self.parent, "rechazos", None) or None
+        t0 = start_time(self.datos['z']) if rechazos else 0.0
+        self.tasks.submit(
+            'hvsr', self._hvsr_job, z, n, e, params, self.windows_checkbox.isChecked(), rechazo,
+            getattr(self.parent, "cache", None), rechazos, t0,
+            on_result=lambda resultado: self._on_hvsr_ready(params, resultado),
+            on_error=lambda error: QMessageBox.warning(self, "Error", error.split(": ", 1)[-1])
         )
-        self.freq_edit.setText(f"{frecuencia_sitio:.3f}")
+
+    @staticmethod
+    def _hvsr_job(ctx, z, n, e, params, por_ventanas, rechazo, cache, rechazos=None, t0=0.0):
+        """Cálculo HVSR (y estadística por ventanas) en un hilo de trabajo."""
+        p = params
+        ctx.progress(0, "Calculando espectros H/V...")
+        resultado = calculate_hvsr_helper(
+            z, n, e, p["sm"], p["method"], p["window"], p["ancho"], p["overlap"], p["detr"],
+            p["confianza"], p["b"], p["sampling_rate"], n_frecuencias=p["n_frecuencias"], cache=cache,
+            rechazos=rechazos, t0=t0, fmax_analisis=p["fmax_analisis"]
+        )
+        ventanas = None
+        if por_ventanas:
+            ctx.progress(50, "Estadística por ventanas...")
+            ventanas = calculate_hvsr_windows(
+                z, n, e, p["sm"], p["method"], p["window"], p["ancho"], p["overlap"], p["detr"],
+                p["b"], p["sampling_rate"], rechazo=rechazo, n_frecuencias=p["n_frecuencias"],
+                rechazos=rechazos, t0=t0, fmax_analisis=p["fmax_analisis"]
+            )
+        direccional = None
+        if p.get("azimuts"):
+            ctx.progress(75, "HVSR direccional...")
+            # Mediana de los segmentos, como la curva H/V principal: a 0° y 90°
+            # coincide con los métodos Luendei and Albarello N y E
+            direccional = calculate_hvsr_azimuthal(
+                z, n, e, p["sm"], p["window"], p["ancho"], p["overlap"], p["detr"], p["b"],
+                p["sampling_rate"], azimuts=p["azimuts"], average='median',
+                n_frecuencias=p["n_frecuencias"], rechazos=rechazos, t0=t0, fmax_analisis=p["fmax_analisis"]
+            )
+        ctx.progress(100, "Listo")
+        return resultado, ventanas, direccional
+
+    def _on_hvsr_ready(self, params, resultado):
+        (f, HV, sd_moving, f_rejected, rejected_data, frecuencia_sitio, HV_f, pos), ventanas, direccional = resultado
+        cache = getattr(self.parent, "cache", None)
+        if cache is not None and hasattr(self.parent, "terminal"):
+            self.parent.terminal.append(cache.summary())
+        if ventanas is not None:
+            frecuencia_sitio = ventanas["frecuencia_sitio"]
+
         geo_data = None
         if self.geo_checkbox.isChecked():
             try:
@@ -146,11 +285,6 @@ class HVSRWindow(QDialog):
             except Exception:
                 geo_data = None
 
-        try:
-            freq_usuario = float(self.freq_edit.text())
-        except Exception:
-            freq_usuario = None
-
         self.hvsr_results = {
             "geo": geo_data,
             "frecuencia_sitio": frecuencia_sitio,
@@ -159,42 +293,47 @@ class HVSRWindow(QDialog):
             "sd_moving": sd_moving,
             "HV_f": HV_f,
             "pos": pos,
-            "params": {
-                "method": method,
-                "window": window,
-                "ancho": ancho,
-                "overlap": overlap,
-                "sm": sm,
-                "detr": detr,
-                "confianza": confianza,
-                "b": b,
-                "sampling_rate": samples
-            }
+            "ventanas": ventanas,
+            "direccional": direccional,
+            "params": params
         }
 
-        self.figure.clear()
-        ax = self.figure.add_subplot(1, 1, 1)
-        ax.set_title(f'HVSR - Método: {method}')
-        ax.plot(f, HV - sd_moving, '--', lw=0.5, c='black')
-        ax.plot(f, HV + sd_moving, '--', lw=0.5, c='black')
-        ax.fill_between(f, HV - sd_moving, HV + sd_moving, color='gray', alpha=0.5)
-        ax.plot(f, HV, label='HVSR', color='purple')
-        if len(HV_f) > 0:
-            ax.scatter(frecuencia_sitio, HV_f[pos], s=100, marker='*', c='violet', label='Pico')
-            ax.axvline(frecuencia_sitio, c='red', label='Frecuencia del sitio')
-        if freq_usuario and abs(freq_usuario - frecuencia_sitio) > 1e-3:
-            ax.axvline(freq_usuario, c='orange', linestyle='--', label='Frecuencia usuario')
-        ax.set_xlim(0.1, 20)
-        ax.set_ylim(0, max(HV) * 1.1)
-        ax.grid(True, which='both', linestyle='--', linewidth=0.5)
-        ax.set_xlabel('Frecuencia (Hz)', fontsize=12)
-        ax.set_ylabel('HVSR', fontsize=12)
-        ax.legend()
-        ax.set_xscale('log')
-        self.figure.tight_layout()
-        self.canvas.draw()
+        self.plot.update(self.hvsr_results)
+        if direccional is not None:
+            self.plot_polar.update(direccional)
+            if hasattr(self.parent, "terminal"):
+                i = int(np.nanargmax(direccional["amplitud_pico"]))
+                self.parent.terminal.append(
+                    f"HVSR direccional: amplitud máxima {direccional['amplitud_pico'][i]:.2f} a "
+                    f"{direccional['frecuencia_pico'][i]:.3f} Hz, azimut {direccional['azimuts'][i]:.0f}°")
+        self.canvas_polar.setVisible(direccional is not None)
+        self.freq_edit.setText(f"{frecuencia_sitio:.3f}")
+        self._on_user_frequency()
+
+    def _on_user_frequency(self, *args):
+        """Mueve la línea de frecuencia del usuario si difiere de la del sitio."""
+        try:
+            freq_usuario = float(self.freq_edit.text())
+        except ValueError:
+            freq_usuario = None
+        if self.hvsr_results is None:
+            return
+        if freq_usuario is not None and abs(freq_usuario - self.hvsr_results["frecuencia_sitio"]) <= 1e-3:
+            freq_usuario = None
+        self.plot.set_user_frequency(freq_usuario)
+
+    def _on_canvas_click(self, event):
+        if event.inaxes is self.plot.ax and event.xdata is not None and event.button == 1:
+            self.freq_edit.setText(f"{event.xdata:.3f}")
+
+    def done(self, resultado):
+        # Un cálculo aún en curso ya no se muestra
+        self.tasks.cancel()
+        super().done(resultado)
 
     def save_results(self):
+        # Espera un cálculo en curso antes de guardar
+        self.tasks.wait()
         try:
             freq_usuario = float(self.freq_edit.text())
         except Exception:
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class IntervalIndex:
+    """
+    Conjunto de intervalos de tiempo [inicio, fin] ordenados y fusionados.
+
+    Se usa para registrar las ventanas de tiempo rechazadas sin modificar
+    las trazas: las consultas (si un instante o un segmento cae en un
+    intervalo rechazado) se resuelven con búsqueda binaria.
+    """
+
+    def __init__(self, intervalos=()):
+        self.inicios = np.empty(0)
+        self.finales = np.empty(0)
+        for t_ini, t_fin in intervalos:
+            self.add(t_ini, t_fin)
+
+    def add(self, t_ini, t_fin):
+        """Agrega el intervalo [t_ini, t_fin] fusionándolo con los que se solapen."""
+        t_ini, t_fin = float(min(t_ini, t_fin)), float(max(t_ini, t_fin))
+        # Intervalos que se tocan o solapan con el nuevo
+        i = np.searchsorted(self.finales, t_ini, side='left')
+        j = np.searchsorted(self.inicios, t_fin, side='right')
+        if i < j:
+            t_ini = min(t_ini, self.inicios[i])
+            t_fin = max(t_fin, self.finales[j - 1])
+        self.inicios = np.concatenate((self.inicios[:i], [t_ini], self.inicios[j:]))
+        self.finales = np.concatenate((self.finales[:i], [t_fin], self.finales[j:]))
+
+    def clear(self):
+        self.inicios = np.empty(0)
+        self.finales = np.empty(0)
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def __iter__(self):
+        return iter(zip(self.inicios.tolist(), self.finales.tolist()))
+
+    def __repr__(self):
+        return f"IntervalIndex({list(self)})"
+
+    def to_list(self):
+        """Lista de tuplas (inicio, fin)."""
+        return list(self)
+
+    def total(self):
+        """Duración total rechazada (s)."""
+        return float(np.sum(self.finales - self.inicios))
+
+    def contains(self, t):
+        """Arreglo booleano: True para los instantes t dentro de algún intervalo."""
+        t = np.asarray(t, dtype=float)
+        plano = np.atleast_1d(t)
+        i = np.searchsorted(self.finales, plano, side='left')
+        dentro = i < len(self)
+        dentro[dentro] = self.inicios[i[dentro]] <= plano[dentro]
+        return dentro.reshape(t.shape)
+
+    def overlaps(self, a, b):
+        """
+        Arreglo booleano: True para los intervalos [a, b] que se solapan con
+        algún intervalo del índice.
+        """
+        a = np.asarray(a, dtype=float)
+        b = np.asarray(b, dtype=float)
+        # Primer intervalo que termina después de a
+        i = np.searchsorted(self.finales, a, side='left')
+        solapa = i < len(self)
+        solapa[solapa] = self.inicios[i[solapa]] <= b[solapa]
+        return solapa
+
+
+def segment_mask(rechazos, nsamples, nperseg, noverlap, samples, t0=0.0):
+    """
+    Segmentos de Welch que no tocan ningún intervalo rechazado.
+
+    Parámetros:
+    - rechazos: IntervalIndex o lista de tuplas (inicio, fin) en segundos
+    - nsamples, nperseg, noverlap: como en spectra.segment_spectra
+    - samples: frecuencia de muestreo
+    - t0: tiempo de la primera muestra
+
+    Retorna:
+    - arreglo booleano (nsegmentos,) con True para los segmentos conservados
+    """
+    # spectra importa scipy.signal: se difiere para no cargarlo al iniciar la interfaz
+    from spectra import segment_starts
+
+    if not isinstance(rechazos, IntervalIndex):
+        rechazos = IntervalIndex(rechazos or ())
+    inicios = segment_starts(nsamples, nperseg, noverlap)
+    if len(rechazos) == 0:
+        return np.ones(len(inicios), dtype=bool)
+    a = t0 + inicios / samples
+    b = t0 + (inicios + nperseg - 1) / samples
+    return ~rechazos.overlaps(a, b)
@@ -1,4 +1,297 @@
-from obspy import read
+import os
+from collections.abc import MutableMapping
+
+import numpy as np
+
+import cancellation
+import profiling
+from cache import file_key, params_key
+from intervals import IntervalIndex
+
+# Extensiones de archivos sísmicos que la aplicación reconoce
+EXTENSIONES = ('.sac', '.gcf', '.mseed', '.miniseed', '.dat', '.sgy', '.segy')
+
+# Cabecera binaria SAC: 632 bytes; las muestras float32 empiezan a continuación
+_SAC_HEADER_BYTES = 632
+# Posición (en palabras de 4 bytes) de NVHDR, IFTYPE y LEVEN en la cabecera SAC
+_SAC_NVHDR, _SAC_IFTYPE, _SAC_LEVEN = 76, 85, 105
+
+# Tratamiento de los huecos entre las trazas de un mismo archivo
+GAP_POLICIES = ('enmascarar', 'interpolar', 'dividir')
+
+_SIN_HUECOS = np.empty((0, 2), dtype=np.int64)
+
+
+def identify_component(ruta):
+    """
+    Identifica la componente ('z', 'n' o 'e') a partir del nombre del archivo.
+
+    Reconoce nombres como 'estacion.z.sac' o 'estacionz.sac'. Retorna None si
+    el nombre no indica ninguna componente.
+    """
+    fname = os.path.basename(ruta).lower()
+    for comp in ('z', 'n', 'e'):
+        if f'.{comp}.' in fname or fname.endswith(f'{comp}.sac') or fname.endswith(f'{comp}.gcf'):
+            return comp
+    return None
+
+
+def station_name(ruta):
+    """
+    Nombre de la estación: el nombre del archivo sin la marca de componente
+    ni la extensión (p. ej. 'A04_staA.z.sac' -> 'A04_staA').
+    """
+    fname = os.path.basename(ruta)
+    comp = identify_component(fname)
+    base, ext = os.path.splitext(fname)
+    if comp is not None:
+        marca = f'.{comp}.'
+        idx = fname.lower().find(marca)
+        if idx >= 0:
+            base = fname[:idx]
+        else:
+            base = base[:-1]
+    return base.rstrip('._-') or base
+
+
+def relative_times(npts, sampling_rate, inicio=0):
+    """
+    Vector de tiempos relativo al inicio, igual que Trace.times().
+    Con inicio > 0 los tiempos empiezan en la muestra `inicio`.
+    """
+    return (inicio + np.arange(npts)) / sampling_rate
+
+
+def sample_range(npts, sampling_rate, t_inicio=None, t_fin=None):
+    """
+    Índices [i0, i1) de las muestras con tiempos entre t_inicio y t_fin
+    (segundos desde el inicio del registro, ambos incluidos).
+    """
+    i0 = 0 if t_inicio is None else int(np.ceil(t_inicio * sampling_rate - 1e-9))
+    i1 = npts if t_fin is None else int(np.floor(t_fin * sampling_rate + 1e-9)) + 1
+    i0 = min(max(i0, 0), npts)
+    return i0, min(max(i1, i0), npts)
+
+
+def sac_memmap(ruta, npts):
+    """
+    Abre las muestras de un archivo SAC con memoria mapeada, sin leerlas.
+
+    Solo admite archivos SAC de series de tiempo con muestreo uniforme
+    (IFTYPE = ITIME, LEVEN = 1); retorna None en cualquier otro caso.
+    """
+    with open(ruta, 'rb') as f:
+        cabecera = f.read(_SAC_HEADER_BYTES)
+    if len(cabecera) < _SAC_HEADER_BYTES:
+        return None
+    for orden in ('<', '>'):
+        enteros = np.frombuffer(cabecera, dtype=f'{orden}i4')
+        if enteros[_SAC_NVHDR] in (6, 7):
+            break
+    else:
+        return None
+    if enteros[_SAC_IFTYPE] != 1 or enteros[_SAC_LEVEN] != 1:
+        return None
+    if os.path.getsize(ruta) < _SAC_HEADER_BYTES + 4 * npts:
+        return None
+    return np.memmap(ruta, dtype=f'{orden}f4', mode='r', offset=_SAC_HEADER_BYTES, shape=(npts,))
+
+
+class LazyComponent(MutableMapping):
+    """
+    Componente con la misma interfaz que {'data', 'sampling_rate', 'times'}.
+
+    Las muestras pueden ser un arreglo en memoria o mapeado desde el archivo,
+    y el vector de tiempos no se guarda: se calcula al pedirlo a partir de la
+    frecuencia de muestreo y de la primera muestra. Si se asigna 'times'
+    explícitamente (p. ej. tras rechazar ventanas) se conserva ese vector.
+
+    Atributos:
+    - inicio: índice de la primera muestra respecto al inicio del registro
+    - starttime: UTCDateTime del inicio del registro (si se conoce)
+    """
+
+    def __init__(self, data, sampling_rate, inicio=0, starttime=None):
+        self._valores = {'data': data, 'sampling_rate': float(sampling_rate)}
+        self._times = None
+        self.inicio = inicio
+        self.starttime = starttime
+
+    def __getitem__(self, clave):
+        if clave == 'times':
+            if self._times is not None:
+                return self._times
+            return relative_times(len(self._valores['data']), self._valores['sampling_rate'], self.inicio)
+        return self._valores[clave]
+
+    def __setitem__(self, clave, valor):
+        if clave == 'times':
+            self._times = valor
+            return
+        self._valores[clave] = valor
+        # Un vector de tiempos explícito deja de valer si cambia la longitud
+        if clave == 'data' and self._times is not None and len(self._times) != len(valor):
+            self._times = None
+
+    def __delitem__(self, clave):
+        if clave == 'times':
+            self._times = None
+        else:
+            del self._valores[clave]
+
+    def __iter__(self):
+        yield from ('data', 'sampling_rate', 'times')
+
+    def __len__(self):
+        return 3
+
+    def is_mapped(self):
+        """True si las muestras se leen con memoria mapeada desde el disco."""
+        return isinstance(self._valores['data'], np.memmap)
+
+    def load(self):
+        """Copia las muestras a memoria (p. ej. antes de modificarlas)."""
+        self._valores['data'] = np.array(self._valores['data'])
+        return self
+
+    @property
+    def t_inicio(self):
+        """Tiempo (s) de la primera muestra, sin construir el vector de tiempos."""
+        if self._times is not None:
+            return float(self._times[0]) if len(self._times) else 0.0
+        return self.inicio / self._valores['sampling_rate']
+
+
+def start_time(componente):
+    """
+    Tiempo (s) de la primera muestra de un componente: LazyComponent (sin
+    calcular sus tiempos) o diccionario {'data', 'sampling_rate', 'times'}.
+    """
+    if isinstance(componente, LazyComponent):
+        return componente.t_inicio
+    times = componente.get('times')
+    return float(times[0]) if times is not None and len(times) else 0.0
+
+
+def merge_traces(trazas):
+    """
+    Une las trazas de un archivo (p. ej. los tramos de un miniSEED con
+    huecos) en un solo arreglo sobre la rejilla de muestreo de la primera.
+
+    Los huecos quedan rellenos con ceros; en los solapes prevalece la traza
+    que empieza después.
+
+    Parámetros:
+    - trazas: Stream o lista de Trace de ObsPy de una misma componente
+
+    Retorna:
+    - data: muestras unidas
+    - sampling_rate: frecuencia de muestreo común
+    - starttime: UTCDateTime de la primera muestra
+    - huecos: arreglo (nhuecos, 2) con los índices [a, b) de las muestras que faltan
+    """
+    trazas = sorted(trazas, key=lambda tr: tr.stats.starttime)
+    sr = trazas[0].stats.sampling_rate
+    if any(tr.stats.sampling_rate != sr for tr in trazas):
+        raise ValueError("Las trazas del archivo tienen distinta frecuencia de muestreo.")
+    starttime = trazas[0].stats.starttime
+    if len(trazas) == 1:
+        return trazas[0].data, sr, starttime, _SIN_HUECOS
+
+    inicios = np.array([round((tr.stats.starttime - starttime) * sr) for tr in trazas], dtype=np.int64)
+    finales = inicios + np.array([tr.stats.npts for tr in trazas], dtype=np.int64)
+    data = np.zeros(int(finales.max()), dtype=np.result_type(*[tr.data for tr in trazas]))
+    for tr, a, b in zip(trazas, inicios, finales):
+        data[a:b] = tr.data
+    # Un hueco empieza donde terminan todas las trazas anteriores y acaba al empezar la siguiente
+    cubierto = np.maximum.accumulate(finales)[:-1]
+    hay_hueco = inicios[1:] > cubierto
+    return data, sr, starttime, np.column_stack((cubierto[hay_hueco], inicios[1:][hay_hueco]))
+
+
+def fill_gaps(data, huecos):
+    """
+    Rellena en el lugar los huecos [a, b) interpolando linealmente entre la
+    última muestra anterior y la primera posterior a cada uno.
+    """
+    for a, b in huecos:
+        data[a:b] = np.interp(np.arange(a, b), (a - 1, b), (data[a - 1], data[b]))
+    return data
+
+
+def align_components(componentes):
+    """
+    Recorta las componentes al tramo de tiempo que comparten.
+
+    Los desfases de las tres se calculan a la vez y el recorte toma vistas de
+    los arreglos (también de los mapeados desde el disco), sin copiar
+    muestras. Los inicios se redondean a la muestra más cercana.
+
+    Parámetros:
+    - componentes: {'z', 'n', 'e'} -> (LazyComponent, huecos), con los huecos
+      como en merge_traces
+
+    Retorna:
+    - datos: {'z', 'n', 'e'} de LazyComponent con tiempos desde el inicio común
+    - huecos: IntervalIndex con los huecos de cualquiera de las componentes, en
+      segundos desde el inicio común (sirve como `rechazos` del cálculo HVSR)
+    """
+    claves = list(componentes)
+    comps = [componentes[c][0] for c in claves]
+    sr = comps[0]['sampling_rate']
+    if any(c['sampling_rate'] != sr for c in comps):
+        raise ValueError("Las componentes tienen distinta frecuencia de muestreo.")
+    base = comps[0].starttime
+    t_inicio = np.array([(c.starttime - base) + c.inicio / sr for c in comps])
+    npts = np.array([len(c['data']) for c in comps])
+    desfase = np.round((t_inicio.max() - t_inicio) * sr).astype(np.int64)
+    longitud = int(np.min(npts - desfase))
+    if longitud <= 0:
+        raise ValueError("Las componentes no se solapan en el tiempo.")
+
+    datos, huecos = {}, IntervalIndex()
+    for clave, c, i0 in zip(claves, comps, desfase.tolist()):
+        datos[clave] = LazyComponent(c['data'][i0:i0 + longitud], sr, starttime=c.starttime + (c.inicio + i0) / sr)
+        for a, b in np.clip(componentes[clave][1] - i0, 0, longitud):
+            if b > a:
+                huecos.add(a / sr, (b - 1) / sr)
+    return datos, huecos
+
+
+def split_at_gaps(datos, huecos, min_muestras=1):
+    """
+    Divide una tripleta alineada en los tramos continuos entre huecos.
+
+    Parámetros:
+    - datos: {'z', 'n', 'e'} de LazyComponent (como los de align_components)
+    - huecos: IntervalIndex en segundos desde la primera muestra
+    - min_muestras: longitud mínima de los tramos que se conservan
+
+    Retorna:
+    - lista de tripletas {'z', 'n', 'e'}; las muestras son vistas de `datos` y
+      los tiempos de cada tramo conservan su posición en el registro
+    """
+    sr = datos['z']['sampling_rate']
+    npts = len(datos['z']['data'])
+    a = np.round(huecos.inicios * sr).astype(np.int64)
+    b = np.round(huecos.finales * sr).astype(np.int64) + 1
+    tramos = []
+    for i0, i1 in zip(np.concatenate(([0], b)).tolist(), np.concatenate((a, [npts])).tolist()):
+        if i1 - i0 >= min_muestras:
+            tramos.append({comp: LazyComponent(c['data'][i0:i1], sr, inicio=c.inicio + i0, starttime=c.starttime)
+                           for comp, c in datos.items()})
+    return tramos
+
+
+def read(ruta, **kwargs):
+    """
+    obspy.read importado al primer uso: ObsPy tarda en importarse y solo se
+    necesita al cargar datos, no al abrir la aplicación.
+    """
+    from obspy import read as obspy_read
+
+    return obspy_read(ruta, **kwargs)
+
 
 class DataLoader:
     """
@@ -11,21 +304,149 @@ class DataLoader:
         return read(ruta)[0]
 
     @staticmethod
-    def _trace_to_dict(trace):
-        """Convierte un Trace de ObsPy a un diccionario estándar."""
+    def _trace_to_dict(trace, inicio=0, starttime=None):
+        """Convierte un Trace de ObsPy a un diccionario estándar (LazyComponent)."""
+        return LazyComponent(trace.data, trace.stats.sampling_rate, inicio=inicio,
+                             starttime=starttime or trace.stats.starttime)
+
+    @classmethod
+    def load_component(cls, ruta, t_inicio=None, t_fin=None, lazy=True, cache=None):
+        """
+        Carga una componente, opcionalmente solo entre t_inicio y t_fin
+        (segundos desde el inicio del registro).
+
+        Con lazy=True los archivos SAC se abren con memoria mapeada y solo se
+        leen del disco las muestras que se usan; los demás formatos se
+        decodifican con ObsPy (o se leen de la caché con memoria mapeada).
+        """
+        with profiling.stage('carga'):
+            stats = read(ruta, headonly=True)[0].stats
+            sr = stats.sampling_rate
+            i0, i1 = sample_range(stats.npts, sr, t_inicio, t_fin)
+            profiling.count('muestras cargadas', i1 - i0)
+
+            if lazy and stats._format == 'SAC':
+                data = sac_memmap(ruta, stats.npts)
+                if data is not None:
+                    return LazyComponent(data[i0:i1], sr, inicio=i0, starttime=stats.starttime)
+
+            clave = params_key({'archivo': file_key(ruta)}) if cache is not None else None
+            guardado = cache.get('trazas', clave, mmap=lazy) if cache is not None else None
+            if guardado is not None:
+                data = guardado['data'][i0:i1]
+                return LazyComponent(data if lazy else np.array(data), float(guardado['sampling_rate']),
+                                     inicio=i0, starttime=stats.starttime)
+
+            if cache is not None:
+                trace = cls._load_trace(ruta)
+                cache.put('trazas', clave, {'data': trace.data, 'sampling_rate': trace.stats.sampling_rate})
+                trace.data = trace.data[i0:i1]
+            elif (i0, i1) != (0, stats.npts):
+                trace = read(ruta, starttime=stats.starttime + i0 / sr,
+                             endtime=stats.starttime + (i1 - 1) / sr)[0]
+            else:
+                trace = cls._load_trace(ruta)
+            if lazy is False and isinstance(trace.data, np.memmap):
+                trace.data = np.array(trace.data)
+            return cls._trace_to_dict(trace, inicio=i0, starttime=stats.starttime)
+
+    @classmethod
+    def load_merged(cls, ruta, politica='enmascarar', lazy=True, cache=None):
+        """
+        Carga todas las trazas de un archivo unidas en una sola componente.
+
+        Los archivos de una sola traza se cargan como en load_component (con
+        memoria mapeada para SAC). Con varias trazas, los huecos entre ellas
+        se rellenan con ceros ('enmascarar', 'dividir') o interpolando
+        linealmente ('interpolar'). Si se pasa una caché, el registro unido
+        y sus huecos se guardan en ella.
+
+        Retorna:
+        - componente: LazyComponent con el registro completo
+        - huecos: arreglo (nhuecos, 2) con los índices [a, b) de las muestras que faltan
+        """
+        if politica not in GAP_POLICIES:
+            raise ValueError(f"Política de huecos no reconocida: {politica}")
+        cancellation.checkpoint()
+        cabeceras = read(ruta, headonly=True)
+        if len(cabeceras) == 1:
+            return cls.load_component(ruta, lazy=lazy, cache=cache), _SIN_HUECOS
+
+        with profiling.stage('carga'):
+            clave = params_key({'archivo': file_key(ruta)}) if cache is not None else None
+            guardado = cache.get('fusionadas', clave, mmap=lazy) if cache is not None else None
+            if guardado is not None:
+                data, sr, huecos = guardado['data'], float(guardado['sampling_rate']), guardado['huecos']
+                starttime = min(tr.stats.starttime for tr in cabeceras)
+            else:
+                data, sr, starttime, huecos = merge_traces(read(ruta))
+                if cache is not None:
+                    cache.put('fusionadas', clave, {'data': data, 'sampling_rate': sr, 'huecos': huecos})
+            if politica == 'interpolar' and len(huecos):
+                data = fill_gaps(np.array(data), huecos)
+            elif not lazy:
+                data = np.array(data)
+            profiling.count('muestras cargadas', len(data))
+            return LazyComponent(data, sr, starttime=starttime), np.asarray(huecos)
+
+    @staticmethod
+    def read_coordinates(ruta):
+        """
+        Lee la latitud y longitud de la estación desde la cabecera (solo SAC).
+        Retorna (lat, lon) o None si el archivo no las contiene.
+        """
+        stats = read(ruta, headonly=True)[0].stats
+        sac = stats.get('sac', {})
+        if 'stla' in sac and 'stlo' in sac:
+            return float(sac['stla']), float(sac['stlo'])
+        return None
+
+    @classmethod
+    def load_triple(cls, ruta_z, ruta_n, ruta_e, cache=None, t_inicio=None, t_fin=None, lazy=True):
+        """
+        Carga tres archivos sísmicos (Z, N, E) y retorna un diccionario con los datos.
+
+        Cada componente es un LazyComponent compatible con los diccionarios
+        {'data', 'sampling_rate', 'times'}: los tiempos se calculan al
+        pedirlos y, con lazy=True, las muestras SAC se mapean desde el disco
+        en lugar de copiarse a memoria. Con t_inicio/t_fin (segundos desde el
+        inicio del registro) solo se carga ese intervalo.
+
+        Si se pasa una caché (cache.DiskCache), las trazas de formatos que
+        requieren decodificación se leen de ella mientras los archivos no
+        cambien de tamaño ni de fecha.
+        """
         return {
-            'data': trace.data,
-            'sampling_rate': trace.stats.sampling_rate,
-            'times': trace.times()
+            comp: cls.load_component(ruta, t_inicio=t_inicio, t_fin=t_fin, lazy=lazy, cache=cache)
+            for comp, ruta in zip(['z', 'n', 'e'], [ruta_z, ruta_n, ruta_e])
         }
 
     @classmethod
-    def load_triple(cls, ruta_z, ruta_n, ruta_e):
+    def load_triple_merged(cls, ruta_z, ruta_n, ruta_e, politica='enmascarar', cache=None, lazy=True):
         """
-        Carga tres archivos sísmicos (Z, N, E) y retorna un diccionario con los datos.
+        Carga una tripleta uniendo todas las trazas de cada archivo y
+        recortando las tres componentes al tramo de tiempo común, de modo que
+        las muestras de Z, N y E se correspondan una a una.
+
+        Parámetros:
+        - politica: tratamiento de los huecos (GAP_POLICIES):
+          'enmascarar' rellena con ceros; las ventanas que tocan los huecos
+          deben descartarse pasando `huecos` como rechazos del cálculo HVSR.
+          'interpolar' rellena interpolando linealmente.
+          'dividir' retorna por separado los tramos continuos entre huecos.
+        - cache, lazy: como en load_triple
+
+        Retorna:
+        - datos: {'z', 'n', 'e'} de LazyComponent con tiempos desde el inicio
+          común o, con politica='dividir', lista de esas tripletas por tramo
+        - huecos: IntervalIndex de los huecos de cualquiera de las componentes,
+          en segundos desde el inicio común
         """
-        componentes = {}
-        for comp, ruta in zip(['z', 'n', 'e'], [ruta_z, ruta_n, ruta_e]):
-            trace = cls._load_trace(ruta)
-            componentes[comp] = cls._trace_to_dict(trace)
-        return componentes
\ No newline at end of file
+        componentes = {
+            comp: cls.load_merged(ruta, politica=politica, lazy=lazy, cache=cache)
+            for comp, ruta in zip(['z', 'n', 'e'], [ruta_z, ruta_n, ruta_e])
+        }
+        datos, huecos = align_components(componentes)
+        if politica == 'dividir':
+            return split_at_gaps(datos, huecos), huecos
+        return datos, huecos
@@ -0,0 +1,184 @@
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+
+def _run_chunk(func, chunk):
+    """
+    Ejecuta func sobre cada tarea de un bloque dentro del proceso trabajador.
+
+    Cada tarea se cronometra por separado y sus errores se capturan, de modo
+    que una estación defectuosa no detiene al resto.
+    """
+    salida = []
+    for indice, tarea in chunk:
+        t0 = time.perf_counter()
+        try:
+            resultado, error = func(tarea), None
+        except Exception as err:
+            resultado = None
+            error = f"{type(err).__name__}: {err}\n{traceback.format_exc()}"
+        salida.append({
+            'indice': indice,
+            'tarea': tarea,
+            'resultado': resultado,
+            'error': error,
+            'tiempo': time.perf_counter() - t0,
+            'pid': os.getpid(),
+        })
+    return salida
+
+
+def _chunks(tareas, chunksize):
+    bloque = []
+    for indice, tarea in enumerate(tareas):
+        bloque.append((indice, tarea))
+        if len(bloque) == chunksize:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def default_workers():
+    """Número de procesos por defecto: los núcleos disponibles."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def run_parallel(func, tareas, workers=None, chunksize=1, ordered=True, max_in_flight=None):
+    """
+    Ejecuta func(tarea) para cada tarea en un conjunto de procesos y entrega
+    los resultados a medida que terminan.
+
+    La memoria se acota limitando los bloques enviados y aún no recogidos:
+    como cada tarea carga sus propias trazas dentro del trabajador, nunca hay
+    más de max_in_flight * chunksize estaciones cargadas a la vez.
+
+    Si un proceso trabajador muere (falta de memoria, señal, os._exit) el
+    pool queda roto y no se sabe qué bloque lo rompió: se crea un pool nuevo
+    y los bloques que estaban en curso se reenvían de uno en uno. Solo un
+    bloque que vuelve a romper el pool estando solo se marca como fallido;
+    el resto de las tareas continúa.
+
+    Parámetros:
+    - func: función de nivel de módulo (serializable) que procesa una tarea
+    - tareas: iterable de tareas (p. ej. tripletas de batch.discover_triplets)
+    - workers: número de procesos (None = núcleos disponibles; 1 = en el proceso actual)
+    - chunksize: tareas enviadas juntas a un mismo proceso
+    - ordered: entregar en el orden de entrada (True) o según terminen (False)
+    - max_in_flight: bloques pendientes como máximo (por defecto 2 * workers)
+
+    Retorna:
+    - generador de diccionarios {'indice', 'tarea', 'resultado', 'error', 'tiempo', 'pid'}
+    """
+    workers = workers or default_workers()
+    chunksize = max(1, int(chunksize))
+    bloques = _chunks(tareas, chunksize)
+
+    if workers == 1:
+        for bloque in bloques:
+            yield from _run_chunk(func, bloque)
+        return
+
+    max_in_flight = max(1, max_in_flight or 2 * workers)
+    pendientes = {}
+    en_espera = {}
+    siguiente = 0
+    # Bloques en curso cuando se rompió el pool: se reenvían solos, de uno en uno
+    reintentos = []
+    aislado = None
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        agotado = False
+        while True:
+            listos = []
+            if reintentos:
+                if not pendientes:
+                    bloque = reintentos.pop(0)
+                    try:
+                        aislado = pool.submit(_run_chunk, func, bloque)
+                        pendientes[aislado] = bloque
+                    except BrokenProcessPool as err:
+                        listos += _failed_chunk(bloque, err)
+                        pool = _rebuild_pool(pool, workers)
+            else:
+                while not agotado and len(pendientes) < max_in_flight:
+                    bloque = next(bloques, None)
+                    if bloque is None:
+                        agotado = True
+                        break
+                    try:
+                        pendientes[pool.submit(_run_chunk, func, bloque)] = bloque
+                    except BrokenProcessPool:
+                        listos += _drain_broken(pendientes, reintentos)
+                        reintentos.append(bloque)
+                        pool = _rebuild_pool(pool, workers)
+
+            if pendientes:
+                hechos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                roto = False
+                for futuro in hechos:
+                    bloque = pendientes.pop(futuro)
+                    try:
+                        listos += futuro.result()
+                    except BrokenProcessPool as err:
+                        # Un trabajador murió (sin memoria, señal, os._exit): el pool queda inservible
+                        if futuro is aislado:
+                            listos += _failed_chunk(bloque, err)
+                        else:
+                            reintentos.append(bloque)
+                        roto = True
+                    except Exception as err:
+                        listos += _failed_chunk(bloque, err)
+                if roto:
+                    listos += _drain_broken(pendientes, reintentos)
+                    pool = _rebuild_pool(pool, workers)
+                reintentos.sort(key=lambda bloque: bloque[0][0])
+
+            for item in listos:
+                if not ordered:
+                    yield item
+                else:
+                    en_espera[item['indice']] = item
+            # En modo ordenado se entregan los resultados contiguos disponibles
+            while siguiente in en_espera:
+                yield en_espera.pop(siguiente)
+                siguiente += 1
+            if agotado and not pendientes and not reintentos:
+                break
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _failed_chunk(bloque, err):
+    """Resultados de error para todas las tareas de un bloque que no terminó."""
+    return [{'indice': indice, 'tarea': tarea, 'resultado': None,
+             'error': f"{type(err).__name__}: {err}", 'tiempo': 0.0, 'pid': None}
+            for indice, tarea in bloque]
+
+
+def _drain_broken(pendientes, reintentos):
+    """
+    Retira los bloques en curso de un pool roto: retorna los resultados de
+    los que alcanzaron a terminar y agrega los demás a `reintentos`.
+    """
+    items = []
+    for futuro, bloque in pendientes.items():
+        if futuro.done() and not futuro.cancelled() and futuro.exception() is None:
+            items += futuro.result()
+        else:
+            reintentos.append(bloque)
+    pendientes.clear()
+    return items
+
+
+def _rebuild_pool(pool, workers):
+    """Cierra un pool roto y crea uno nuevo para los bloques restantes."""
+    pool.shutdown(wait=True, cancel_futures=True)
+    return ProcessPoolExecutor(max_workers=workers)
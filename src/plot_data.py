@@ -1,20 +1,53 @@
+from decimation import EnvelopePyramid
+from load_data import start_time
+
+# A partir de este número de muestras se dibuja por niveles de detalle
+LOD_MIN_SAMPLES = 200_000
+
+
 class DataPlotter:
     def __init__(self, figure):
         self.figure = figure
+        self._pistas = []
 
-    def plot_triple_component(self, datos):
+    def plot_triple_component(self, datos, lod=True, rechazos=None):
         """
         Plotea las tres componentes (Z, N, E) en subplots usando la Figure asociada.
+
+        Con lod=True los registros largos se dibujan con una pirámide de
+        envolventes min/max (decimation.EnvelopePyramid): solo se dibujan
+        unos miles de vértices por eje y, al hacer zoom o desplazar la vista,
+        se sustituye el nivel de detalle según el intervalo visible.
+
+        Los intervalos rechazados (intervals.IntervalIndex o lista de tuplas)
+        se sombrean en rojo.
         """
         self.figure.clear()
+        self._pistas = []
         componentes = ['z', 'n', 'e']
         nombres = ['Vertical (Z)', 'Norte (N)', 'Este (E)']
         colores = ['black', 'blue', 'red']
 
         axes = []
         for i, comp in enumerate(componentes):
-            ax = self.figure.add_subplot(3, 1, i+1)
-            ax.plot(datos[comp]['times'], datos[comp]['data'], color=colores[i], label=nombres[i])
+            ax = self.figure.add_subplot(3, 1, i+1, sharex=axes[0] if axes else None)
+            data = datos[comp]['data']
+            if lod and len(data) >= LOD_MIN_SAMPLES:
+                pista = {
+                    'ax': ax,
+                    'piramide': EnvelopePyramid(data),
+                    't0': start_time(datos[comp]),
+                    'dt': 1.0 / datos[comp]['sampling_rate'],
+                }
+                indices, valores = pista['piramide'].view(0, len(data), self._points(ax))
+                pista['linea'], = ax.plot(pista['t0'] + indices * pista['dt'], valores,
+                                          color=colores[i], label=nombres[i], lw=0.8)
+                ax.set_xlim(pista['t0'], pista['t0'] + (len(data) - 1) * pista['dt'])
+                self._pistas.append(pista)
+            else:
+                ax.plot(datos[comp]['times'], data, color=colores[i], label=nombres[i])
+            for t_ini, t_fin in (rechazos or ()):
+                ax.axvspan(t_ini, t_fin, color='red', alpha=0.2, lw=0)
             ax.set_ylabel(nombres[i])
             ax.grid(True, linestyle='--', alpha=0.5)
             ax.legend(loc='upper right', fontsize='small', frameon=False)
@@ -23,5 +56,20 @@ class DataPlotter:
             else:
                 ax.set_xlabel("Tiempo (s)")
             axes.append(ax)
+        # Los ejes comparten x y todos emiten xlim_changed: basta con escuchar uno
+        axes[0].callbacks.connect('xlim_changed', self._on_xlim_changed)
         self.figure.suptitle("Datos cargados", fontsize=14, y=0.98)
-        self.figure.tight_layout(rect=[0, 0, 1, 0.96])
\ No newline at end of file
+        self.figure.tight_layout(rect=[0, 0, 1, 0.96])
+
+    def _points(self, ax):
+        """Bloques de envolvente por vista: uno por píxel del ancho del eje."""
+        return max(500, int(ax.bbox.width))
+
+    def _on_xlim_changed(self, ax):
+        """Sustituye el nivel de detalle de cada componente según la vista."""
+        t_min, t_max = ax.get_xlim()
+        for pista in self._pistas:
+            i0 = int((t_min - pista['t0']) / pista['dt']) - 1
+            i1 = int((t_max - pista['t0']) / pista['dt']) + 2
+            indices, valores = pista['piramide'].view(i0, i1, self._points(pista['ax']))
+            pista['linea'].set_data(pista['t0'] + indices * pista['dt'], valores)
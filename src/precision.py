@@ -0,0 +1,76 @@
+"""
+Política de precisión numérica del flujo HVSR.
+
+Con 'float32' las trazas filtradas, los periodogramas de Welch, los
+espectros suavizados y las curvas H/V se guardan en simple precisión (la
+mitad de memoria y de tráfico que en float64); las operaciones sensibles al
+redondeo (tendencia lineal, estado del filtro IIR, medias y desviaciones)
+acumulan en float64. Con 'float64' todo se calcula en doble precisión. La
+política 'auto' (por defecto) conserva el tipo de los datos de entrada.
+
+Se elige con la variable de entorno HVSRLEARN_PRECISION o con
+set_precision(), que también la propaga a los procesos hijos:
+    precision.set_precision('float32')
+    with precision.use('float64'):
+        ...
+"""
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+ENV_VAR = 'HVSRLEARN_PRECISION'
+
+POLICIES = ('auto', 'float32', 'float64')
+
+# Muestras por bloque cuando una etapa acumula en float64 y guarda en float32
+BLOCK_SAMPLES = 1 << 20
+
+_TIPOS = {'float32': np.dtype(np.float32), 'float64': np.dtype(np.float64)}
+
+
+def _politica_entorno():
+    valor = os.environ.get(ENV_VAR, '').strip().lower()
+    if valor in ('32', 'single', 'simple'):
+        return 'float32'
+    if valor in ('64', 'double', 'doble'):
+        return 'float64'
+    return valor if valor in POLICIES else 'auto'
+
+
+_politica = _politica_entorno()
+
+
+def set_precision(politica):
+    """Fija la política de precisión ('auto', 'float32' o 'float64')."""
+    global _politica
+    if politica not in POLICIES:
+        raise ValueError(f"Política de precisión no reconocida: {politica}")
+    _politica = politica
+    if politica == 'auto':
+        os.environ.pop(ENV_VAR, None)
+    else:
+        os.environ[ENV_VAR] = politica
+
+
+def get_precision():
+    return _politica
+
+
+@contextmanager
+def use(politica):
+    """Aplica la política solo dentro del bloque."""
+    anterior = _politica
+    set_precision(politica)
+    try:
+        yield
+    finally:
+        set_precision(anterior)
+
+
+def dtype(default=None):
+    """
+    Tipo real de trabajo de la política activa, o `default` con la política
+    'auto' (None significa conservar el tipo de los datos).
+    """
+    return _TIPOS.get(_politica, default)
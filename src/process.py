@@ -1,5 +1,117 @@
+from functools import lru_cache
+
 import numpy as np
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter, resample_poly, sosfilt, sosfiltfilt
+
+import cancellation
+import precision
+import profiling
+from detection import detect_transients
+from intervals import IntervalIndex
+from spectra import stack_components
+
+
+# El filtro antialias de resample_poly es plano (±0.02 dB) hasta el 80 % de
+# la nueva Nyquist: se exige que esta sea 1.25 veces la frecuencia máxima
+DECIMATION_MARGIN = 1.25
+
+
+@lru_cache(maxsize=64)
+def _design_bandpass(lowcut, highcut, order, fs):
+    return butter(order, [lowcut, highcut], btype='band', fs=fs, output='sos')
+
+
+def design_bandpass(lowcut, highcut, order, fs):
+    """
+    Secciones de segundo orden (SOS) de un pasa bandas Butterworth.
+
+    El diseño se guarda en caché por (lowcut, highcut, order, fs), de modo
+    que filtrar varias veces con los mismos parámetros no lo repite. Retorna
+    una copia, que puede modificarse sin alterar la caché.
+    """
+    return _design_bandpass(float(lowcut), float(highcut), int(order), float(fs)).copy()
+
+
+def impulse_length(sos, tol=1e-14, max_muestras=1 << 22):
+    """
+    Número de muestras tras las que la energía restante de la respuesta al
+    impulso del filtro es menor que tol (relativa a la energía total).
+    """
+    n = 1024
+    while True:
+        impulso = np.zeros(n)
+        impulso[0] = 1.0
+        energia = np.cumsum(sosfilt(sos, impulso) ** 2)
+        restante = 1 - energia / energia[-1]
+        if restante[n // 2] < tol or n >= max_muestras:
+            return int(np.argmax(restante < tol)) + 1
+        n *= 2
+
+
+def sosfiltfilt_chunked(sos, x, bloque, margen=None, out=None):
+    """
+    Filtrado de fase cero por bloques con solapamiento para señales que no
+    caben en memoria (p. ej. memmaps).
+
+    Cada bloque se filtra con `margen` muestras reales a cada lado, que
+    absorben los transitorios de borde y luego se descartan; los extremos
+    del registro se tratan igual que sosfiltfilt sobre la señal completa.
+
+    Parámetros:
+    - sos: secciones de segundo orden
+    - x: arreglo (..., nsamples), puede ser un memmap
+    - bloque: muestras de salida por bloque
+    - margen: muestras de solapamiento (por defecto impulse_length(sos))
+    - out: arreglo de salida (p. ej. un memmap abierto en escritura)
+
+    Retorna:
+    - arreglo filtrado (out si se indicó)
+    """
+    nsamples = x.shape[-1]
+    if margen is None:
+        margen = impulse_length(sos)
+    if out is None:
+        out = np.empty(x.shape, dtype=np.result_type(x.dtype, np.float32))
+    for i0 in range(0, nsamples, bloque):
+        cancellation.checkpoint()
+        i1 = min(i0 + bloque, nsamples)
+        a, b = max(0, i0 - margen), min(nsamples, i1 + margen)
+        filtrado = sosfiltfilt(sos, np.asarray(x[..., a:b]), axis=-1)
+        out[..., i0:i1] = filtrado[..., i0 - a:i1 - a]
+    return out
+
+
+def decimation_factor(sampling_rate, fmax, margen=DECIMATION_MARGIN):
+    """
+    Mayor factor entero de decimación con el que la nueva frecuencia de
+    Nyquist sigue siendo al menos margen * fmax (1 si no se puede decimar).
+    """
+    return max(1, int(sampling_rate // (2 * margen * fmax)))
+
+
+def decimate_components(x, factor, dtype=None):
+    """
+    Decima por `factor` a lo largo del último eje con un filtro polifásico
+    antialias (scipy.signal.resample_poly, FIR con ventana de Kaiser).
+
+    La salida es de fase cero: la muestra k corresponde a la muestra
+    k * factor de la entrada, de modo que los tiempos se conservan.
+
+    Parámetros:
+    - x: arreglo (..., nsamples), p. ej. las tres componentes apiladas en (3, N)
+    - factor: factor entero de decimación
+    - dtype: tipo de cálculo y salida (por defecto el de la política de
+      precisión o, con 'auto', el de x y al menos float32)
+
+    Retorna:
+    - arreglo (..., ceil(nsamples / factor))
+    """
+    x = np.asarray(x)
+    dtype = dtype or precision.dtype(np.result_type(x.dtype, np.float32))
+    if factor == 1:
+        return x.astype(dtype, copy=False)
+    return resample_poly(x.astype(dtype, copy=False), 1, int(factor), axis=-1)
+
 
 class ProcessData:
     def __init__(self, data, sampling_rate):
@@ -10,40 +122,140 @@ class ProcessData:
         self.data = data  # Puede ser un array o un dict {'z':..., 'n':..., 'e':...}
         self.sampling_rate = sampling_rate
 
-    def bandpass_filter(self, lowcut, highcut, order=4):
+    def bandpass_filter(self, lowcut, highcut, order=4, dtype=None, in_place=False, bloque=None):
         """
-        Aplica un filtro pasa bandas Butterworth a la señal.
+        Aplica un filtro pasa bandas Butterworth de fase cero a la señal.
         lowcut, highcut en Hz.
+
+        El filtro se diseña en secciones de segundo orden (estables en órdenes
+        altos y cortes bajos). Z, N y E de igual longitud se filtran apiladas
+        en (3, N) con una sola llamada a sosfiltfilt; cualquier otro conjunto
+        de componentes, una por una.
+
+        Parámetros opcionales:
+        - dtype: tipo de cálculo y salida (np.float32 reduce a la mitad la memoria).
+          Por defecto el de la política de precisión (float64 con 'auto'); con
+          la política float32 el filtro se aplica por bloques en float64 y
+          solo la salida se guarda en float32
+        - in_place: escribe el resultado sobre los arreglos de entrada
+        - bloque: filtra por bloques de estas muestras (sosfiltfilt_chunked)
+
+        Retorna un dict de arrays (vistas de un único arreglo (3, N)) o un array.
+        """
+        sos = design_bandpass(lowcut, highcut, order, self.sampling_rate)
+        acumular = False
+        if dtype is None:
+            dtype = precision.dtype(np.float64)
+            acumular = dtype != np.float64
+            bloque = bloque or (precision.BLOCK_SAMPLES if acumular else None)
+        if not acumular:
+            sos = sos.astype(dtype, copy=False)
+        es_dict = isinstance(self.data, dict)
+        componentes = list(self.data) if es_dict else []
+        arrays = [self.data[comp] for comp in componentes] if es_dict else [self.data]
+
+        def filtrar(x):
+            x = np.asarray(x)
+            with profiling.stage('filtro', x):
+                if bloque:
+                    return sosfiltfilt_chunked(sos, x, int(bloque), out=np.empty(x.shape, dtype=dtype))
+                return sosfiltfilt(sos, x.astype(dtype, copy=False), axis=-1)
+
+        if self._stackable():
+            filtrados = list(filtrar(stack_components(*arrays)))
+        else:
+            # Componentes sueltas o de distinta longitud: se filtran por separado
+            filtrados = [filtrar(x) for x in arrays]
+
+        if in_place:
+            for destino, resultado in zip(arrays, filtrados):
+                if not getattr(destino, 'flags', None) or not destino.flags.writeable:
+                    raise ValueError("Los datos de entrada no admiten escritura (p. ej. memoria mapeada).")
+                np.copyto(destino, resultado, casting='same_kind')
+            return {comp: self.data[comp] for comp in componentes} if es_dict else self.data
+
+        if es_dict:
+            return dict(zip(componentes, filtrados))
+        return filtrados[0]
+
+    def _stackable(self):
+        """True si los datos son Z, N y E de igual longitud y se procesan apilados en (3, N)."""
+        return (isinstance(self.data, dict) and sorted(self.data) == ['e', 'n', 'z']
+                and len({len(x) for x in self.data.values()}) == 1)
+
+    def decimate(self, fmax=20.0, factor=None, dtype=None):
+        """
+        Reduce la frecuencia de muestreo con un filtro antialias polifásico
+        (decimate_components), de modo que la nueva Nyquist cubra la banda de
+        análisis hasta fmax con el margen DECIMATION_MARGIN.
+
+        Parámetros:
+        - fmax: frecuencia máxima de interés (Hz)
+        - factor: factor entero explícito (por defecto decimation_factor)
+        - dtype: tipo de cálculo y salida (por defecto el de la política de
+          precisión, float64 con 'auto')
+
+        Retorna (datos, sampling_rate): un dict de arrays (vistas de un único
+        arreglo (3, M)) o un array, y la nueva frecuencia de muestreo.
         """
-        b, a = butter(order, [lowcut, highcut], btype='band', fs=self.sampling_rate)
-        if isinstance(self.data, dict):
-            filtered = {}
-            for comp in self.data:
-                filtered[comp] = filtfilt(b, a, self.data[comp])
-            return filtered
+        factor = factor or decimation_factor(self.sampling_rate, fmax)
+        dtype = dtype or precision.dtype(np.float64)
+        if not isinstance(self.data, dict):
+            x = np.asarray(self.data)
+            with profiling.stage('decimacion', x):
+                return decimate_components(x, factor, dtype=dtype), self.sampling_rate / factor
+
+        if self._stackable():
+            x = stack_components(*self.data.values())
+            with profiling.stage('decimacion', x):
+                decimado = decimate_components(x, factor, dtype=dtype)
         else:
-            return filtfilt(b, a, self.data)
+            decimado = []
+            for x in self.data.values():
+                with profiling.stage('decimacion', x):
+                    decimado.append(decimate_components(x, factor, dtype=dtype))
+        return dict(zip(self.data, decimado)), self.sampling_rate / factor
+
+    def detect_transients(self, t0=0.0, **kwargs):
+        """
+        Propone intervalos de rechazo con detection.detect_transients
+        (STA/LTA y umbral de amplitud sobre las tres componentes).
+
+        Requiere datos en dict {'z', 'n', 'e'}. Los argumentos adicionales
+        (sta, lta, umbral_on, umbral_off, amplitud, margen, bloque) se pasan
+        al detector. Retorna un intervals.IntervalIndex, que puede pasarse a
+        reject_time_windows o usarse como rechazos en el cálculo HVSR.
+        """
+        if not isinstance(self.data, dict):
+            raise ValueError("La detección de transitorios requiere las tres componentes.")
+        with profiling.stage('deteccion'):
+            return detect_transients(self.data['z'], self.data['n'], self.data['e'],
+                                     self.sampling_rate, t0=t0, **kwargs)
 
     def reject_time_windows(self, start_end_list, times_dict):
         """
         Elimina segmentos de tiempo de la señal usando el vector de tiempos.
         start_end_list: lista de tuplas [(t_ini, t_fin), ...] en segundos.
         times_dict: dict con los vectores de tiempo para cada componente.
+
+        Copia y compacta los datos, uniendo los tramos conservados. Para el
+        cálculo HVSR es preferible registrar los intervalos en un
+        intervals.IntervalIndex y excluir los segmentos de Welch que los tocan
+        (parámetro rechazos de calculate_hvsr_helper), sin modificar las trazas.
         """
-        if isinstance(self.data, dict):
-            for comp in self.data:
-                self.data[comp], times_dict[comp] = self._reject_windows_array(
-                    self.data[comp], times_dict[comp], start_end_list
-                )
-        else:
-            self.data, times_dict = self._reject_windows_array(self.data, times_dict, start_end_list)
+        with profiling.stage('rechazo'):
+            if isinstance(self.data, dict):
+                for comp in self.data:
+                    self.data[comp], times_dict[comp] = self._reject_windows_array(
+                        self.data[comp], times_dict[comp], start_end_list
+                    )
+            else:
+                self.data, times_dict = self._reject_windows_array(self.data, times_dict, start_end_list)
 
     def _reject_windows_array(self, array, times, start_end_list):
-        mask = np.ones_like(array, dtype=bool)
-        for t_ini, t_fin in start_end_list:
-            mask &= ~((times >= t_ini) & (times <= t_fin))
+        mask = ~IntervalIndex(start_end_list).contains(times)
         new_array = array[mask]
         # Recalcula el vector de tiempos para que sea continuo desde cero
         dt = times[1] - times[0] if len(times) > 1 else 0
         new_times = np.arange(len(new_array)) * dt
-        return new_array, new_times
\ No newline at end of file
+        return new_array, new_times
@@ -1,8 +1,15 @@
 import numpy as np
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, QMessageBox
+from PyQt5.QtCore import QTimer
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from process import ProcessData 
+from decimation import log_bin_envelope
+from detection import StreamingDetector
+from intervals import IntervalIndex
+from load_data import start_time
+import precision
+from tasks import TaskRunner, TaskStatus
 
 class ProcessWindow(QDialog):
     def __init__(self, datos, parent=None):
@@ -11,6 +18,17 @@ class ProcessWindow(QDialog):
         self.datos_original = datos  
         self.datos_procesados = datos.copy() 
         self.parent = parent 
+        self.tasks = TaskRunner(self)
+        if hasattr(parent, 'show_profile'):
+            self.tasks.profiled.connect(parent.show_profile)
+        # Intervalos de tiempo rechazados: las trazas no se recortan
+        self.rechazos = IntervalIndex(getattr(parent, 'rechazos', None) or ())
+        # Espectros de Fourier reducidos, calculados una vez por estado de los datos
+        self._version = 0
+        self._espectros = None
+        self._espectros_version = None
+        self._ax_fourier = None
+        self._marcadores = {}
         self.init_ui()
 
     def init_ui(self):
@@ -37,6 +55,10 @@ class ProcessWindow(QDialog):
         btn_reject.clicked.connect(self.reject_window)
         btn_layout.addWidget(btn_reject)
 
+        btn_detect = QPushButton("Detectar transitorios")
+        btn_detect.clicked.connect(self.detect_transients)
+        btn_layout.addWidget(btn_detect)
+
         btn_save = QPushButton("Guardar cambios")
         btn_save.clicked.connect(self.save_and_close)
         btn_layout.addWidget(btn_save)
@@ -51,8 +73,13 @@ class ProcessWindow(QDialog):
         layout.addWidget(self.lowcut_edit)
         layout.addWidget(self.highcut_edit)
 
-        self.lowcut_edit.textChanged.connect(self.plot_fourier)
-        self.highcut_edit.textChanged.connect(self.plot_fourier)
+        # Las marcas de corte se redibujan al dejar de escribir, no en cada tecla
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(250)
+        self._debounce.timeout.connect(self.plot_fourier)
+        self.lowcut_edit.textChanged.connect(self._debounce.start)
+        self.highcut_edit.textChanged.connect(self._debounce.start)
 
         self.reject_start = QLineEdit()
         self.reject_start.setPlaceholderText("Inicio ventana a rechazar (s)")
@@ -61,41 +88,86 @@ class ProcessWindow(QDialog):
         layout.addWidget(self.reject_start)
         layout.addWidget(self.reject_end)
 
+        layout.addWidget(TaskStatus(self.tasks))
+
+    @staticmethod
+    def _spectra_job(ctx, data_dict, sr):
+        """Espectros de amplitud de Fourier reducidos a la resolución de pantalla."""
+        espectros = {}
+        for i, comp in enumerate(['z', 'n', 'e']):
+            ctx.progress(100 * i // 3, "Calculando espectros de Fourier...")
+            data = data_dict[comp]
+            freqs = np.fft.rfftfreq(len(data), d=1/sr)
+            spectrum = np.abs(np.fft.rfft(data))
+            espectros[comp] = log_bin_envelope(freqs, spectrum)
+        return espectros
+
     def plot_fourier(self):
+        """
+        Dibuja los espectros de Fourier y las marcas de corte.
+
+        Los espectros se calculan (en segundo plano) solo cuando cambian los
+        datos; si ya están dibujados, solo se actualizan las marcas.
+        """
+        if self._espectros_version != self._version:
+            data_dict = {comp: self.datos_procesados[comp]['data'] for comp in ['z', 'n', 'e']}
+            sr = self.datos_procesados['z']['sampling_rate']
+            version = self._version
+            self.tasks.submit('espectro', self._spectra_job, data_dict, sr,
+                              on_result=lambda espectros: self._on_spectra(version, espectros))
+            return
+        if self._ax_fourier is None:
+            self._draw_spectra()
+        self._update_markers()
+
+    def _on_spectra(self, version, espectros):
+        if version != self._version:
+            return
+        self._espectros = espectros
+        self._espectros_version = version
+        self._draw_spectra()
+        self._update_markers()
+
+    def _invalidate_spectra(self):
+        """Marca los espectros como obsoletos tras modificar los datos."""
+        self._version += 1
+        self._ax_fourier = None
+
+    def _draw_spectra(self):
         self.figure.clear()
         ax = self.figure.add_subplot(1, 1, 1)
-        componentes = ['z', 'n', 'e']
         nombres = ['Vertical (Z)', 'Norte (N)', 'Este (E)']
         colores = ['black', 'blue', 'red']
 
-        for comp, nombre, color in zip(componentes, nombres, colores):
-            data = self.datos_procesados[comp]['data']
-            sr = self.datos_procesados[comp]['sampling_rate']
-            N = len(data)
-            freqs = np.fft.rfftfreq(N, d=1/sr)
-            spectrum = np.abs(np.fft.rfft(data))
+        for comp, nombre, color in zip(['z', 'n', 'e'], nombres, colores):
+            freqs, spectrum = self._espectros[comp]
             ax.plot(freqs, spectrum, color=color, label=nombre)
 
-        # Dibuja líneas verticales si hay frecuencias introducidas
-        try:
-            lowcut = float(self.lowcut_edit.text())
-            ax.axvline(lowcut, color='orange', linestyle='--', label='Frec. mínima')
-        except Exception:
-            pass
-        try:
-            highcut = float(self.highcut_edit.text())
-            ax.axvline(highcut, color='green', linestyle='--', label='Frec. máxima')
-        except Exception:
-            pass
-
+        self._marcadores = {
+            'low': ax.axvline(1.0, color='orange', linestyle='--', label='Frec. mínima', visible=False),
+            'high': ax.axvline(1.0, color='green', linestyle='--', label='Frec. máxima', visible=False),
+        }
         ax.set_xlabel("Frecuencia (Hz)")
         ax.set_ylabel("Amplitud")
         ax.set_title("Espectros de Fourier")
         ax.set_xscale('log')
-        ax.legend()
         ax.grid(True, linestyle='--', alpha=0.5)
+        self._ax_fourier = ax
         self.figure.tight_layout()
-        self.canvas.draw()
+
+    def _update_markers(self):
+        """Mueve las líneas de corte sin recalcular ni redibujar los espectros."""
+        for clave, edit in (('low', self.lowcut_edit), ('high', self.highcut_edit)):
+            linea = self._marcadores[clave]
+            try:
+                valor = float(edit.text())
+            except ValueError:
+                linea.set_visible(False)
+                continue
+            linea.set_xdata([valor, valor])
+            linea.set_visible(valor > 0)
+        self._ax_fourier.legend(handles=[linea for linea in self._ax_fourier.lines if linea.get_visible()])
+        self.canvas.draw_idle()
 
     def filter_signal(self):
         try:
@@ -108,12 +180,23 @@ class ProcessWindow(QDialog):
         # Prepara los datos para filtrar
         data_dict = {comp: self.datos_procesados[comp]['data'] for comp in ['z', 'n', 'e']}
         sr = self.datos_procesados['z']['sampling_rate']
+        self.tasks.submit('filtrar', self._filter_job, data_dict, sr, lowcut, highcut,
+                          on_result=self._on_filtered,
+                          on_error=lambda error: QMessageBox.warning(self, "Error", error))
+
+    @staticmethod
+    def _filter_job(ctx, data_dict, sr, lowcut, highcut):
+        """Filtra las tres componentes en un hilo de trabajo."""
+        ctx.progress(0, "Filtrando...")
         processor = ProcessData(data_dict, sr)
-        filtered = processor.bandpass_filter(lowcut, highcut)
+        # Por bloques para que la cancelación se atienda entre uno y otro
+        return processor.bandpass_filter(lowcut, highcut, bloque=precision.BLOCK_SAMPLES)
 
+    def _on_filtered(self, filtered):
         # Actualiza los datos procesados
         for comp in ['z', 'n', 'e']:
             self.datos_procesados[comp]['data'] = filtered[comp]
+        self._invalidate_spectra()
         self.plot_fourier()
 
     def reject_window(self):
@@ -124,23 +207,56 @@ class ProcessWindow(QDialog):
             QMessageBox.warning(self, "Error", "Introduce tiempos válidos para rechazar la ventana.")
             return
 
+        # Se registra el intervalo; las ventanas de Welch que lo tocan no se promedian
+        self.rechazos.add(t_ini, t_fin)
+        if self.parent is not None and hasattr(self.parent, "terminal"):
+            self.parent.terminal.append(
+                f"Intervalos rechazados: {len(self.rechazos)} ({self.rechazos.total():.1f} s en total)")
+
+    def detect_transients(self):
+        """Propone en segundo plano los intervalos a rechazar con STA/LTA."""
         data_dict = {comp: self.datos_procesados[comp]['data'] for comp in ['z', 'n', 'e']}
-        times_dict = {comp: self.datos_procesados[comp]['times'] for comp in ['z', 'n', 'e']}
         sr = self.datos_procesados['z']['sampling_rate']
-        processor = ProcessData(data_dict, sr)
-        processor.reject_time_windows([(t_ini, t_fin)], times_dict)
+        t0 = start_time(self.datos_procesados['z'])
+        self.tasks.submit('detectar', self._detect_job, data_dict, sr, t0,
+                          on_result=self._on_transients,
+                          on_error=lambda error: QMessageBox.warning(self, "Error", error))
 
-        # Actualiza los datos procesados y los tiempos
-        for comp in ['z', 'n', 'e']:
-            self.datos_procesados[comp]['data'] = processor.data[comp]
-            self.datos_procesados[comp]['times'] = times_dict[comp]
+    @staticmethod
+    def _detect_job(ctx, data_dict, sr, t0):
+        """Detecta transitorios por bloques de 10 minutos en un hilo de trabajo."""
+        z, n, e = (data_dict[comp] for comp in ['z', 'n', 'e'])
+        media = [np.mean(c, dtype=np.float64) for c in (z, n, e)]
+        detector = StreamingDetector(sr, t0=t0, media=media)
+        nsamples = min(len(z), len(n), len(e))
+        paso = int(600 * sr)
+        for i0 in range(0, nsamples, paso):
+            ctx.progress(100 * i0 // nsamples, "Detectando transitorios...")
+            detector.update(z[i0:i0 + paso], n[i0:i0 + paso], e[i0:i0 + paso])
+        return detector.finish()
+
+    def _on_transients(self, detectados):
+        for t_ini, t_fin in detectados:
+            self.rechazos.add(t_ini, t_fin)
+        if self.parent is not None and hasattr(self.parent, "terminal"):
+            self.parent.terminal.append(
+                f"Transitorios detectados: {len(detectados)} ({detectados.total():.1f} s). "
+                f"Intervalos rechazados: {len(self.rechazos)} ({self.rechazos.total():.1f} s en total)")
+
+    def done(self, resultado):
+        # Los resultados de tareas aún en curso ya no se muestran
+        self.tasks.cancel()
+        super().done(resultado)
 
     def save_and_close(self):
+        # Espera un filtrado en curso antes de entregar los datos
+        self.tasks.wait()
         # Actualiza los datos en la ventana principal
         if self.parent is not None:
             self.parent.datos = self.datos_procesados
+            self.parent.rechazos = self.rechazos
             from plot_data import DataPlotter
-            plotter = DataPlotter(self.parent.figure_datos)
-            plotter.plot_triple_component(self.parent.datos)
+            self.parent.plotter_datos = DataPlotter(self.parent.figure_datos)
+            self.parent.plotter_datos.plot_triple_component(self.parent.datos, rechazos=self.rechazos)
             self.parent.canvas_datos.draw()
         self.accept()
\ No newline at end of file
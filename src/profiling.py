@@ -0,0 +1,182 @@
+"""
+Instrumentación por etapas del flujo HVSR.
+
+Se activa con la variable de entorno HVSRLEARN_PROFILE (1 o 'tiempo' para
+los tiempos, 'memoria' para añadir el pico de tracemalloc de cada etapa) o
+con enable(). Desactivada, stage() retorna un contexto vacío compartido y
+no mide nada.
+
+Uso:
+    with profiling.profile('estación A') as perfil:
+        with profiling.stage('welch', x):
+            ...
+    print(perfil.report())
+"""
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+ENV_VAR = 'HVSRLEARN_PROFILE'
+
+_NULO = nullcontext()
+_local = threading.local()
+
+
+def _nivel_entorno():
+    valor = os.environ.get(ENV_VAR, '').strip().lower()
+    if valor in ('', '0', 'no', 'false', 'off'):
+        return None
+    return 'memoria' if valor in ('memoria', 'mem', 'memory', '2') else 'tiempo'
+
+
+_nivel = _nivel_entorno()
+
+
+def enable(memoria=False):
+    """
+    Activa la instrumentación (también en los procesos hijos, a través de
+    la variable de entorno). Con memoria=True registra además el pico de
+    memoria de cada etapa con tracemalloc.
+    """
+    global _nivel
+    _nivel = 'memoria' if memoria else 'tiempo'
+    os.environ[ENV_VAR] = _nivel
+
+
+def disable():
+    global _nivel
+    _nivel = None
+    os.environ.pop(ENV_VAR, None)
+
+
+def is_enabled():
+    return _nivel is not None
+
+
+class Profiler:
+    """
+    Acumula, por etapa, el número de llamadas, el tiempo de pared, los bytes
+    de los arreglos de entrada y (opcionalmente) el pico de memoria. Las
+    etapas anidadas se nombran con su ruta ('hvsr/welch').
+    """
+
+    def __init__(self, nombre='', memoria=False):
+        self.nombre = nombre
+        self.memoria = memoria
+        self.etapas = {}
+        self.contadores = {}
+        self._pila = []
+        self._inicio = time.perf_counter()
+        self.tiempo = 0.0
+
+    def __bool__(self):
+        return bool(self.etapas or self.contadores)
+
+    @contextmanager
+    def stage(self, nombre, *arrays):
+        ruta = '/'.join([marco['ruta'] for marco in self._pila[-1:]] + [nombre])
+        marco = {'ruta': ruta, 'pico': 0}
+        if self.memoria:
+            actual, pico = tracemalloc.get_traced_memory()
+            if self._pila:
+                self._pila[-1]['pico'] = max(self._pila[-1]['pico'], pico)
+            tracemalloc.reset_peak()
+            marco['base'] = actual
+        self._pila.append(marco)
+        # Se registra al entrar para que las etapas se listen en orden de inicio
+        registro = self.etapas.setdefault(ruta, {'llamadas': 0, 'tiempo': 0.0, 'bytes': 0, 'pico': 0})
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            self._pila.pop()
+            registro['llamadas'] += 1
+            registro['tiempo'] += dt
+            registro['bytes'] += sum(getattr(a, 'nbytes', 0) for a in arrays)
+            if self.memoria:
+                pico = max(marco['pico'], tracemalloc.get_traced_memory()[1])
+                registro['pico'] = max(registro['pico'], pico - marco['base'])
+                if self._pila:
+                    self._pila[-1]['pico'] = max(self._pila[-1]['pico'], pico)
+
+    def count(self, nombre, valor=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + valor
+
+    def to_dict(self):
+        """Resumen serializable (JSON) del perfil."""
+        return {
+            'nombre': self.nombre,
+            'tiempo': self.tiempo,
+            'etapas': [dict(etapa=ruta, **registro) for ruta, registro in self.etapas.items()],
+            'contadores': dict(self.contadores),
+        }
+
+    def report(self):
+        """Tabla de texto con el desglose de tiempos por etapa."""
+        lineas = [f"Perfil {self.nombre}: {self.tiempo:.3f} s"]
+        for ruta, r in self.etapas.items():
+            nivel = ruta.count('/')
+            nombre = '  ' * nivel + ruta.rsplit('/', 1)[-1]
+            linea = f"  {nombre:<24} {r['tiempo']:>9.4f} s  x{r['llamadas']:<4} {r['bytes'] / 2**20:>9.1f} MiB"
+            if self.memoria:
+                linea += f"  pico {r['pico'] / 2**20:>8.1f} MiB"
+            lineas.append(linea)
+        for nombre, valor in self.contadores.items():
+            lineas.append(f"  {nombre}: {valor}")
+        return '\n'.join(lineas)
+
+
+def _actual():
+    pila = getattr(_local, 'perfiles', None)
+    return pila[-1] if pila else None
+
+
+@contextmanager
+def profile(nombre=''):
+    """
+    Registra las etapas ejecutadas en este hilo dentro del bloque. Produce
+    el Profiler, o None si la instrumentación está desactivada.
+    """
+    if _nivel is None:
+        yield None
+        return
+    memoria = _nivel == 'memoria'
+    iniciado = memoria and not tracemalloc.is_tracing()
+    if iniciado:
+        tracemalloc.start()
+    perfil = Profiler(nombre, memoria=memoria)
+    pila = _local.__dict__.setdefault('perfiles', [])
+    pila.append(perfil)
+    try:
+        yield perfil
+    finally:
+        pila.pop()
+        perfil.tiempo = time.perf_counter() - perfil._inicio
+        if iniciado:
+            tracemalloc.stop()
+
+
+def stage(nombre, *arrays):
+    """
+    Contexto que mide una etapa en el perfil activo de este hilo. Los
+    arreglos indicados se suman al tamaño de entrada de la etapa. Sin
+    perfil activo no hace nada.
+    """
+    if _nivel is None:
+        return _NULO
+    perfil = _actual()
+    if perfil is None:
+        return _NULO
+    return perfil.stage(nombre, *arrays)
+
+
+def count(nombre, valor=1):
+    """Suma valor al contador `nombre` del perfil activo (si lo hay)."""
+    if _nivel is None:
+        return
+    perfil = _actual()
+    if perfil is not None:
+        perfil.count(nombre, valor)
@@ -0,0 +1,180 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Bordes soportados por las funciones de estadística móvil
+EDGES = ('valid', 'nearest', 'nan', 'reflect', 'legacy')
+
+# Número máximo de elementos (ventanas x muestras) evaluados a la vez en los
+# modos que necesitan materializar las ventanas (mediana y desviación exacta)
+_MAX_CHUNK = 2_000_000
+
+
+def _check_window(x, window):
+    x = np.asarray(x)
+    if not np.issubdtype(x.dtype, np.floating):
+        x = x.astype(np.float64)
+    if x.ndim != 1:
+        raise ValueError("La estadística móvil requiere un arreglo 1D.")
+    window = int(window)
+    if window < 1:
+        raise ValueError("El tamaño de ventana debe ser mayor que cero.")
+    return x, window
+
+
+def _chunked_reduce(x, window, func):
+    """Aplica func(ventanas, axis=-1) por bloques sobre las ventanas completas de x."""
+    vistas = sliding_window_view(x, window)
+    out = np.empty(len(vistas), dtype=x.dtype)
+    paso = max(1, _MAX_CHUNK // window)
+    for i in range(0, len(vistas), paso):
+        out[i:i + paso] = func(vistas[i:i + paso], axis=-1)
+    return out
+
+
+def _valid_sums(x, window):
+    """Suma y suma de cuadrados de cada ventana completa mediante sumas acumuladas."""
+    # Centrar los datos reduce la cancelación numérica de la varianza por sumas
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x.mean()
+    c1 = np.concatenate(([0.0], np.cumsum(x)))
+    c2 = np.concatenate(([0.0], np.cumsum(x * x)))
+    return c1[window:] - c1[:-window], c2[window:] - c2[:-window]
+
+
+def _valid_mean(x, window):
+    s1, _ = _valid_sums(x, window)
+    return s1 / window + np.mean(x, dtype=np.float64)
+
+
+def _valid_std(x, window, ddof=0):
+    s1, s2 = _valid_sums(x, window)
+    var = (s2 - s1 * s1 / window) / (window - ddof)
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def _pad_edges(valid, n, window, edge):
+    """
+    Coloca los valores de las ventanas completas (valid[k] corresponde a
+    x[k:k + window]) sobre un arreglo de longitud n según el modo de borde.
+    """
+    if edge == 'valid':
+        return valid
+    if edge == 'legacy':
+        # Disposición del bucle original de calculate_hvsr_helper: cada
+        # muestra recibe la ventana que inicia en ella, la cola repite la
+        # penúltima ventana y la última muestra queda en cero.
+        out = np.zeros(n, dtype=valid.dtype)
+        if n <= window:
+            return out
+        idx = np.minimum(np.arange(n - 1), n - 1 - window)
+        out[:n - 1] = valid[idx]
+        return out
+    # Modos centrados: la ventana k se asigna a la muestra k + window // 2
+    inicio = window // 2
+    fin = n - inicio - len(valid)
+    if len(valid) == 0:
+        return np.full(n, np.nan)
+    if edge == 'nan':
+        return np.concatenate((np.full(inicio, np.nan), valid, np.full(fin, np.nan)))
+    if edge == 'nearest':
+        return np.concatenate((np.full(inicio, valid[0]), valid, np.full(fin, valid[-1])))
+    raise ValueError(f"Modo de borde no reconocido: {edge}")
+
+
+def _rolling(x, window, edge, valid_func):
+    x, window = _check_window(x, window)
+    if edge not in EDGES:
+        raise ValueError(f"Modo de borde no reconocido: {edge}")
+    n = len(x)
+    if edge == 'reflect':
+        # Se extiende la señal por reflexión para obtener una ventana centrada
+        # completa en cada muestra.
+        izq = window // 2
+        der = window - 1 - izq
+        if n <= max(izq, der):
+            raise ValueError("La señal es demasiado corta para el borde 'reflect'.")
+        x = np.pad(x, (izq, der), mode='reflect')
+        return valid_func(x, window)
+    if n < window:
+        return _pad_edges(np.empty(0, dtype=x.dtype), n, window, edge)
+    return _pad_edges(valid_func(x, window), n, window, edge)
+
+
+def rolling_mean(x, window, edge='valid'):
+    """
+    Media móvil de x sobre ventanas de `window` muestras, en O(N).
+
+    Parámetros:
+    - x: arreglo 1D
+    - window: número de muestras por ventana
+    - edge: tratamiento de bordes ('valid', 'nearest', 'nan', 'reflect', 'legacy')
+
+    Retorna:
+    - arreglo con la media de cada ventana
+    """
+    return _rolling(x, window, edge, _valid_mean)
+
+
+def rolling_std(x, window, edge='valid', ddof=0, exact=False):
+    """
+    Desviación estándar móvil de x sobre ventanas de `window` muestras.
+
+    Por defecto usa sumas acumuladas (O(N)). Con exact=True evalúa np.std
+    sobre cada ventana de forma vectorizada por bloques, lo que reproduce bit a
+    bit el resultado de llamar np.std en un bucle.
+
+    Parámetros:
+    - x: arreglo 1D
+    - window: número de muestras por ventana
+    - edge: tratamiento de bordes ('valid', 'nearest', 'nan', 'reflect', 'legacy')
+    - ddof: grados de libertad descontados
+    - exact: usar np.std por ventana en lugar de sumas acumuladas
+
+    Retorna:
+    - arreglo con la desviación estándar de cada ventana
+    """
+    if exact:
+        def valid_func(v, w):
+            return _chunked_reduce(v, w, lambda a, axis: np.std(a, axis=axis, ddof=ddof))
+    else:
+        def valid_func(v, w):
+            return _valid_std(v, w, ddof)
+    return _rolling(x, window, edge, valid_func)
+
+
+def rolling_median(x, window, edge='valid'):
+    """
+    Mediana móvil de x sobre ventanas de `window` muestras.
+
+    Parámetros:
+    - x: arreglo 1D
+    - window: número de muestras por ventana
+    - edge: tratamiento de bordes ('valid', 'nearest', 'nan', 'reflect', 'legacy')
+
+    Retorna:
+    - arreglo con la mediana de cada ventana
+    """
+    return _rolling(x, window, edge, lambda v, w: _chunked_reduce(v, w, np.median))
+
+
+def moving_sd(HV, window_size=100, mode='fast'):
+    """
+    Desviación estándar móvil del HVSR con la disposición histórica de
+    calculate_hvsr_helper.
+
+    Parámetros:
+    - HV: curva HVSR
+    - window_size: muestras por ventana
+    - mode: 'fast' (sumas acumuladas) o 'legacy' (idéntico al bucle original)
+
+    Retorna:
+    - sd_moving: arreglo de la misma longitud que HV
+    """
+    if mode not in ('fast', 'legacy'):
+        raise ValueError(f"Modo de desviación móvil no reconocido: {mode}")
+    HV = np.asarray(HV)
+    sd_moving = rolling_std(HV, window_size, edge='legacy', exact=(mode == 'legacy'))
+    # Se conserva el tipo de dato de la curva, como hacía np.zeros_like(HV)
+    if np.issubdtype(HV.dtype, np.floating):
+        sd_moving = sd_moving.astype(HV.dtype, copy=False)
+    return sd_moving
@@ -0,0 +1,206 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft as sp_fft
+from scipy import signal
+
+import cancellation
+
+# Número máximo de muestras (componentes x segmentos x nperseg) procesadas por bloque
+_MAX_BLOCK = 8_000_000
+
+
+# Muestras por bloque de las sumas en float64 de detrend_linear
+_DETREND_BLOCK = 1 << 18
+
+
+def stack_components(z, n, e, dtype=None):
+    """
+    Apila las tres componentes en un arreglo (3, nsamples).
+
+    Las componentes deben tener la misma longitud. Con dtype, cada una se
+    convierte al copiarla en el arreglo de salida, sin copias intermedias.
+    """
+    if not (len(z) == len(n) == len(e)):
+        raise ValueError("Las componentes Z, N y E deben tener la misma longitud.")
+    if dtype is None:
+        return np.stack((np.asarray(z), np.asarray(n), np.asarray(e)))
+    x = np.empty((3, len(z)), dtype=dtype)
+    for i, comp in enumerate((z, n, e)):
+        x[i] = comp
+    return x
+
+
+def detrend_linear(x):
+    """
+    Elimina en el lugar la recta de mínimos cuadrados de cada canal de x
+    (..., nsamples), como scipy.signal.detrend(type='linear').
+
+    Las sumas se acumulan en float64 por bloques, de modo que un arreglo
+    float32 se corrige con la misma exactitud sin copiarlo entero a float64.
+    Los arreglos enteros se convierten antes a float64.
+    """
+    if not np.issubdtype(x.dtype, np.floating):
+        x = x.astype(np.float64)
+    nsamples = x.shape[-1]
+    centro = (nsamples - 1) / 2
+    suma = np.zeros(x.shape[:-1])
+    momento = np.zeros(x.shape[:-1])
+    for i in range(0, nsamples, _DETREND_BLOCK):
+        bloque = x[..., i:i + _DETREND_BLOCK].astype(np.float64)
+        suma += bloque.sum(axis=-1)
+        momento += bloque @ (np.arange(i, i + bloque.shape[-1]) - centro)
+    media = (suma / max(nsamples, 1))[..., None]
+    # Suma de los cuadrados de la rampa centrada: n (n^2 - 1) / 12
+    pendiente = (momento / max(nsamples * (nsamples ** 2 - 1) / 12, 1))[..., None]
+    for i in range(0, nsamples, _DETREND_BLOCK):
+        t = np.arange(i, min(i + _DETREND_BLOCK, nsamples)) - centro
+        x[..., i:i + _DETREND_BLOCK] -= (media + pendiente * t).astype(x.dtype, copy=False)
+    return x
+
+
+def segment_view(x, nperseg, noverlap):
+    """
+    Vista sin copia de los segmentos de Welch de x (..., nsamples).
+
+    Retorna un arreglo de forma (..., nsegmentos, nperseg) que comparte
+    memoria con x.
+    """
+    step = nperseg - noverlap
+    if step <= 0:
+        raise ValueError("noverlap debe ser menor que nperseg.")
+    if x.shape[-1] < nperseg:
+        raise ValueError("El ancho de ventana es mayor que la longitud de la señal.")
+    return sliding_window_view(x, nperseg, axis=-1)[..., ::step, :]
+
+
+def segment_starts(nsamples, nperseg, noverlap):
+    """Índice de la primera muestra de cada segmento de Welch."""
+    step = nperseg - noverlap
+    return np.arange(0, nsamples - nperseg + 1, step)
+
+
+def _median_bias(n):
+    """Sesgo de la mediana de n periodogramas (mismo criterio que scipy.signal.welch)."""
+    ii_2 = 2 * np.arange(1., (n - 1) // 2 + 1)
+    return 1 + np.sum(1. / (ii_2 + 1) - 1. / ii_2)
+
+
+def segment_spectra(x, fs, window='hann', nperseg=256, noverlap=None, nfft=None,
+                    detrend='constant', scaling='spectrum', dtype=None, cruzados=None):
+    """
+    Periodogramas de todos los segmentos de Welch de un arreglo multicanal.
+
+    Los segmentos se extraen con vistas sin copia y se transforman con una
+    sola FFT real por bloque, de modo que la memoria temporal queda acotada.
+
+    Parámetros:
+    - x: arreglo (..., nsamples), p. ej. (3, nsamples) con Z, N, E
+    - fs: frecuencia de muestreo
+    - window: tipo de ventana de scipy.signal.get_window
+    - nperseg: muestras por segmento
+    - noverlap: muestras de solapamiento (por defecto nperseg // 2)
+    - nfft: longitud de la FFT (por defecto nperseg)
+    - detrend: 'linear', 'constant' o False
+    - scaling: 'spectrum' o 'density'
+    - dtype: tipo real de salida (por defecto el de x, mínimo float32)
+    - cruzados: pares de canales (i, j) de x (3, nsamples) cuyos espectros
+      cruzados se calculan con las mismas FFT
+
+    Retorna:
+    - f: vector de frecuencias
+    - P: periodogramas de forma (..., nsegmentos, nfrecuencias)
+    - C: solo con cruzados, parte real de los espectros cruzados X_i X_j*
+      por segmento, de forma (npares, nsegmentos, nfrecuencias) y con la
+      misma escala que P
+    """
+    x = np.asarray(x)
+    if noverlap is None:
+        noverlap = nperseg // 2
+    if nfft is None:
+        nfft = nperseg
+    if nfft < nperseg:
+        raise ValueError("nfft debe ser mayor o igual que nperseg.")
+    if dtype is None:
+        dtype = np.result_type(x.dtype, np.float32)
+
+    segmentos = segment_view(x, nperseg, noverlap)
+    win = signal.get_window(window, nperseg).astype(dtype)
+    if scaling == 'spectrum':
+        scale = 1.0 / win.sum() ** 2
+    elif scaling == 'density':
+        scale = 1.0 / (fs * (win * win).sum())
+    else:
+        raise ValueError(f"Escalamiento no reconocido: {scaling}")
+
+    f = sp_fft.rfftfreq(nfft, 1 / fs)
+    P = np.empty(segmentos.shape[:-1] + (len(f),), dtype=dtype)
+    cruzados = list(cruzados or ())
+    C = np.empty((len(cruzados),) + segmentos.shape[-2:-1] + (len(f),), dtype=dtype) if cruzados else None
+    # Espectro de un lado: se duplican todas las frecuencias salvo DC y Nyquist
+    dobles = slice(1, None) if nfft % 2 else slice(1, -1)
+
+    nseg = segmentos.shape[-2]
+    canales = int(np.prod(segmentos.shape[:-2], dtype=np.int64))
+    bloque = max(1, _MAX_BLOCK // max(1, canales * nperseg))
+    for i in range(0, nseg, bloque):
+        cancellation.checkpoint()
+        seg = segmentos[..., i:i + bloque, :]
+        if detrend:
+            seg = signal.detrend(seg, type=detrend, axis=-1)
+        seg = np.multiply(seg, win, dtype=dtype)
+        espectro = sp_fft.rfft(seg, n=nfft, axis=-1)
+        potencia = np.square(espectro.real) + np.square(espectro.imag)
+        potencia *= scale
+        potencia[..., dobles] *= 2
+        P[..., i:i + bloque, :] = potencia
+        for k, (a, b) in enumerate(cruzados):
+            cruzado = espectro[a].real * espectro[b].real + espectro[a].imag * espectro[b].imag
+            cruzado *= scale
+            cruzado[..., dobles] *= 2
+            C[k, i:i + bloque, :] = cruzado
+    if cruzados:
+        return f, P, C
+    return f, P
+
+
+def average_spectra(P, average='median', mask=None):
+    """
+    Promedia los periodogramas por segmento (..., nsegmentos, nf).
+
+    Parámetros:
+    - P: periodogramas por segmento
+    - average: 'median' o 'mean'
+    - mask: arreglo booleano opcional (nsegmentos,) con los segmentos a usar
+
+    Retorna:
+    - espectro promedio de forma (..., nf)
+    """
+    if mask is not None:
+        P = P[..., np.asarray(mask, dtype=bool), :]
+    nseg = P.shape[-2]
+    if nseg == 0:
+        raise ValueError("No hay segmentos disponibles para promediar.")
+    if average == 'median':
+        return np.median(P, axis=-2) / P.dtype.type(_median_bias(nseg))
+    if average == 'mean':
+        return P.mean(axis=-2, dtype=np.float64).astype(P.dtype, copy=False)
+    raise ValueError(f"Promedio no reconocido: {average}")
+
+
+def welch_components(z, n, e, fs, window='hann', nperseg=256, noverlap=None, nfft=None,
+                     detrend='constant', scaling='spectrum', average='median'):
+    """
+    Estimador de Welch de las tres componentes en una sola pasada.
+
+    Equivale a llamar scipy.signal.welch sobre Z, N y E por separado, pero
+    segmenta una sola vez el arreglo apilado (3, nsamples) y ejecuta una FFT
+    real por bloque para las tres componentes.
+
+    Retorna:
+    - f: vector de frecuencias
+    - P: espectros de forma (3, nf) en el orden Z, N, E
+    """
+    x = stack_components(z, n, e)
+    f, P = segment_spectra(x, fs, window=window, nperseg=nperseg, noverlap=noverlap,
+                           nfft=nfft, detrend=detrend, scaling=scaling)
+    return f, average_spectra(P, average=average)
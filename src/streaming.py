@@ -0,0 +1,221 @@
+import numpy as np
+
+import profiling
+from hvsr_calculator import combine_hv, pick_peak, smooth_components, window_samples
+from intervals import segment_mask
+from load_data import DataLoader
+from rolling import moving_sd
+from smoothing import DEFAULT_TOL
+from spectra import average_spectra, segment_spectra
+
+
+class LinearTrend:
+    """
+    Ajuste por mínimos cuadrados de una recta a x(t) (t = índice de muestra)
+    acumulado por bloques, para las tres componentes a la vez.
+
+    Combina momentos centrados de cada bloque (fórmula paralela de Welford),
+    por lo que es estable aunque la media de la señal sea grande.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.media_t = 0.0
+        self.m2_t = 0.0
+        self.media_x = np.zeros(3)
+        self.c_tx = np.zeros(3)
+
+    def update(self, x, inicio):
+        """Agrega el bloque x (3, m) cuya primera muestra es la número `inicio`."""
+        m = x.shape[-1]
+        if m == 0:
+            return
+        t = np.arange(inicio, inicio + m, dtype=np.float64)
+        mt = t.mean()
+        mx = x.mean(axis=-1)
+        m2 = np.sum((t - mt) ** 2)
+        c = (x - mx[:, None]) @ (t - mt)
+
+        total = self.n + m
+        delta_t = mt - self.media_t
+        delta_x = mx - self.media_x
+        self.m2_t += m2 + delta_t ** 2 * self.n * m / total
+        self.c_tx += c + delta_x * delta_t * self.n * m / total
+        self.media_t += delta_t * m / total
+        self.media_x += delta_x * m / total
+        self.n = total
+
+    def coefficients(self):
+        """Retorna (ordenada, pendiente) de cada componente, arreglos de forma (3,)."""
+        pendiente = self.c_tx / self.m2_t if self.m2_t > 0 else np.zeros(3)
+        return self.media_x - pendiente * self.media_t, pendiente
+
+
+class StreamingHVSR:
+    """
+    Cálculo del HVSR por bloques, sin retener las trazas completas.
+
+    Las trazas se entregan en bloques consecutivos con update(); en cada
+    llamada se calculan los periodogramas de los segmentos de Welch que ya
+    están completos (con la misma ventana y solapamiento que
+    calculate_hvsr_helper) y solo se conservan las muestras del segmento
+    siguiente. Con average='mean' la memoria es constante (suma acumulada);
+    con average='median' se guardan los periodogramas por segmento en
+    `dtype`, que ocupan aproximadamente la mitad de las muestras originales
+    en float32 con el solapamiento por defecto.
+
+    Parámetros:
+    - samples: frecuencia de muestreo
+    - sm, window, ancho, overlap, detr: como en calculate_hvsr_helper
+    - average: 'median' (igual que calculate_hvsr_helper) o 'mean'
+    - tendencia: (ordenada, pendiente) por componente a restar antes de
+      segmentar, p. ej. de LinearTrend; con detr='linear' no es necesaria,
+      porque la tendencia de cada segmento ya se elimina
+    - rechazos, t0: intervalos rechazados y tiempo de la primera muestra, como
+      en calculate_hvsr_helper; los segmentos que los tocan se descartan
+    - dtype: tipo de los periodogramas guardados
+    """
+
+    def __init__(self, samples, sm=1, window='hamming', ancho=82.02, overlap=5, detr='linear',
+                 average='median', tendencia=None, rechazos=None, t0=0.0, dtype=np.float32):
+        if average not in ('median', 'mean'):
+            raise ValueError(f"Promedio no reconocido: {average}")
+        self.samples = samples
+        self.sm = sm
+        self.window = window
+        self.detr = detr
+        self.average = average
+        self.tendencia = tendencia
+        self.rechazos = list(rechazos) if rechazos is not None else []
+        self.t0 = t0
+        self.dtype = dtype
+        self.nperseg, self.noverlap = window_samples(ancho, overlap, samples)
+        self.step = self.nperseg - self.noverlap
+        if self.step <= 0:
+            raise ValueError("noverlap debe ser menor que nperseg.")
+
+        self.muestras = 0
+        self.n_ventanas = 0
+        self.f = None
+        self._buffer = np.empty((3, 0))
+        self._periodogramas = []
+        self._suma = None
+
+    def update(self, z, n, e):
+        """Agrega un bloque de muestras de las tres componentes."""
+        bloque = np.stack((np.asarray(z, dtype=np.float64), np.asarray(n, dtype=np.float64),
+                           np.asarray(e, dtype=np.float64)))
+        if self.tendencia is not None:
+            ordenada, pendiente = self.tendencia
+            t = np.arange(self.muestras, self.muestras + bloque.shape[-1], dtype=np.float64)
+            bloque -= ordenada[:, None] + pendiente[:, None] * t
+        self.muestras += bloque.shape[-1]
+        x = np.concatenate((self._buffer, bloque), axis=-1) if self._buffer.shape[-1] else bloque
+
+        completos = (x.shape[-1] - self.nperseg) // self.step + 1 if x.shape[-1] >= self.nperseg else 0
+        if completos > 0:
+            usado = (completos - 1) * self.step + self.nperseg
+            with profiling.stage('welch', x):
+                f, P = segment_spectra(x[:, :usado], self.samples, window=self.window, nperseg=self.nperseg,
+                                       noverlap=self.noverlap, nfft=self.sm * self.nperseg,
+                                       detrend=self.detr, scaling='spectrum')
+            self.f = f
+            if self.rechazos:
+                # Primera muestra de x contada desde el inicio del registro
+                inicio = self.muestras - x.shape[-1]
+                mask = segment_mask(self.rechazos, usado, self.nperseg, self.noverlap, self.samples,
+                                    self.t0 + inicio / self.samples)
+                P = P[:, mask]
+            if self.average == 'mean':
+                suma = P.sum(axis=-2, dtype=np.float64)
+                self._suma = suma if self._suma is None else self._suma + suma
+            else:
+                self._periodogramas.append(P.astype(self.dtype))
+            self.n_ventanas += P.shape[-2]
+            x = x[:, completos * self.step:]
+        # Copia para no retener el bloque completo a través de la vista
+        self._buffer = np.array(x)
+
+    def spectra(self):
+        """Retorna (f, P) con los espectros promediados (3, nf) de las ventanas procesadas."""
+        if self.n_ventanas == 0:
+            raise ValueError("El ancho de ventana es mayor que la longitud de la señal.")
+        if self.average == 'mean':
+            return self.f, self._suma / self.n_ventanas
+        P = np.concatenate(self._periodogramas, axis=-2)
+        self._periodogramas = [P]
+        return self.f, average_spectra(P, average='median')
+
+    def result(self, method, b, confianza, sd_window=100, sd_mode='fast', n_frecuencias=None,
+               ko_tol=DEFAULT_TOL):
+        """
+        HVSR de las ventanas procesadas hasta el momento.
+
+        Retorna la misma tupla que calculate_hvsr_helper:
+        (f, HV, sd_moving, f_rejected, rejected_data, frecuencia_sitio, HV_f, pos)
+        """
+        f, P = self.spectra()
+        with profiling.stage('konno_ohmachi', P):
+            f, (ko_Pz, ko_Pn, ko_Pe) = smooth_components(f, P, b, n_frecuencias=n_frecuencias, ko_tol=ko_tol)
+        HV = combine_hv(ko_Pz, ko_Pn, ko_Pe, method)
+        with profiling.stage('sd_movil', HV):
+            sd_moving = moving_sd(HV, sd_window, mode=sd_mode)
+        with profiling.stage('pico'):
+            return (f, HV, sd_moving) + pick_peak(f, HV, sd_moving, confianza)
+
+
+def iter_chunks(z, n, e, muestras_bloque):
+    """Divide tres arreglos (o memmaps) en bloques consecutivos de muestras."""
+    for i in range(0, len(z), muestras_bloque):
+        yield z[i:i + muestras_bloque], n[i:i + muestras_bloque], e[i:i + muestras_bloque]
+
+
+def iter_file_chunks(ruta_z, ruta_n, ruta_e, segundos=600.0):
+    """
+    Lee una tripleta por bloques de `segundos`.
+
+    Los archivos SAC se recorren con memoria mapeada, de modo que solo el
+    bloque actual se lee del disco; los demás formatos se decodifican una
+    vez con ObsPy.
+    """
+    datos = DataLoader.load_triple(ruta_z, ruta_n, ruta_e)
+    muestras_bloque = max(1, int(segundos * datos['z']['sampling_rate']))
+    yield from iter_chunks(datos['z']['data'], datos['n']['data'], datos['e']['data'], muestras_bloque)
+
+
+def calculate_hvsr_stream(fuente, sm, method, window, ancho, overlap, detr, confianza, b, samples,
+                          average='median', sd_window=100, sd_mode='fast', n_frecuencias=None,
+                          ko_tol=DEFAULT_TOL, rechazos=None, t0=0.0):
+    """
+    Equivalente por bloques de calculate_hvsr_helper.
+
+    Parámetros:
+    - fuente: iterable de bloques (z, n, e), o función sin argumentos que
+      retorna uno nuevo en cada llamada (p. ej. lambda: iter_file_chunks(...))
+    - average: 'median' (igual que calculate_hvsr_helper) o 'mean' (memoria constante)
+    - rechazos, t0: como en calculate_hvsr_helper
+    - resto: como en calculate_hvsr_helper
+
+    La tendencia lineal global que calculate_hvsr_helper elimina antes de
+    Welch no afecta al resultado con detr='linear'; con otro detr se estima
+    en una primera pasada, por lo que fuente debe ser una función.
+
+    Retorna la misma tupla que calculate_hvsr_helper.
+    """
+    tendencia = None
+    if detr != 'linear':
+        if not callable(fuente):
+            raise ValueError("Con detr distinto de 'linear' la fuente debe poder recorrerse dos veces.")
+        ajuste = LinearTrend()
+        for z, n, e in fuente():
+            bloque = np.stack((np.asarray(z, dtype=np.float64), np.asarray(n, dtype=np.float64),
+                               np.asarray(e, dtype=np.float64)))
+            ajuste.update(bloque, ajuste.n)
+        tendencia = ajuste.coefficients()
+
+    hvsr = StreamingHVSR(samples, sm=sm, window=window, ancho=ancho, overlap=overlap, detr=detr,
+                         average=average, tendencia=tendencia, rechazos=rechazos, t0=t0)
+    for z, n, e in (fuente() if callable(fuente) else fuente):
+        hvsr.update(z, n, e)
+    return hvsr.result(method, b, confianza, sd_window=sd_window, sd_mode=sd_mode,
+                       n_frecuencias=n_frecuencias, ko_tol=ko_tol)
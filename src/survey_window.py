@@ -0,0 +1,116 @@
+import os
+from datetime import datetime, timezone
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
+    QAbstractItemView, QHeaderView, QMessageBox
+)
+
+from catalog import Catalog
+from tasks import TaskRunner, TaskStatus
+
+
+class SurveyWindow(QDialog):
+    """
+    Lista las tripletas Z/N/E de un directorio de campaña a partir del
+    catálogo de cabeceras (catalog.Catalog) y permite elegir una para cargarla.
+
+    El escaneo incremental se ejecuta en segundo plano; al terminar, la tabla
+    se llena con una consulta al catálogo, sin abrir los archivos sísmicos.
+    Tras aceptar, `seleccion` contiene la tripleta elegida.
+    """
+
+    COLUMNAS = ["Estación", "Inicio (UTC)", "Duración (min)", "fs (Hz)", "Huecos", "Directorio"]
+
+    def __init__(self, raiz, parent=None, catalogo=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Campaña: {raiz}")
+        self.raiz = raiz
+        self.parent = parent
+        self.catalogo = catalogo or Catalog()
+        self.tripletas = []
+        self.seleccion = None
+        self.tasks = TaskRunner(self)
+        self.init_ui()
+        self.resize(800, 500)
+        self.scan()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.filtro = QLineEdit()
+        self.filtro.setPlaceholderText("Filtrar por estación o directorio")
+        self.filtro.textChanged.connect(self._apply_filter)
+        layout.addWidget(self.filtro)
+
+        self.tabla = QTableWidget(0, len(self.COLUMNAS))
+        self.tabla.setHorizontalHeaderLabels(self.COLUMNAS)
+        self.tabla.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tabla.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.tabla.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.tabla.horizontalHeader().setStretchLastSection(True)
+        self.tabla.cellDoubleClicked.connect(lambda fila, _: self.load_selected())
+        layout.addWidget(self.tabla)
+
+        self.resumen = QLabel()
+        layout.addWidget(self.resumen)
+
+        btn_layout = QHBoxLayout()
+        btn_scan = QPushButton("Reescanear")
+        btn_scan.clicked.connect(self.scan)
+        btn_layout.addWidget(btn_scan)
+        btn_load = QPushButton("Cargar tripleta")
+        btn_load.clicked.connect(self.load_selected)
+        btn_layout.addWidget(btn_load)
+        layout.addLayout(btn_layout)
+
+        layout.addWidget(TaskStatus(self.tasks))
+
+    def scan(self):
+        self.resumen.setText("Leyendo cabeceras...")
+        self.tasks.submit('catalogo', self._scan_job, self.catalogo, self.raiz,
+                          on_result=self._on_scanned,
+                          on_error=lambda error: QMessageBox.warning(self, "Error", error))
+
+    @staticmethod
+    def _scan_job(ctx, catalogo, raiz):
+        """Actualiza el catálogo y consulta las tripletas en un hilo de trabajo."""
+        ctx.progress(0, "Leyendo cabeceras...")
+        cambios = catalogo.scan(raiz, progress=lambda i, total: ctx.progress(100 * i // total,
+                                                                              "Leyendo cabeceras..."))
+        return cambios, catalogo.triplets(raiz)
+
+    def _on_scanned(self, resultado):
+        cambios, (completas, incompletas) = resultado
+        self.tripletas = completas
+        self.tabla.setRowCount(len(completas))
+        for fila, t in enumerate(completas):
+            inicio = datetime.fromtimestamp(t['inicio'], tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            valores = [t['estacion'], inicio, f"{(t['fin'] - t['inicio']) / 60:.1f}",
+                       f"{t['sampling_rate']:g}", str(t['huecos']), os.path.dirname(t['z'])]
+            for columna, valor in enumerate(valores):
+                self.tabla.setItem(fila, columna, QTableWidgetItem(valor))
+        self._apply_filter(self.filtro.text())
+        self.resumen.setText(
+            f"{len(completas)} tripletas, {len(incompletas)} incompletas "
+            f"({cambios['nuevos'] + cambios['actualizados']} archivos leídos, "
+            f"{cambios['sin_cambios']} sin cambios, {cambios['errores']} con errores)")
+
+    def _apply_filter(self, texto):
+        texto = texto.lower()
+        for fila, t in enumerate(self.tripletas):
+            visible = not texto or texto in t['estacion'].lower() or texto in t['z'].lower()
+            self.tabla.setRowHidden(fila, not visible)
+
+    def load_selected(self):
+        filas = self.tabla.selectionModel().selectedRows()
+        if not filas:
+            QMessageBox.warning(self, "Error", "Selecciona una tripleta.")
+            return
+        self.seleccion = self.tripletas[filas[0].row()]
+        self.accept()
+
+    def done(self, resultado):
+        self.tasks.cancel()
+        super().done(resultado)
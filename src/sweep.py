@@ -0,0 +1,108 @@
+import csv
+import itertools
+
+import numpy as np
+
+from hvsr_calculator import (
+    combine_hv,
+    compute_spectra,
+    pick_peak,
+    prepare_components,
+    smooth_components,
+)
+from rolling import moving_sd
+from smoothing import DEFAULT_TOL
+
+# Parámetros que definen un espectro de Welch y un espectro suavizado
+WELCH_KEYS = ('ancho', 'overlap', 'window', 'detr', 'sm')
+SMOOTH_KEYS = WELCH_KEYS + ('b',)
+
+# Columnas escalares de la tabla de resultados
+PARAM_COLUMNS = ('method', 'b', 'ancho', 'overlap', 'window', 'detr', 'sm')
+TABLE_COLUMNS = PARAM_COLUMNS + ('frecuencia_sitio', 'amplitud_sitio')
+
+
+def expand_grid(grid):
+    """
+    Convierte la malla de parámetros en una lista de combinaciones.
+
+    Acepta un diccionario de listas (producto cartesiano), p. ej.
+    {'method': [...], 'b': [40, 188.5]}, o un iterable de diccionarios.
+    """
+    if isinstance(grid, dict):
+        claves = list(grid)
+        valores = [v if isinstance(v, (list, tuple)) else [v] for v in grid.values()]
+        return [dict(zip(claves, combinacion)) for combinacion in itertools.product(*valores)]
+    return [dict(c) for c in grid]
+
+
+def sweep_hvsr(z, n, e, samples, grid, sm=1, detr='linear', confianza=100.0,
+               sd_window=100, sd_mode='fast', n_frecuencias=None, ko_tol=DEFAULT_TOL):
+    """
+    Calcula el HVSR para todas las combinaciones de una malla de parámetros
+    reutilizando los resultados intermedios.
+
+    La tendencia lineal se elimina una sola vez; cada espectro de Welch
+    distinto (ancho, overlap, window, detr, sm) y cada espectro suavizado
+    distinto (mismos parámetros + b) se calculan una única vez, y todos los
+    métodos H/V se derivan de ellos.
+
+    Parámetros:
+    - z, n, e: arrays de datos (Z, N, E)
+    - samples: frecuencia de muestreo
+    - grid: malla con claves 'method', 'b', 'ancho', 'overlap', 'window' (y
+      opcionalmente 'detr' y 'sm'), ver expand_grid
+    - sm, detr, confianza, sd_window, sd_mode, n_frecuencias, ko_tol: valores
+      comunes, como en calculate_hvsr_helper
+
+    Retorna:
+    - filas: lista de diccionarios, uno por combinación, con los parámetros,
+      'frecuencia_sitio', 'amplitud_sitio', 'frecuencias', 'HVSR' y 'sd_moving'
+    - info: diccionario con el número de combinaciones, espectros de Welch y
+      espectros suavizados calculados
+    """
+    x, _ = prepare_components(z, n, e, samples)
+    welch = {}
+    suavizados = {}
+    filas = []
+
+    for combinacion in expand_grid(grid):
+        p = {'sm': sm, 'detr': detr}
+        p.update(combinacion)
+
+        clave_welch = tuple(p[k] for k in WELCH_KEYS)
+        if clave_welch not in welch:
+            welch[clave_welch] = compute_spectra(x, p['sm'], p['window'], p['ancho'],
+                                                 p['overlap'], p['detr'], samples)
+        clave_suavizado = tuple(p[k] for k in SMOOTH_KEYS)
+        if clave_suavizado not in suavizados:
+            f, P = welch[clave_welch]
+            suavizados[clave_suavizado] = smooth_components(f, P, p['b'], n_frecuencias=n_frecuencias,
+                                                            ko_tol=ko_tol)
+
+        f, (ko_Pz, ko_Pn, ko_Pe) = suavizados[clave_suavizado]
+        HV = combine_hv(ko_Pz, ko_Pn, ko_Pe, p['method'])
+        sd_moving = moving_sd(HV, sd_window, mode=sd_mode)
+        _, _, frecuencia_sitio, HV_f, pos = pick_peak(f, HV, sd_moving, confianza)
+
+        fila = {k: p[k] for k in PARAM_COLUMNS}
+        fila.update({
+            'frecuencia_sitio': frecuencia_sitio,
+            'amplitud_sitio': HV_f[pos] if len(HV_f) > 0 else np.nan,
+            'frecuencias': f,
+            'HVSR': HV,
+            'sd_moving': sd_moving,
+        })
+        filas.append(fila)
+
+    info = {'combinaciones': len(filas), 'welch': len(welch), 'suavizados': len(suavizados)}
+    return filas, info
+
+
+def write_sweep_csv(ruta, filas):
+    """Escribe las columnas escalares de la tabla del barrido como CSV."""
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(TABLE_COLUMNS)
+        for fila in filas:
+            writer.writerow([fila[c] for c in TABLE_COLUMNS])
@@ -0,0 +1,229 @@
+import threading
+import time
+from functools import partial
+
+from PyQt5.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtWidgets import QHBoxLayout, QLabel, QProgressBar, QPushButton, QWidget
+
+import cancellation
+import profiling
+
+
+class TaskCancelled(Exception):
+    """Se lanza dentro de una tarea cuando se pidió su cancelación."""
+
+
+class TaskContext:
+    """
+    Objeto que recibe la función de una tarea como primer argumento.
+
+    Permite informar el avance con progress() y consultar la cancelación con
+    check(). La cancelación es cooperativa: se hace efectiva en la siguiente
+    llamada a progress() o check(), o en el siguiente cancellation.checkpoint()
+    de los bucles por bloques del cálculo.
+    """
+
+    def __init__(self, signals):
+        self._signals = signals
+        self._cancelada = threading.Event()
+
+    def cancel(self):
+        self._cancelada.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelada.is_set()
+
+    def check(self):
+        """Lanza TaskCancelled si se pidió cancelar la tarea."""
+        if self._cancelada.is_set():
+            raise TaskCancelled()
+
+    def progress(self, porcentaje, mensaje=""):
+        """Informa el avance (0-100) y comprueba la cancelación."""
+        self.check()
+        self._signals.progress.emit(int(porcentaje), mensaje)
+
+
+class _TaskSignals(QObject):
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    profiled = pyqtSignal(object)
+
+
+class Task(QRunnable):
+    """Ejecuta func(contexto, *args, **kwargs) en un hilo del QThreadPool."""
+
+    def __init__(self, nombre, func, args=(), kwargs=None):
+        super().__init__()
+        # El TaskRunner conserva la referencia mientras la tarea está activa
+        self.setAutoDelete(False)
+        self.nombre = nombre
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.signals = _TaskSignals()
+        self.context = TaskContext(self.signals)
+
+    def run(self):
+        try:
+            self.context.check()
+            with profiling.profile(self.nombre) as perfil, cancellation.scope(self.context.check):
+                resultado = self.func(self.context, *self.args, **self.kwargs)
+            self.context.check()
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as err:
+            self.signals.failed.emit(f"{type(err).__name__}: {err}")
+            return
+        if perfil:
+            self.signals.profiled.emit(perfil)
+        self.signals.finished.emit(resultado)
+
+
+class TaskRunner(QObject):
+    """
+    Ejecuta tareas pesadas (carga, filtrado, cálculo HVSR) fuera del hilo de
+    la interfaz y entrega los resultados en el hilo principal.
+
+    Las tareas con el mismo nombre se agrupan: si llega una nueva mientras
+    otra se ejecuta, la activa se cancela y solo se ejecuta la última
+    solicitud pendiente, de modo que siempre se calculan los parámetros más
+    recientes.
+
+    Señales:
+    - progress(nombre, porcentaje, mensaje)
+    - busy(bool): hay o no tareas activas
+    - profiled(perfil): desglose de tiempos (profiling.Profiler) de una
+      tarea terminada, solo con la instrumentación activada
+    """
+
+    progress = pyqtSignal(str, int, str)
+    busy = pyqtSignal(bool)
+    profiled = pyqtSignal(object)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self._pool = pool or QThreadPool.globalInstance()
+        self._activas = {}
+        self._pendientes = {}
+
+    def submit(self, nombre, func, *args, on_result=None, on_error=None, on_progress=None, **kwargs):
+        """
+        Programa func(contexto, *args, **kwargs) con el nombre indicado.
+
+        Parámetros:
+        - nombre: clave de agrupación (p. ej. 'hvsr')
+        - func: función cuyo primer argumento es un TaskContext
+        - on_result(resultado), on_error(mensaje), on_progress(porcentaje, mensaje):
+          funciones llamadas en el hilo principal
+
+        Retorna:
+        - la Task creada
+        """
+        task = Task(nombre, func, args, kwargs)
+        task.callbacks = (on_result, on_error, on_progress)
+        task.signals.progress.connect(partial(self._on_progress, task))
+        task.signals.finished.connect(partial(self._on_done, task, 'resultado'))
+        task.signals.failed.connect(partial(self._on_done, task, 'error'))
+        task.signals.cancelled.connect(partial(self._on_done, task, 'cancelada', None))
+        task.signals.profiled.connect(self.profiled.emit)
+
+        if nombre in self._activas:
+            self._activas[nombre].context.cancel()
+            self._pendientes[nombre] = task
+        else:
+            self._start(task)
+        return task
+
+    def _start(self, task):
+        self._activas[task.nombre] = task
+        self.busy.emit(True)
+        self._pool.start(task)
+
+    def _on_progress(self, task, porcentaje, mensaje):
+        if task.context.cancelled:
+            return
+        on_progress = task.callbacks[2]
+        if on_progress is not None:
+            on_progress(porcentaje, mensaje)
+        self.progress.emit(task.nombre, porcentaje, mensaje)
+
+    def _on_done(self, task, tipo, valor):
+        if self._activas.get(task.nombre) is task:
+            del self._activas[task.nombre]
+        on_result, on_error, _ = task.callbacks
+        if not task.context.cancelled:
+            if tipo == 'resultado' and on_result is not None:
+                on_result(valor)
+            elif tipo == 'error' and on_error is not None:
+                on_error(valor)
+        pendiente = self._pendientes.pop(task.nombre, None)
+        if pendiente is not None:
+            self._start(pendiente)
+        elif not self._activas:
+            self.busy.emit(False)
+
+    def is_running(self, nombre=None):
+        """True si hay una tarea activa (con ese nombre, si se indica)."""
+        return bool(self._activas) if nombre is None else nombre in self._activas
+
+    def cancel(self, nombre=None):
+        """Cancela la tarea activa y descarta la pendiente (todas si nombre es None)."""
+        nombres = list(self._activas) if nombre is None else [nombre]
+        for clave in nombres:
+            self._pendientes.pop(clave, None)
+            if clave in self._activas:
+                self._activas[clave].context.cancel()
+        if nombre is None:
+            self._pendientes.clear()
+
+    def wait(self, timeout=None):
+        """
+        Espera a que terminen las tareas activas y pendientes procesando los
+        eventos de Qt (útil en scripts y pruebas). Retorna False si se agota
+        el tiempo (segundos).
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._activas or self._pendientes:
+            if limite is not None and time.monotonic() > limite:
+                return False
+            QCoreApplication.processEvents()
+            time.sleep(0.005)
+        QCoreApplication.processEvents()
+        return True
+
+
+class TaskStatus(QWidget):
+    """Barra de progreso con botón de cancelar asociada a un TaskRunner."""
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel()
+        self.bar = QProgressBar()
+        self.bar.setRange(0, 100)
+        self.bar.setMaximumWidth(200)
+        self.cancel_btn = QPushButton("Cancelar")
+        self.cancel_btn.clicked.connect(lambda: self.runner.cancel())
+        layout.addWidget(self.label)
+        layout.addWidget(self.bar)
+        layout.addWidget(self.cancel_btn)
+        runner.progress.connect(self._on_progress)
+        runner.busy.connect(self._on_busy)
+        self.setVisible(False)
+
+    def _on_progress(self, nombre, porcentaje, mensaje):
+        self.bar.setValue(porcentaje)
+        self.label.setText(mensaje)
+
+    def _on_busy(self, activo):
+        if activo:
+            self.bar.setValue(0)
+            self.label.setText("Procesando...")
+        self.setVisible(activo)
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+from obspy import Stream, Trace, UTCDateTime
+
+import batch
+from batch import discover_triplets, load_config, process_station
+from load_data import identify_component, station_name
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def test_identifica_componentes():
+    assert identify_component('A04_staA.z.sac') == 'z'
+    assert identify_component('/ruta/staBn.sac') == 'n'
+    assert identify_component('6631e0.E.gcf') == 'e'
+    assert identify_component('notas.txt') is None
+    assert station_name('A04_staA.z.sac') == 'A04_staA'
+
+
+def test_descubre_tripletas_de_ejemplo():
+    completas, incompletas = discover_triplets(DATA)
+    assert [t['estacion'] for t in completas] == ['A04_staA', 'A04_staB', 'A04_staC', 'A04_staD']
+    assert not incompletas
+    assert all(identify_component(t[c]) == c for t in completas for c in 'zne')
+
+
+def test_tripleta_incompleta(tmp_path):
+    for nombre in ('X1.z.sac', 'X1.n.sac', 'X1.e.sac', 'X2.z.sac'):
+        (tmp_path / nombre).write_bytes(b'')
+    completas, incompletas = discover_triplets(str(tmp_path))
+    assert [t['estacion'] for t in completas] == ['X1']
+    assert [t['estacion'] for t in incompletas] == ['X2']
+
+
+def test_config_completa_valores_por_defecto(tmp_path):
+    ruta = tmp_path / 'config.json'
+    ruta.write_text('{"method": "Picozzi", "b": 40}', encoding='utf-8')
+    params = load_config(str(ruta))
+    assert params['method'] == 'Picozzi' and params['b'] == 40
+    assert params['ancho'] == 82.02 and params['estaciones'] == {}
+    # El suavizado usa las frecuencias de la FFT salvo que se pida la malla logarítmica
+    assert params['n_frecuencias'] is None
+
+
+@pytest.fixture
+def tripleta_con_hueco(tmp_path):
+    """Registros de 600 s a 50 Hz con un hueco de 30 s y desfasados entre componentes."""
+    rng = np.random.default_rng(7)
+    tripleta = {'estacion': 'X1'}
+    for i, comp in enumerate('zne'):
+        inicio = UTCDateTime(2024, 1, 1) + 0.4 * i
+        x = rng.standard_normal(30_000)
+        trazas = [Trace(x[:5000].copy(), header={'channel': f'HH{comp.upper()}', 'sampling_rate': 50.0,
+                                                 'starttime': inicio}),
+                  Trace(x[6500:].copy(), header={'channel': f'HH{comp.upper()}', 'sampling_rate': 50.0,
+                                                 'starttime': inicio + 130})]
+        tripleta[comp] = str(tmp_path / f'X1.{comp}.mseed')
+        Stream(trazas).write(tripleta[comp], format='MSEED')
+    return tripleta
+
+
+@pytest.mark.parametrize('huecos', ['enmascarar', 'interpolar', 'dividir'])
+def test_por_bloques_trata_los_huecos_igual(tripleta_con_hueco, huecos):
+    params = dict(load_config(), ancho=20.0, b=40.0, huecos=huecos, promedio_bloque='median')
+    completo = process_station(tripleta_con_hueco, params)
+    por_bloques = process_station(tripleta_con_hueco, params, bloque=45.0)
+    np.testing.assert_allclose(por_bloques['HVSR'], completo['HVSR'], rtol=1e-4)
+    assert por_bloques['frecuencia_sitio'] == completo['frecuencia_sitio']
+
+
+def test_por_bloques_promedia_con_la_media(tripleta_con_hueco, monkeypatch):
+    promedios = []
+    original = batch.calculate_hvsr_stream
+    monkeypatch.setattr(batch, 'calculate_hvsr_stream',
+                        lambda *args, **kwargs: promedios.append(kwargs['average']) or original(*args, **kwargs))
+    params = dict(load_config(), ancho=20.0, b=40.0)
+    media = process_station(tripleta_con_hueco, params, bloque=45.0)
+    mediana = process_station(tripleta_con_hueco, dict(params, promedio_bloque='median'), bloque=45.0)
+    assert promedios == ['mean', 'median']
+    assert not np.allclose(media['HVSR'], mediana['HVSR'])
+
+
+def test_por_bloques_rechaza_fmax_analisis(tripleta_con_hueco):
+    params = dict(load_config(), fmax_analisis=10.0)
+    with pytest.raises(ValueError, match='fmax_analisis'):
+        process_station(tripleta_con_hueco, params, bloque=45.0)
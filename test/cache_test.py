@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+
+import cache as cache_mod
+import precision
+from cache import DiskCache, params_key
+from hvsr_calculator import calculate_hvsr_helper
+from load_data import DataLoader
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'stationA')
+RUTAS = [os.path.join(DATA, f'A04_staA.{c}.sac') for c in 'zne']
+
+
+def test_params_key_canonica():
+    assert params_key({'a': 1, 'b': 'hann'}) == params_key({'b': 'hann', 'a': 1})
+    assert params_key({'a': 1}) != params_key({'a': 2})
+
+
+def test_guardar_y_leer(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    assert cache.get('espectros', 'x') is None
+    cache.put('espectros', 'x', {'f': np.arange(4.0), 'P': np.ones((3, 4))})
+    leido = cache.get('espectros', 'x', mmap=True)
+    np.testing.assert_array_equal(leido['P'], np.ones((3, 4)))
+    assert cache.report()['hits'] == {'espectros': 1}
+    assert cache.report()['misses'] == {'espectros': 1}
+
+
+def test_desalojo_lru(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=3 * 8_200)
+    for i in range(3):
+        cache.put('e', f'k{i}', {'a': np.zeros(1000)})
+        os.utime(os.path.join(str(tmp_path), 'e', f'k{i}'), (i, i))
+    cache.get('e', 'k0')  # k0 pasa a ser la más reciente
+    cache.put('e', 'k3', {'a': np.zeros(1000)})
+    assert cache.get('e', 'k1') is None
+    assert cache.get('e', 'k0') is not None
+    assert cache.size() <= cache.max_bytes
+
+
+def test_trazas_y_espectros_en_cache(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    datos = DataLoader.load_triple(*RUTAS)
+    primero = DataLoader.load_triple(*RUTAS, cache=cache, lazy=False)
+    segundo = DataLoader.load_triple(*RUTAS, cache=cache, lazy=False)
+    assert cache.hits['trazas'] == 3 and cache.misses['trazas'] == 3
+    for comp in 'zne':
+        np.testing.assert_array_equal(segundo[comp]['data'], datos[comp]['data'])
+        np.testing.assert_array_equal(segundo[comp]['times'], datos[comp]['times'])
+        assert segundo[comp]['sampling_rate'] == primero[comp]['sampling_rate']
+
+    z, n, e = (datos[c]['data'] for c in 'zne')
+    args = (z, n, e, 1, 'Nakamura', 'hamming', 82.02, 5, 'linear', 100.0, 188.5, 100.0)
+    sin_cache = calculate_hvsr_helper(*args)
+    calculate_hvsr_helper(*args, cache=cache)
+    con_cache = calculate_hvsr_helper(*args, cache=cache)
+    assert cache.hits['suavizado'] == 1
+    np.testing.assert_array_equal(con_cache[1], sin_cache[1])
+    assert con_cache[5] == sin_cache[5]
+
+
+def test_version_y_tipo_en_las_claves(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path))
+    datos = DataLoader.load_triple(*RUTAS)
+    z, n, e = (datos[c]['data'] for c in 'zne')
+    args = (z, n, e, 1, 'Nakamura', 'hamming', 82.02, 5, 'linear', 100.0, 188.5, 100.0)
+    calculate_hvsr_helper(*args, cache=cache)
+    # Otra versión de los cálculos no reutiliza los espectros guardados
+    monkeypatch.setattr(cache_mod, 'CACHE_VERSION', cache_mod.CACHE_VERSION + 1)
+    calculate_hvsr_helper(*args, cache=cache)
+    assert cache.misses['suavizado'] == 2 and 'suavizado' not in cache.hits
+    # Ni los de otro tipo de salida
+    with precision.use('float32'):
+        assert calculate_hvsr_helper(*args, cache=cache)[1].dtype == np.float32
+    assert cache.misses['suavizado'] == 3 and 'suavizado' not in cache.hits
@@ -0,0 +1,118 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from obspy import Trace, UTCDateTime, read
+
+from batch import discover_triplets
+from catalog import Catalog, read_sac_header
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+INICIO = UTCDateTime(2024, 5, 1, 12, 0, 0)
+
+
+def escribir(ruta, canal, npts=1000, fs=100.0, inicio=INICIO):
+    traza = Trace(np.zeros(npts, dtype=np.float32),
+                  header={'station': 'S1', 'channel': canal, 'sampling_rate': fs, 'starttime': inicio})
+    traza.write(str(ruta), format='SAC')
+
+
+@pytest.fixture
+def campana(tmp_path):
+    """Una tripleta nombrada por componente, otra solo identificable por el canal y una incompleta."""
+    (tmp_path / 'a').mkdir()
+    for comp in 'zne':
+        escribir(tmp_path / 'a' / f'P01.{comp}.sac', f'HH{comp.upper()}')
+    (tmp_path / 'b').mkdir()
+    for i, canal in enumerate(('HHZ', 'HH1', 'HH2')):
+        escribir(tmp_path / 'b' / f'registro_{i}.sac', canal, inicio=INICIO + 0.5 * i)
+    escribir(tmp_path / 'a' / 'P02.z.sac', 'HHZ')
+    return tmp_path
+
+
+def test_tripletas_desde_cabeceras(campana, tmp_path_factory):
+    catalogo = Catalog(str(tmp_path_factory.mktemp('db') / 'c.sqlite'))
+    assert catalogo.scan(str(campana)) == {'nuevos': 7, 'actualizados': 0, 'sin_cambios': 0,
+                                           'eliminados': 0, 'errores': 0}
+    completas, incompletas = catalogo.triplets(str(campana))
+    assert [t['estacion'] for t in completas] == ['P01', 'S1_20240501_120000']
+    assert [t['estacion'] for t in incompletas] == ['P02']
+    cabecera = completas[1]
+    assert [os.path.basename(cabecera[c]) for c in 'zne'] == ['registro_0.sac', 'registro_1.sac', 'registro_2.sac']
+    # Tramo común a las tres componentes
+    assert cabecera['inicio'] == pytest.approx(INICIO.timestamp + 1.0)
+    assert cabecera['fin'] == pytest.approx(INICIO.timestamp + 9.99)
+    assert cabecera['sampling_rate'] == 100.0 and cabecera['huecos'] == 0
+
+
+def test_reescaneo_incremental(campana, tmp_path_factory):
+    catalogo = Catalog(str(tmp_path_factory.mktemp('db') / 'c.sqlite'))
+    catalogo.scan(str(campana))
+    assert catalogo.scan(str(campana))['sin_cambios'] == 7
+
+    escribir(campana / 'a' / 'P01.z.sac', 'HHZ', npts=2000)
+    os.remove(campana / 'a' / 'P02.z.sac')
+    (campana / 'a' / 'roto.n.sac').write_bytes(b'no es un SAC')
+    cambios = catalogo.scan(str(campana))
+    assert cambios == {'nuevos': 1, 'actualizados': 1, 'sin_cambios': 5, 'eliminados': 1, 'errores': 1}
+    registros = {os.path.basename(r['ruta']): r for r in catalogo.files(str(campana))}
+    assert registros['P01.z.sac']['npts'] == 2000
+    assert registros['roto.n.sac']['error']
+    completas, incompletas = catalogo.triplets(str(campana))
+    assert [t['estacion'] for t in completas] == ['P01', 'S1_20240501_120000'] and not incompletas
+
+
+def test_coincide_con_discover_triplets(tmp_path):
+    catalogo = Catalog(str(tmp_path / 'c.sqlite'))
+    catalogo.scan(DATA)
+    completas, incompletas = catalogo.triplets(DATA)
+    esperadas, _ = discover_triplets(DATA)
+    assert [{c: t[c] for c in ('estacion', 'z', 'n', 'e')} for t in completas] == [
+        {'estacion': t['estacion'], **{c: os.path.abspath(t[c]) for c in 'zne'}} for t in esperadas]
+    assert not incompletas
+    assert completas[0]['lat'] == pytest.approx(19.42213)
+
+
+@pytest.mark.filterwarnings('ignore:Sample spacing')
+def test_cabecera_sac_directa_igual_a_obspy(tmp_path):
+    traza = Trace(np.zeros(500, dtype=np.float32),
+                  header={'network': 'XX', 'station': 'ABC', 'location': '00', 'channel': 'HH1',
+                          'sampling_rate': 250.0, 'starttime': INICIO + 0.123})
+    traza.write(str(tmp_path / 'x.sac'), format='SAC')
+    directa = read_sac_header(str(tmp_path / 'x.sac'))
+    stats = read(str(tmp_path / 'x.sac'), headonly=True)[0].stats
+    assert (directa['red'], directa['estacion'], directa['ubicacion'], directa['canal']) == \
+        (stats.network, stats.station, stats.location, stats.channel)
+    assert directa['componente'] == 'n'
+    assert directa['sampling_rate'] == stats.sampling_rate and directa['npts'] == stats.npts
+    assert directa['inicio'] == pytest.approx(stats.starttime.timestamp, abs=1e-6)
+    assert directa['fin'] == pytest.approx(stats.endtime.timestamp, abs=1e-6)
+
+
+def test_cabecera_sac_sin_obspy():
+    ruta = os.path.join(DATA, 'stationA', 'A04_staA.z.sac')
+    codigo = (f"import sys; sys.path.insert(0, {SRC!r}); from catalog import read_sac_header; "
+              f"print(repr(read_sac_header({ruta!r})['inicio']), 'obspy' in sys.modules)")
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True).stdout
+    inicio, obspy_cargado = salida.split()
+    assert obspy_cargado == 'False'
+    assert float(inicio) == read(ruta, headonly=True)[0].stats.starttime.timestamp
+
+
+def test_catalogo_danado_se_informa_en_la_terminal(tmp_path, monkeypatch):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    import hvsr_gui
+
+    monkeypatch.setenv('HVSRLEARN_CACHE', str(tmp_path))
+    (tmp_path / 'catalogo.sqlite').write_bytes(b'no es una base de datos SQLite' * 100)
+    app = QApplication.instance() or QApplication([])
+    ventana = hvsr_gui.HvsrMainWindow()
+    monkeypatch.setattr(hvsr_gui.QFileDialog, 'getExistingDirectory', lambda *args: DATA)
+    ventana.open_survey()
+    assert "No se pudo abrir el catálogo" in ventana.terminal.toPlainText()
+    ventana.close()
+    app.processEvents()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos de la aplicación viven en src/ y se importan por nombre
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
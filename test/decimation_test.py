@@ -0,0 +1,70 @@
+import numpy as np
+
+from decimation import log_bin_envelope
+
+
+def test_envolvente_conserva_extremos_y_orden():
+    rng = np.random.default_rng(0)
+    f = np.fft.rfftfreq(200_001, 0.01)
+    y = np.abs(rng.standard_normal(len(f)))
+    y[54_321] = 50.0
+    x, yr = log_bin_envelope(f, y, n_bins=500)
+    assert len(x) <= 1000
+    assert np.all(np.diff(x) >= 0)
+    assert yr.max() == 50.0
+    assert yr.min() == y[1:].min()
+
+
+def test_curvas_cortas_sin_cambios():
+    f = np.linspace(0, 10, 101)
+    y = np.sin(f)
+    x, yr = log_bin_envelope(f, y, n_bins=100)
+    np.testing.assert_array_equal(x, f[1:])
+    np.testing.assert_array_equal(yr, y[1:])
+
+
+def test_piramide_vista_acotada():
+    from decimation import EnvelopePyramid
+
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal(1_000_003).astype(np.float32)
+    data[777_777] = 40.0
+    piramide = EnvelopePyramid(data)
+
+    indices, valores = piramide.view(0, len(data), n_puntos=1000)
+    assert 2 * 1000 <= len(valores) <= 2 * 4 * 1000 + 2
+    assert valores.max() == 40.0 and valores.min() == data.min()
+    assert np.all(np.diff(indices) >= 0)
+
+    # Vistas cortas: muestras originales
+    indices, valores = piramide.view(777_700, 777_900, n_puntos=1000)
+    np.testing.assert_array_equal(valores, data[777_700:777_900])
+    np.testing.assert_array_equal(indices, np.arange(777_700, 777_900))
+
+    # Zoom intermedio: la envolvente sigue conteniendo el pico
+    _, valores = piramide.view(700_000, 800_000, n_puntos=1000)
+    assert valores.max() == 40.0
+
+
+def test_lod_redibuja_una_vez_por_cambio_de_vista(monkeypatch):
+    from matplotlib.figure import Figure
+
+    from decimation import EnvelopePyramid
+    from plot_data import DataPlotter
+
+    vistas = []
+    original = EnvelopePyramid.view
+
+    def view(self, *args, **kwargs):
+        vistas.append(self)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(EnvelopePyramid, 'view', view)
+    datos = {comp: {'data': np.zeros(300_000, dtype=np.float32), 'sampling_rate': 100.0} for comp in 'zne'}
+    figura = Figure()
+    plotter = DataPlotter(figura)
+    plotter.plot_triple_component(datos)
+    vistas.clear()
+    figura.axes[2].set_xlim(100, 200)
+    # Una vista por componente, no una por componente y eje compartido
+    assert len(vistas) == 3
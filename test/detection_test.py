@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from detection import StreamingDetector, detect_transients
+from process import ProcessData
+
+FS = 50.0
+
+
+@pytest.fixture
+def senal():
+    """Ruido de 20 minutos con dos transitorios en t = 300 s y t = 900 s."""
+    rng = np.random.default_rng(4)
+    z, n, e = (rng.normal(size=int(1200 * FS)) + 5.0 for _ in range(3))
+    for t in (300, 900):
+        i = int(t * FS)
+        for c in (z, n, e):
+            c[i:i + int(2 * FS)] += 40 * rng.normal(size=int(2 * FS))
+    return z, n, e
+
+
+def test_detecta_transitorios(senal):
+    intervalos = detect_transients(*senal, FS, lta=30.0, t0=100.0)
+    assert len(intervalos) == 2
+    for (t_ini, t_fin), t in zip(intervalos, (400, 1000)):
+        assert t_ini <= t and t_fin >= t + 2
+        assert t_fin - t_ini < 20
+
+
+def test_ruido_sin_transitorios():
+    rng = np.random.default_rng(5)
+    z, n, e = rng.normal(size=(3, int(600 * FS)))
+    assert len(detect_transients(z, n, e, FS)) == 0
+
+
+@pytest.mark.parametrize("bloque", [1000, 4321, int(300 * FS)])
+def test_bloques_equivalen_a_una_pasada(senal, bloque):
+    completo = detect_transients(*senal, FS)
+    por_bloques = detect_transients(*senal, FS, bloque=bloque)
+    assert np.allclose(por_bloques.to_list(), completo.to_list())
+
+
+def test_disparo_abierto_al_final():
+    z, n, e = np.random.default_rng(6).normal(size=(3, int(120 * FS)))
+    for c in (z, n, e):
+        c[-int(FS):] *= 50
+    detector = StreamingDetector(FS, lta=20.0, margen=0.0)
+    for i0 in range(0, len(z), 700):
+        detector.update(z[i0:i0 + 700], n[i0:i0 + 700], e[i0:i0 + 700])
+    assert len(detector.intervalos) == 0
+    (t_ini, t_fin), = detector.finish()
+    assert t_fin == pytest.approx((len(z) - 1) / FS)
+    assert t_ini <= 119.0
+
+
+def test_umbral_de_amplitud():
+    z, n, e = np.random.default_rng(7).normal(size=(3, int(300 * FS)))
+    e[int(150 * FS)] = 30.0  # pico de una muestra que no dispara el STA/LTA de 1 s
+    assert len(detect_transients(z, n, e, FS, umbral_on=100.0, umbral_off=50.0)) == 0
+    (t_ini, t_fin), = detect_transients(z, n, e, FS, umbral_on=100.0, umbral_off=50.0,
+                                        amplitud=10.0, margen=0.5)
+    assert (t_ini, t_fin) == pytest.approx((149.5, 150.5))
+
+
+def test_alimenta_reject_time_windows(senal):
+    datos = {'z': senal[0].copy(), 'n': senal[1].copy(), 'e': senal[2].copy()}
+    tiempos = {comp: np.arange(len(datos[comp])) / FS for comp in datos}
+    processor = ProcessData(datos, FS)
+    intervalos = processor.detect_transients()
+    processor.reject_time_windows(intervalos, tiempos)
+    conservadas = np.sum(~intervalos.contains(np.arange(len(senal[0])) / FS))
+    assert len(processor.data['z']) == conservadas < len(senal[0])
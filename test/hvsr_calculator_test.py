@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from hvsr_calculator import METHODS, calculate_hvsr_azimuthal, calculate_hvsr_helper, calculate_hvsr_windows
+
+FS = 50.0
+
+
+@pytest.fixture
+def senal():
+    """Ruido con un pico H/V cercano a 2 Hz en las horizontales."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(600 * FS)) / FS
+    z = rng.normal(size=t.size)
+    n = rng.normal(size=t.size) + 3 * np.sin(2 * np.pi * 2.0 * t + rng.uniform(0, 6))
+    e = rng.normal(size=t.size) + 3 * np.sin(2 * np.pi * 2.0 * t + rng.uniform(0, 6))
+    return z, n, e
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_helper_encuentra_el_pico(senal, method):
+    f, HV, sd_moving, *_, frecuencia_sitio, HV_f, pos = calculate_hvsr_helper(
+        *senal, 1, method, 'hann', 20.0, 5, 'linear', 100.0, 40.0, FS)
+    assert HV.shape == f.shape == sd_moving.shape
+    assert abs(frecuencia_sitio - 2.0) < 0.2
+
+
+def test_ventanas_estadistica(senal):
+    res = calculate_hvsr_windows(*senal, 1, 'Nakamura', 'hann', 20.0, 0, 'linear', 40.0, FS)
+    assert res['HV_ventanas'].dtype == np.float32
+    assert res['HV_ventanas'].shape == (30, len(res['frecuencias']))
+    assert res['ventanas_aceptadas'].all()
+    assert abs(res['frecuencia_sitio'] - 2.0) < 0.2
+    assert np.all(res['HV_menos'][1:] <= res['HV_mas'][1:])
+
+
+def test_rechazo_sta_lta(senal):
+    z, n, e = (c.copy() for c in senal)
+    inicio = int(300 * FS)
+    for c in (z, n, e):
+        c[inicio:inicio + int(FS)] += 200.0  # transitorio de un segundo
+    res = calculate_hvsr_windows(z, n, e, 1, 'Nakamura', 'hann', 20.0, 0, 'linear', 40.0, FS,
+                                 rechazo='sta_lta', lta=10.0)
+    rechazadas = np.flatnonzero(~res['ventanas_aceptadas'])
+    assert 15 in rechazadas
+    assert len(rechazadas) < 5
+
+
+def test_decimacion_previa_conserva_el_pico(senal):
+    f, HV, *_, frecuencia_sitio, _, _ = calculate_hvsr_helper(
+        *senal, 1, 'Nakamura', 'hann', 20.0, 5, 'linear', 100.0, 40.0, FS)
+    f_d, HV_d, *_, frecuencia_d, _, _ = calculate_hvsr_helper(
+        *senal, 1, 'Nakamura', 'hann', 20.0, 5, 'linear', 100.0, 40.0, FS, fmax_analisis=8.0)
+    # Decimado por 2: la malla de frecuencias es la misma hasta la nueva Nyquist
+    assert f_d[-1] == pytest.approx(FS / 4)
+    np.testing.assert_allclose(f_d, f[:len(f_d)])
+    assert frecuencia_d == frecuencia_sitio
+    banda = (f_d > 0.5) & (f_d < 8.0)
+    np.testing.assert_allclose(HV_d[banda], HV[:len(f_d)][banda], rtol=0.05)
+    ventanas = calculate_hvsr_windows(*senal, 1, 'Nakamura', 'hann', 20.0, 0, 'linear', 40.0, FS,
+                                      fmax_analisis=8.0)
+    assert abs(ventanas['frecuencia_sitio'] - 2.0) < 0.2
+
+
+def test_azimutal_equivale_a_norte_y_este(senal):
+    res = calculate_hvsr_azimuthal(*senal, 1, 'hann', 20.0, 50, 'linear', 40.0, FS, azimuts=[0.0, 90.0],
+                                   average='median')
+    for HV_az, method in zip(res['HV'], ('Luendei and Albarello N', 'Luendei and Albarello E')):
+        f, HV, *_ = calculate_hvsr_helper(*senal, 1, method, 'hann', 20.0, 50, 'linear', 100.0, 40.0, FS)
+        np.testing.assert_allclose(res['frecuencias'], f)
+        np.testing.assert_allclose(HV_az[1:], HV[1:], rtol=1e-5)
+
+
+
+def test_ventana_hvsr_direccional_como_la_curva_principal(senal):
+    from hvsr_window import HVSRWindow
+
+    params = {'sm': 1, 'method': 'Luendei and Albarello E', 'window': 'hann', 'ancho': 20.0, 'overlap': 50,
+              'detr': 'linear', 'confianza': 100.0, 'b': 40.0, 'sampling_rate': FS, 'fmax_analisis': None,
+              'n_frecuencias': None, 'azimuts': 2}
+    contexto = SimpleNamespace(progress=lambda *args: None)
+    (f, HV, *_), _, direccional = HVSRWindow._hvsr_job(contexto, *senal, params, False, None, None)
+    np.testing.assert_allclose(direccional['HV'][1][1:], HV[1:], rtol=1e-5)
+
+def test_azimutal_direccion_dominante():
+    """Una señal horizontal polarizada a 30° da el máximo H/V en ese azimut."""
+    rng = np.random.default_rng(1)
+    t = np.arange(int(600 * FS)) / FS
+    onda = 4 * np.sin(2 * np.pi * 2.0 * t)
+    z = rng.normal(size=t.size)
+    n = rng.normal(size=t.size) + onda * np.cos(np.deg2rad(30))
+    e = rng.normal(size=t.size) + onda * np.sin(np.deg2rad(30))
+    res = calculate_hvsr_azimuthal(z, n, e, 1, 'hann', 20.0, 50, 'linear', 40.0, FS, azimuts=36)
+    assert res['HV'].shape == (36, len(res['frecuencias']))
+    maximo = np.argmax(res['amplitud_pico'])
+    assert res['azimuts'][maximo] == pytest.approx(30.0)
+    assert abs(res['frecuencia_pico'][maximo] - 2.0) < 0.2
+    # La dirección perpendicular solo ve ruido
+    assert res['amplitud_pico'][np.argmin(np.abs(res['azimuts'] - 120))] < 0.2 * res['amplitud_pico'].max()
@@ -0,0 +1,74 @@
+import numpy as np
+
+from hvsr_calculator import (
+    calculate_hvsr_helper,
+    calculate_hvsr_windows,
+    combine_hv,
+    compute_spectra,
+    detrend_components,
+    smooth_components,
+    window_samples,
+)
+from intervals import IntervalIndex, segment_mask
+from process import ProcessData
+from spectra import segment_starts
+
+
+def test_fusiona_intervalos():
+    idx = IntervalIndex([(10, 20), (30, 40), (5, 12), (19, 25), (50, 45)])
+    assert idx.to_list() == [(5.0, 25.0), (30.0, 40.0), (45.0, 50.0)]
+    idx.add(24, 46)
+    assert idx.to_list() == [(5.0, 50.0)]
+    assert idx.total() == 45.0
+
+
+def test_consultas_equivalen_a_fuerza_bruta():
+    rng = np.random.default_rng(2)
+    intervalos = [tuple(sorted(rng.uniform(0, 1000, 2))) for _ in range(30)]
+    idx = IntervalIndex(intervalos)
+    t = rng.uniform(-10, 1010, 5000)
+    esperado = np.zeros(len(t), dtype=bool)
+    for a, b in intervalos:
+        esperado |= (t >= a) & (t <= b)
+    np.testing.assert_array_equal(idx.contains(t), esperado)
+
+    a = rng.uniform(0, 1000, 2000)
+    b = a + rng.uniform(0, 20, 2000)
+    esperado = np.zeros(len(a), dtype=bool)
+    for ini, fin in intervalos:
+        esperado |= (a <= fin) & (b >= ini)
+    np.testing.assert_array_equal(idx.overlaps(a, b), esperado)
+
+
+def test_rechazo_legado_sin_cambios():
+    times = np.arange(1000) / 10.0
+    data = np.arange(1000.0)
+    nuevo, nuevos_t = ProcessData(data, 10.0)._reject_windows_array(data, times, [(10, 20), (50, 55)])
+    mask = ~(((times >= 10) & (times <= 20)) | ((times >= 50) & (times <= 55)))
+    np.testing.assert_array_equal(nuevo, data[mask])
+    np.testing.assert_allclose(nuevos_t, np.arange(mask.sum()) / 10.0)
+
+
+def test_segmentos_rechazados_no_se_promedian():
+    fs = 50.0
+    rng = np.random.default_rng(4)
+    z, n, e = (rng.standard_normal(20_000) for _ in range(3))
+    # Un transitorio fuerte en la componente N entre 100 y 110 s
+    n[5000:5500] += 200 * np.sin(np.arange(500) * 0.3)
+    args = (1, 'Nakamura', 'hann', 20.0, 10, 'linear', 100.0, 40.0, fs)
+    rechazos = IntervalIndex([(100.0, 110.0)])
+
+    nperseg, noverlap = window_samples(20.0, 10, fs)
+    mask = segment_mask(rechazos, len(z), nperseg, noverlap, fs)
+    inicios = segment_starts(len(z), nperseg, noverlap) / fs
+    tocan = (inicios <= 110.0) & (inicios + (nperseg - 1) / fs >= 100.0)
+    np.testing.assert_array_equal(mask, ~tocan)
+
+    limpio = calculate_hvsr_helper(z, n, e, *args, rechazos=rechazos)
+    f, P = compute_spectra(detrend_components(z, n, e), 1, 'hann', 20.0, 10, 'linear', fs, mask=~tocan)
+    f, ko_P = smooth_components(f, P, 40.0)
+    np.testing.assert_allclose(limpio[1], combine_hv(*ko_P, 'Nakamura'))
+    assert not np.allclose(limpio[1], calculate_hvsr_helper(z, n, e, *args)[1])
+
+    ventanas = calculate_hvsr_windows(z, n, e, *args[:6], 40.0, fs, rechazos=rechazos)
+    np.testing.assert_array_equal(ventanas['ventanas_aceptadas'], ~tocan)
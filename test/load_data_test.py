@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pytest
+from obspy import Stream, Trace, UTCDateTime, read
+
+from cache import DiskCache
+import load_data
+from load_data import DataLoader, LazyComponent, merge_traces, sample_range, start_time
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'stationA')
+RUTAS = [os.path.join(DATA, f'A04_staA.{c}.sac') for c in 'zne']
+
+
+def test_carga_perezosa_equivale_a_obspy():
+    datos = DataLoader.load_triple(*RUTAS)
+    for comp, ruta in zip('zne', RUTAS):
+        trace = read(ruta)[0]
+        assert datos[comp].is_mapped()
+        np.testing.assert_array_equal(datos[comp]['data'], trace.data)
+        np.testing.assert_array_equal(datos[comp]['times'], trace.times())
+        assert datos[comp]['sampling_rate'] == trace.stats.sampling_rate
+
+
+
+def test_cargar_copia_a_memoria():
+    comp = DataLoader.load_triple(*RUTAS)['z']
+    mapeado = comp['data']
+    assert comp.load() is comp and not comp.is_mapped()
+    assert not isinstance(comp['data'], np.memmap) and comp['data'].flags.writeable
+    np.testing.assert_array_equal(comp['data'], mapeado)
+
+def test_intervalo_de_tiempo():
+    trace = read(RUTAS[0])[0]
+    for lazy in (True, False):
+        datos = DataLoader.load_triple(*RUTAS, t_inicio=100.0, t_fin=200.0, lazy=lazy)
+        np.testing.assert_array_equal(datos['z']['data'], trace.data[10000:20001])
+        np.testing.assert_allclose(datos['z']['times'], trace.times()[10000:20001])
+    assert sample_range(100, 10.0, t_inicio=-5, t_fin=1e9) == (0, 100)
+
+
+def test_tiempos_explicitos():
+    comp = LazyComponent(np.arange(10.0), 2.0)
+    assert set(comp) == {'data', 'sampling_rate', 'times'}
+    comp['times'] = np.zeros(10)
+    np.testing.assert_array_equal(comp['times'], np.zeros(10))
+    comp['data'] = np.arange(4.0)
+    np.testing.assert_array_equal(comp['times'], [0.0, 0.5, 1.0, 1.5])
+
+
+def test_inicio_sin_vector_de_tiempos(monkeypatch):
+    datos = DataLoader.load_triple(*RUTAS, t_inicio=100.0, t_fin=200.0)
+    esperado = float(datos['z']['times'][0])
+    monkeypatch.setattr(load_data, 'relative_times', None)
+    assert start_time(datos['z']) == esperado == 100.0
+    comp = LazyComponent(np.arange(10.0), 2.0, inicio=4)
+    comp['times'] = np.arange(10.0) + 7.0
+    assert start_time(comp) == 7.0
+    assert start_time({'data': np.zeros(3), 'sampling_rate': 1.0, 'times': np.array([3.0, 4.0, 5.0])}) == 3.0
+
+
+def escribir_con_hueco(ruta, canal, desfase):
+    """Registro de 30 s a 100 Hz con un hueco de 5 s a partir de los 10 s, en dos trazas desordenadas."""
+    inicio = UTCDateTime(2024, 1, 1) + desfase
+    x = np.arange(3000, dtype=np.float64)
+    trazas = [Trace(x[1500:].copy(), header={'channel': canal, 'sampling_rate': 100.0, 'starttime': inicio + 15}),
+              Trace(x[:1000].copy(), header={'channel': canal, 'sampling_rate': 100.0, 'starttime': inicio})]
+    Stream(trazas).write(str(ruta), format='MSEED')
+    return str(ruta)
+
+
+@pytest.fixture
+def con_huecos(tmp_path):
+    return [escribir_con_hueco(tmp_path / f'x.{c}.mseed', f'HH{c.upper()}', 0.1 * i) for i, c in enumerate('zne')]
+
+
+def test_union_de_trazas():
+    inicio = UTCDateTime(2024, 1, 1)
+    trazas = [Trace(np.ones(10), header={'starttime': inicio}),
+              Trace(2 * np.ones(10), header={'starttime': inicio + 8}),
+              Trace(3 * np.ones(5), header={'starttime': inicio + 15})]
+    data, sr, starttime, huecos = merge_traces(trazas)
+    assert starttime == inicio and len(data) == 20
+    np.testing.assert_array_equal(data, [1] * 8 + [2] * 7 + [3] * 5)
+    assert huecos.shape == (0, 2)
+    data, _, _, huecos = merge_traces(trazas[::2])
+    np.testing.assert_array_equal(huecos, [[10, 15]])
+    np.testing.assert_array_equal(data[10:15], 0)
+
+
+def test_tripleta_con_huecos_alineada(con_huecos, tmp_path):
+    datos, huecos = DataLoader.load_triple_merged(*con_huecos)
+    # Tramo común desde el inicio de E (0.2 s): Z y N se recortan 20 y 10 muestras
+    assert {len(datos[c]['data']) for c in 'zne'} == {2980}
+    assert datos['z'].starttime == UTCDateTime(2024, 1, 1) + 0.2
+    np.testing.assert_array_equal(datos['z']['data'][:3], [20, 21, 22])
+    np.testing.assert_array_equal(datos['e']['data'][:3], [0, 1, 2])
+    assert huecos.to_list() == pytest.approx([(9.8, 14.99)])
+    np.testing.assert_array_equal(datos['z']['data'][980:1480], 0)
+
+    interpolados, _ = DataLoader.load_triple_merged(*con_huecos, politica='interpolar')
+    np.testing.assert_allclose(interpolados['z']['data'], np.arange(20, 3000))
+
+    # Desde la caché se obtiene lo mismo
+    for _ in range(2):
+        cache = DiskCache(str(tmp_path / 'cache'))
+        guardados, guardados_huecos = DataLoader.load_triple_merged(*con_huecos, cache=cache)
+        np.testing.assert_array_equal(guardados['n']['data'], datos['n']['data'])
+        assert guardados_huecos.to_list() == huecos.to_list()
+    assert cache.hits == {'fusionadas': 3}
+
+
+def test_dividir_en_tramos(con_huecos):
+    tramos, _ = DataLoader.load_triple_merged(*con_huecos, politica='dividir')
+    assert [len(t['z']['data']) for t in tramos] == [980, 1480]
+    assert tramos[1]['z']['times'][0] == pytest.approx(15.0)
+    np.testing.assert_array_equal(tramos[1]['z']['data'][:2], [1520, 1521])
+    with pytest.raises(ValueError):
+        DataLoader.load_triple_merged(*con_huecos, politica='rellenar')
+
+
+def test_tripleta_sin_huecos_sigue_mapeada():
+    datos, huecos = DataLoader.load_triple_merged(*RUTAS)
+    assert len(huecos) == 0 and all(datos[c].is_mapped() for c in 'zne')
+    np.testing.assert_array_equal(datos['n']['data'], read(RUTAS[1])[0].data)
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from parallel import run_parallel
+
+
+def cuadrado(x):
+    if x == 3:
+        raise ValueError("tarea defectuosa")
+    return x * x
+
+
+def muere(x):
+    if x == 3:
+        os._exit(1)
+    return x * x
+
+
+@pytest.mark.parametrize("workers,chunksize", [(1, 1), (2, 1), (2, 3)])
+def test_ordenado_y_errores(workers, chunksize):
+    items = list(run_parallel(cuadrado, range(8), workers=workers, chunksize=chunksize, max_in_flight=1))
+    assert [i['indice'] for i in items] == list(range(8))
+    assert [i['resultado'] for i in items if i['error'] is None] == [0, 1, 4, 16, 25, 36, 49]
+    assert items[3]['error'].startswith("ValueError: tarea defectuosa")
+    assert all(i['tiempo'] >= 0 for i in items)
+
+
+def test_desordenado_entrega_todo():
+    items = list(run_parallel(cuadrado, range(10), workers=2, ordered=False))
+    assert sorted(i['indice'] for i in items) == list(range(10))
+
+
+def test_trabajador_muerto_no_detiene_el_lote():
+    items = list(run_parallel(muere, range(8), workers=2, max_in_flight=1))
+    assert [i['indice'] for i in items] == list(range(8))
+    assert items[3]['error'].startswith("BrokenProcessPool")
+    assert [i['resultado'] for i in items if i['error'] is None] == [0, 1, 4, 16, 25, 36, 49]
+
+    # Los bloques que estaban en curso con el que rompió el pool se reintentan
+    for chunksize in (1, 2):
+        items = list(run_parallel(muere, range(10), workers=2, chunksize=chunksize, ordered=False))
+        assert sorted(i['indice'] for i in items) == list(range(10))
+        fallidos = {i['indice'] for i in items if i['error']}
+        assert fallidos == ({3} if chunksize == 1 else {2, 3})
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+import precision
+from hvsr_calculator import calculate_hvsr_helper, calculate_hvsr_windows
+from process import ProcessData
+
+FS = 50.0
+
+
+@pytest.fixture
+def senal():
+    """Ruido con un pico H/V cercano a 2 Hz en las horizontales, en float32 como los SAC."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(600 * FS)) / FS
+    z = rng.normal(size=t.size) + 1e3
+    n = rng.normal(size=t.size) + 3 * np.sin(2 * np.pi * 2.0 * t + 1.0) + 1e3
+    e = rng.normal(size=t.size) + 3 * np.sin(2 * np.pi * 2.0 * t + 2.0) + 1e3
+    return [c.astype(np.float32) for c in (z, n, e)]
+
+
+def hvsr(z, n, e):
+    return calculate_hvsr_helper(z, n, e, 1, 'Nakamura', 'hann', 20.0, 5, 'linear', 100.0, 40.0, FS)
+
+
+def test_politica_y_entorno():
+    previo = precision.get_precision()
+    with precision.use('float32'):
+        assert precision.dtype() == np.float32
+        assert os.environ[precision.ENV_VAR] == 'float32'
+    assert precision.get_precision() == previo
+    assert precision.dtype(np.float64) == np.float64 or previo != 'auto'
+    with pytest.raises(ValueError):
+        precision.set_precision('float16')
+
+
+def test_float32_frente_a_float64(senal):
+    with precision.use('float64'):
+        f, HV, sd, *_, f0, _, _ = hvsr(*senal)
+    with precision.use('float32'):
+        f32, HV32, sd32, *_, f0_32, _, _ = hvsr(*senal)
+        ventanas = calculate_hvsr_windows(*senal, 1, 'Nakamura', 'hann', 20.0, 0, 'linear', 40.0, FS)
+    assert HV.dtype == np.float64 and HV32.dtype == sd32.dtype == np.float32
+    np.testing.assert_array_equal(f, f32)
+    # Las primeras frecuencias, casi sin potencia tras quitar la tendencia, son las más sensibles
+    banda = f >= 0.5
+    np.testing.assert_allclose(HV32[banda], HV[banda], rtol=1e-4)
+    np.testing.assert_allclose(HV32, HV, rtol=5e-3)
+    assert f0_32 == f0
+    assert abs(ventanas['frecuencia_sitio'] - 2.0) < 0.2
+
+
+def test_filtro_float32_acumula_en_float64(senal):
+    datos = dict(zip('zne', senal))
+    referencia = ProcessData(datos, FS).bandpass_filter(0.1, 10.0, dtype=np.float64)
+    solo_float32 = ProcessData(datos, FS).bandpass_filter(0.1, 10.0, dtype=np.float32)
+    with precision.use('float32'):
+        politica = ProcessData(datos, FS).bandpass_filter(0.1, 10.0)
+    assert politica['z'].dtype == np.float32
+    escala = np.abs(referencia['n']).max()
+    error_politica = np.abs(politica['n'] - referencia['n']).max() / escala
+    assert error_politica < 1e-6
+    assert error_politica < np.abs(solo_float32['n'] - referencia['n']).max() / escala
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from scipy.signal import butter, filtfilt, sosfiltfilt
+
+from process import (ProcessData, _design_bandpass, decimation_factor, design_bandpass,
+                     sosfiltfilt_chunked)
+
+FS = 100.0
+
+
+def _datos(n=60_000, seed=5):
+    rng = np.random.default_rng(seed)
+    return {comp: rng.standard_normal(n).cumsum() for comp in 'zne'}
+
+
+def test_equivale_a_filtfilt_por_componente():
+    datos = _datos()
+    b, a = butter(4, [0.5, 20], btype='band', fs=FS)
+    filtrado = ProcessData(datos, FS).bandpass_filter(0.5, 20)
+    for comp in 'zne':
+        esperado = filtfilt(b, a, datos[comp])
+        np.testing.assert_allclose(filtrado[comp], esperado, atol=1e-6 * np.abs(esperado).max())
+    # Las tres componentes comparten un único arreglo (3, N)
+    assert filtrado['z'].base is filtrado['n'].base
+
+
+def test_diseno_en_cache():
+    _design_bandpass.cache_clear()
+    for _ in range(3):
+        design_bandpass(0.5, 20, 4, FS)
+    assert _design_bandpass.cache_info().hits == 2
+    design_bandpass(0.5, 20, 4, FS)[0, 0] = 99.0
+    assert design_bandpass(0.5, 20, 4, FS)[0, 0] != 99.0
+
+
+def test_float32_y_en_el_lugar():
+    datos = _datos()
+    referencia = ProcessData(dict(datos), FS).bandpass_filter(0.5, 20)
+    f32 = ProcessData(dict(datos), FS).bandpass_filter(0.5, 20, dtype=np.float32)
+    assert f32['z'].dtype == np.float32
+    np.testing.assert_allclose(f32['z'], referencia['z'], atol=1e-3 * np.abs(referencia['z']).max())
+
+    copia = {comp: datos[comp].copy() for comp in 'zne'}
+    salida = ProcessData(copia, FS).bandpass_filter(0.5, 20, in_place=True)
+    assert salida['n'] is copia['n']
+    np.testing.assert_allclose(copia['n'], referencia['n'])
+
+    solo_lectura = datos['z'].copy()
+    solo_lectura.setflags(write=False)
+    with pytest.raises(ValueError):
+        ProcessData(solo_lectura, FS).bandpass_filter(0.5, 20, in_place=True)
+
+
+def test_filtrado_por_bloques():
+    datos = _datos(200_001)
+    x = np.stack([datos[comp] for comp in 'zne'])
+    sos = design_bandpass(0.2, 10, 6, FS)
+    completo = sosfiltfilt(sos, x, axis=-1)
+    por_bloques = sosfiltfilt_chunked(sos, x, 30_000)
+    np.testing.assert_allclose(por_bloques, completo, atol=1e-6 * np.abs(completo).max())
+    filtrado = ProcessData(datos, FS).bandpass_filter(0.2, 10, order=6, bloque=30_000)
+    np.testing.assert_allclose(filtrado['e'], completo[2], atol=1e-6 * np.abs(completo).max())
+
+
+def test_componentes_sueltas_o_de_distinta_longitud():
+    datos = _datos()
+    datos['e'] = datos['e'][:-250]
+    sos = design_bandpass(0.5, 20, 4, FS)
+    filtrado = ProcessData(datos, FS).bandpass_filter(0.5, 20)
+    for comp in 'zne':
+        np.testing.assert_allclose(filtrado[comp], sosfiltfilt(sos, datos[comp]))
+    solo_z = ProcessData({'z': datos['z']}, FS).bandpass_filter(0.5, 20, bloque=20_000)
+    assert set(solo_z) == {'z'} and solo_z['z'].shape == datos['z'].shape
+    horizontales = {c: datos[c].copy() for c in 'ne'}
+    ProcessData(horizontales, FS).bandpass_filter(0.5, 20, in_place=True)
+    np.testing.assert_allclose(horizontales['n'], filtrado['n'])
+    decimado, fs = ProcessData(datos, FS).decimate(fmax=20.0)
+    assert fs == 50.0 and len(decimado['e']) == len(datos['e']) // 2 != len(decimado['z'])
+
+
+def test_factor_de_decimacion():
+    assert decimation_factor(100.0, 20.0) == 2
+    assert decimation_factor(250.0, 20.0) == 5
+    assert decimation_factor(100.0, 10.0) == 4
+    assert decimation_factor(50.0, 20.0) == 1
+
+
+def test_decimacion_conserva_la_banda_y_elimina_el_alias():
+    t = np.arange(int(120 * FS)) / FS
+    # 5 Hz dentro de la banda; 40 Hz se plegaría a 10 Hz tras decimar por 4
+    senal = np.sin(2 * np.pi * 5.0 * t) + np.sin(2 * np.pi * 40.0 * t)
+    datos, fs = ProcessData({c: senal for c in 'zne'}, FS).decimate(fmax=10.0)
+    assert fs == 25.0 and set(datos) == {'z', 'n', 'e'}
+    assert len(datos['z']) == len(t) // 4
+    esperado = np.sin(2 * np.pi * 5.0 * t[::4])
+    # Lejos de los bordes la señal en banda se conserva y la de 40 Hz desaparece
+    np.testing.assert_allclose(datos['n'][100:-100], esperado[100:-100], atol=5e-3)
@@ -0,0 +1,67 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import profiling
+from batch import DEFAULT_PARAMS, discover_triplets, process_station
+from hvsr_calculator import calculate_hvsr_helper
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+FS = 50.0
+
+
+@pytest.fixture
+def activado():
+    previo = os.environ.get(profiling.ENV_VAR)
+    profiling.enable()
+    yield
+    profiling.disable()
+    if previo is not None:
+        os.environ[profiling.ENV_VAR] = previo
+
+
+@pytest.fixture
+def senal():
+    return np.random.default_rng(8).normal(size=(3, int(300 * FS)))
+
+
+def test_desactivado_no_mide(senal):
+    profiling.disable()
+    with profiling.profile('x') as perfil:
+        assert profiling.stage('welch', senal) is profiling._NULO
+        calculate_hvsr_helper(*senal, 1, 'Nakamura', 'hann', 20.0, 5, 'linear', 100.0, 40.0, FS)
+    assert perfil is None
+
+
+def test_desglose_del_helper(activado, senal):
+    with profiling.profile('sintética') as perfil:
+        calculate_hvsr_helper(*senal, 1, 'Nakamura', 'hann', 20.0, 5, 'linear', 100.0, 40.0, FS)
+    etapas = {e['etapa']: e for e in perfil.to_dict()['etapas']}
+    assert set(etapas) == {'hvsr', 'hvsr/detrend', 'hvsr/welch', 'hvsr/konno_ohmachi', 'hvsr/sd_movil', 'hvsr/pico'}
+    assert etapas['hvsr/detrend']['bytes'] == senal.nbytes
+    parciales = sum(e['tiempo'] for ruta, e in etapas.items() if ruta != 'hvsr')
+    assert parciales <= etapas['hvsr']['tiempo'] <= perfil.tiempo
+    assert 'konno_ohmachi' in perfil.report()
+
+
+def test_pico_de_memoria(senal):
+    profiling.enable(memoria=True)
+    try:
+        with profiling.profile() as perfil:
+            calculate_hvsr_helper(*senal, 1, 'Nakamura', 'hann', 20.0, 5, 'linear', 100.0, 40.0, FS)
+    finally:
+        profiling.disable()
+    etapas = {e['etapa']: e for e in perfil.to_dict()['etapas']}
+    assert etapas['hvsr/detrend']['pico'] >= senal.nbytes
+    assert etapas['hvsr']['pico'] >= etapas['hvsr/welch']['pico'] > 0
+
+
+def test_perfil_por_estacion_en_lote(activado):
+    tripleta = discover_triplets(DATA)[0][0]
+    res = process_station(tripleta, dict(DEFAULT_PARAMS))
+    etapas = {e['etapa'] for e in res['perfil']['etapas']}
+    assert {'carga', 'hvsr/welch', 'hvsr/konno_ohmachi'} <= etapas
+    assert res['perfil']['contadores']['muestras cargadas'] == 3 * 560001
+    json.dumps(res['perfil'])
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from rolling import moving_sd, rolling_mean, rolling_median, rolling_std
+
+
+def sd_moving_bucle(HV, window_size=100):
+    """Implementación original de calculate_hvsr_helper, usada como referencia."""
+    sd = np.std(HV[:window_size])
+    sd_moving = np.zeros_like(HV)
+    for i in range(window_size, len(HV)):
+        sd_moving[i - window_size:i] = sd
+        sd = np.std(HV[i - window_size + 1:i + 1])
+    return sd_moving
+
+
+@pytest.mark.parametrize("n", [5, 100, 101, 102, 2500])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_moving_sd_legacy_identico(n, dtype):
+    HV = (np.random.default_rng(n).random(n) * 4 + 1).astype(dtype)
+    esperado = sd_moving_bucle(HV)
+    obtenido = moving_sd(HV, mode='legacy')
+    assert obtenido.dtype == esperado.dtype
+    assert np.array_equal(obtenido, esperado)
+    np.testing.assert_allclose(moving_sd(HV), esperado, rtol=1e-4, atol=1e-6)
+
+
+def test_estadisticas_validas():
+    x = np.random.default_rng(0).normal(size=500)
+    w = 11
+    ventanas = np.array([x[i:i + w] for i in range(len(x) - w + 1)])
+    np.testing.assert_allclose(rolling_mean(x, w), ventanas.mean(axis=1))
+    np.testing.assert_allclose(rolling_std(x, w), ventanas.std(axis=1))
+    np.testing.assert_allclose(rolling_median(x, w), np.median(ventanas, axis=1))
+
+
+@pytest.mark.parametrize("edge", ['nearest', 'nan', 'reflect', 'legacy'])
+def test_bordes_conservan_longitud(edge):
+    x = np.random.default_rng(1).normal(size=300)
+    assert rolling_std(x, 20, edge=edge).shape == x.shape
+
+
+def test_borde_invalido():
+    with pytest.raises(ValueError):
+        rolling_mean(np.ones(10), 3, edge='circular')
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from obspy.signal.konnoohmachismoothing import konno_ohmachi_smoothing
+
+import smoothing
+from smoothing import DEFAULT_N_FRECUENCIAS, konno_ohmachi_operator, log_frequency_grid, smooth_spectra
+
+
+@pytest.fixture
+def espectros():
+    rng = np.random.default_rng(0)
+    f = np.linspace(0, 50, 801)
+    return f, rng.random((3, len(f))) + 0.5
+
+
+@pytest.mark.parametrize("b", [40, 188.5])
+def test_ventana_completa_igual_a_obspy(espectros, b):
+    f, P = espectros
+    esperado = np.array([konno_ohmachi_smoothing(p, f, b, normalize=True) for p in P])
+    np.testing.assert_allclose(smooth_spectra(P, f, b, tol=0), esperado, rtol=1e-10, atol=1e-12)
+
+
+def test_operador_truncado_es_de_banda(espectros):
+    f, P = espectros
+    op = konno_ohmachi_operator(f, 188.5)
+    assert op.nnz < 0.5 * len(f) ** 2
+    esperado = np.array([konno_ohmachi_smoothing(p, f, 188.5, normalize=True) for p in P])
+    np.testing.assert_allclose(smooth_spectra(P, f, 188.5), esperado, rtol=1e-4)
+
+
+def test_cache_reutiliza_operador(espectros):
+    f, P = espectros
+    smoothing.clear_cache()
+    smooth_spectra(P, f, 40)
+    smooth_spectra(P[0], f, 40)
+    info = smoothing.cache_info()
+    assert info['misses'] == 1 and info['hits'] == 1
+    smoothing.set_cache_budget(0)
+    assert smoothing.cache_info()['operadores'] == 0
+    smoothing.set_cache_budget(smoothing.DEFAULT_CACHE_BYTES)
+
+
+def test_malla_logaritmica(espectros):
+    f, P = espectros
+    f_out = log_frequency_grid(f, 120)
+    suavizado = smooth_spectra(P, f, 40, f_out=f_out)
+    assert suavizado.shape == (3, 120)
+    assert np.all(np.isfinite(suavizado))
+
+
+@pytest.mark.parametrize("b", [40, 188.5])
+def test_operador_en_malla_logaritmica_acotado(b):
+    """Con la malla logarítmica recomendada nnz/N no crece con la frecuencia de muestreo."""
+    por_muestra = []
+    for fs in (250.0, 500.0):
+        f = np.fft.rfftfreq(int(82.02 * fs), 1 / fs)
+        op = konno_ohmachi_operator(f, b, f_out=log_frequency_grid(f, DEFAULT_N_FRECUENCIAS))
+        por_muestra.append(op.nnz / len(f))
+        assert op.data.nbytes + op.indices.nbytes + op.indptr.nbytes < smoothing.DEFAULT_CACHE_BYTES / 2
+    assert por_muestra[0] < 500
+    assert por_muestra[1] <= por_muestra[0]
+
+
+def test_malla_logaritmica_interpola_entre_frecuencias():
+    """Por debajo de la resolución de la FFT la salida interpola entre las dos frecuencias vecinas."""
+    f = np.arange(0, 101) * 0.1
+    P = np.arange(len(f), dtype=float)[None] + 1.0
+    f_out = np.array([0.15, 0.25, 0.35])
+    np.testing.assert_allclose(smooth_spectra(P, f, 188.5, f_out=f_out)[0], [2.5, 3.5, 4.5])
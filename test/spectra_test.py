@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from spectra import detrend_linear, segment_spectra, segment_view, welch_components
+
+
+@pytest.fixture
+def componentes():
+    rng = np.random.default_rng(0)
+    return [rng.normal(size=20_000) for _ in range(3)]
+
+
+@pytest.mark.parametrize("average", ['median', 'mean'])
+@pytest.mark.parametrize("window,nperseg,noverlap,sm,detr", [
+    ('hamming', 1000, 50, 1, 'linear'),
+    ('hann', 999, 499, 2, 'constant'),
+    ('blackman', 512, 0, 3, False),
+])
+def test_igual_a_scipy_welch(componentes, average, window, nperseg, noverlap, sm, detr):
+    kwargs = dict(window=window, nperseg=nperseg, noverlap=noverlap, nfft=sm * nperseg,
+                  detrend=detr, scaling='spectrum', average=average)
+    f, P = welch_components(*componentes, 100.0, **kwargs)
+    for fila, comp in zip(P, componentes):
+        f_ref, P_ref = signal.welch(comp, fs=100.0, **kwargs)
+        np.testing.assert_allclose(f, f_ref)
+        np.testing.assert_allclose(fila, P_ref, rtol=1e-10)
+
+
+def test_segmentos_sin_copia(componentes):
+    x = np.stack(componentes)
+    seg = segment_view(x, 1000, 200)
+    assert seg.shape == (3, 24, 1000)
+    assert np.shares_memory(seg, x)
+
+
+@pytest.mark.parametrize("nperseg,sm", [(1000, 1), (999, 2)])
+def test_espectro_cruzado_igual_a_scipy_csd(componentes, nperseg, sm):
+    kwargs = dict(window='hann', nperseg=nperseg, noverlap=nperseg // 2, nfft=sm * nperseg,
+                  detrend='linear', scaling='spectrum')
+    f, P, C = segment_spectra(np.stack(componentes), 100.0, cruzados=[(1, 2), (0, 1)], **kwargs)
+    assert C.shape == (2,) + P.shape[1:]
+    for fila, (i, j) in zip(C, [(1, 2), (0, 1)]):
+        _, C_ref = signal.csd(componentes[i], componentes[j], fs=100.0, average='mean', **kwargs)
+        np.testing.assert_allclose(fila.mean(axis=0), C_ref.real, rtol=1e-10, atol=1e-12)
+
+
+def test_longitudes_distintas():
+    with pytest.raises(ValueError):
+        welch_components(np.zeros(10), np.zeros(10), np.zeros(11), 100.0, nperseg=5)
+
+
+def test_detrend_lineal_acumula_en_float64():
+    rng = np.random.default_rng(3)
+    x = rng.normal(size=(3, 300_001)).cumsum(axis=-1) + 1e4
+    esperado = signal.detrend(x, type='linear', axis=-1)
+    np.testing.assert_allclose(detrend_linear(x.copy()), esperado, atol=1e-8)
+    simple = detrend_linear(x.astype(np.float32))
+    assert simple.dtype == np.float32
+    # El error queda en el redondeo de float32 de los datos, no de las sumas
+    assert np.abs(simple - esperado).max() < 2e-3
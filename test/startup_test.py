@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def test_arranque_no_importa_dependencias_pesadas():
+    codigo = (f"import sys; sys.path.insert(0, {SRC!r}); import hvsr_gui; "
+              "print(sorted(m for m in ('obspy', 'scipy.signal', 'scipy.interpolate', 'geopandas', 'shapely') "
+              "if m in sys.modules))")
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, QT_QPA_PLATFORM='offscreen')).stdout
+    assert salida.strip() == '[]'
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from hvsr_calculator import calculate_hvsr_helper
+from streaming import LinearTrend, StreamingHVSR, calculate_hvsr_stream, iter_chunks
+
+FS = 50.0
+ARGS = (1, 'Nakamura', 'hann', 20.0, 10, None, 100.0, 40.0, FS)
+
+
+def _senal(nsamples=30_000, seed=3):
+    rng = np.random.default_rng(seed)
+    t = np.arange(nsamples) / FS
+    z = rng.standard_normal(nsamples) + 0.001 * t
+    n = rng.standard_normal(nsamples) + np.sin(2 * np.pi * 2.0 * t) + 5.0
+    e = rng.standard_normal(nsamples) - 0.002 * t
+    return z, n, e
+
+
+@pytest.mark.parametrize('detr', ['linear', 'constant'])
+@pytest.mark.parametrize('bloque', [997, 5000, 40_000])
+def test_equivale_al_calculo_completo(detr, bloque):
+    z, n, e = _senal()
+    args = ARGS[:5] + (detr,) + ARGS[6:]
+    ref = calculate_hvsr_helper(z, n, e, *args)
+    res = calculate_hvsr_stream(lambda: iter_chunks(z, n, e, bloque), *args)
+    np.testing.assert_allclose(res[1], ref[1], rtol=1e-4)
+    assert res[5] == ref[5]
+
+
+
+def test_rechazos_por_bloques():
+    z, n, e = _senal()
+    rechazos = [(100.0, 130.0), (401.5, 402.0)]
+    ref = calculate_hvsr_helper(z, n, e, *ARGS, rechazos=rechazos, t0=2.0)
+    res = calculate_hvsr_stream(lambda: iter_chunks(z, n, e, 997), *ARGS, rechazos=rechazos, t0=2.0)
+    np.testing.assert_allclose(res[1], ref[1], rtol=1e-4)
+    assert not np.allclose(res[1], calculate_hvsr_helper(z, n, e, *ARGS)[1], rtol=1e-4)
+
+def test_ajuste_de_tendencia_por_bloques():
+    z, n, e = _senal()
+    x = np.stack((z, n, e))
+    ajuste = LinearTrend()
+    for i in range(0, x.shape[-1], 7001):
+        ajuste.update(x[:, i:i + 7001], i)
+    ordenada, pendiente = ajuste.coefficients()
+    for k in range(3):
+        esperado = np.polyfit(np.arange(x.shape[-1]), x[k], 1)
+        np.testing.assert_allclose([pendiente[k], ordenada[k]], esperado, rtol=1e-8, atol=1e-10)
+
+
+def test_promedio_medio_y_conteo_de_ventanas():
+    z, n, e = _senal()
+    hvsr = StreamingHVSR(FS, window='hann', ancho=20.0, overlap=10, average='mean')
+    for bloque in iter_chunks(z, n, e, 3000):
+        hvsr.update(*bloque)
+    assert hvsr.muestras == len(z)
+    assert hvsr.n_ventanas == (len(z) - 1000) // 900 + 1
+    assert hvsr._buffer.shape[-1] < hvsr.nperseg + 3000
+
+
+def test_fuente_de_una_pasada_requiere_detr_lineal():
+    z, n, e = _senal(5000)
+    args = ARGS[:5] + ('constant',) + ARGS[6:]
+    with pytest.raises(ValueError):
+        calculate_hvsr_stream(iter_chunks(z, n, e, 1000), *args)
@@ -0,0 +1,27 @@
+import numpy as np
+
+from hvsr_calculator import METHODS, calculate_hvsr_helper
+from sweep import expand_grid, sweep_hvsr, write_sweep_csv
+
+
+def test_expand_grid():
+    assert len(expand_grid({'method': ['Nakamura', 'Picozzi'], 'b': [40, 80, 120], 'ancho': 20.0})) == 6
+    assert expand_grid([{'b': 1}, {'b': 2}]) == [{'b': 1}, {'b': 2}]
+
+
+def test_barrido_reutiliza_intermedios(tmp_path):
+    rng = np.random.default_rng(0)
+    z, n, e = rng.normal(size=(3, 20_000))
+    grid = {'method': list(METHODS), 'b': [40, 80], 'ancho': [10.0, 20.0], 'overlap': [5], 'window': ['hann']}
+    filas, info = sweep_hvsr(z, n, e, 50.0, grid)
+    assert info == {'combinaciones': 24, 'welch': 2, 'suavizados': 4}
+
+    for fila in filas[::5]:
+        f, HV, sd_moving, _, _, frecuencia_sitio, _, _ = calculate_hvsr_helper(
+            z, n, e, 1, fila['method'], 'hann', fila['ancho'], 5, 'linear', 100.0, fila['b'], 50.0)
+        np.testing.assert_array_equal(fila['HVSR'], HV)
+        assert fila['frecuencia_sitio'] == frecuencia_sitio
+
+    ruta = tmp_path / 'barrido.csv'
+    write_sweep_csv(str(ruta), filas)
+    assert len(ruta.read_text(encoding='utf-8').splitlines()) == 25
@@ -0,0 +1,92 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import pytest
+
+QtCore = pytest.importorskip('PyQt5.QtCore')
+
+import spectra  # noqa: E402
+from tasks import TaskRunner  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def _lento(ctx, valor, pasos=20):
+    for i in range(pasos):
+        ctx.progress(100 * i // pasos, f"paso {i}")
+        time.sleep(0.005)
+    return valor
+
+
+def test_resultado_en_hilo_principal(app):
+    runner = TaskRunner()
+    recibidos, hilos, avance = [], [], []
+
+    def on_result(valor):
+        recibidos.append(valor)
+        hilos.append(threading.current_thread())
+
+    runner.submit('tarea', _lento, 42, on_result=on_result, on_progress=lambda p, m: avance.append(p))
+    assert runner.wait(timeout=10)
+    assert recibidos == [42]
+    assert hilos == [threading.main_thread()]
+    assert avance and avance == sorted(avance)
+
+
+def test_agrupa_solicitudes_repetidas(app):
+    runner = TaskRunner()
+    recibidos = []
+    for valor in range(5):
+        runner.submit('hvsr', _lento, valor, on_result=recibidos.append)
+    assert runner.wait(timeout=10)
+    # La primera se cancela y las intermedias nunca se ejecutan
+    assert recibidos == [4]
+    assert not runner.is_running()
+
+
+def test_errores_y_cancelacion(app):
+    runner = TaskRunner()
+    errores, recibidos = [], []
+
+    def falla(ctx):
+        raise ValueError("sin datos")
+
+    runner.submit('a', falla, on_error=errores.append)
+    runner.submit('b', _lento, 1, 200, on_result=recibidos.append)
+    runner.cancel('b')
+    assert runner.wait(timeout=10)
+    assert errores == ["ValueError: sin datos"]
+    assert recibidos == []
+
+
+def test_cancelacion_interrumpe_el_calculo(app, monkeypatch):
+    """La cancelación se atiende entre los bloques de Welch, no al terminar el cálculo."""
+    runner = TaskRunner()
+    contexto, bloques, recibidos, errores = [], [], [], []
+    rfft_original = spectra.sp_fft.rfft
+
+    def rfft(*args, **kwargs):
+        bloques.append(1)
+        if len(bloques) == 3:
+            contexto[0].cancel()
+        return rfft_original(*args, **kwargs)
+
+    def espectros(ctx, x):
+        contexto.append(ctx)
+        with monkeypatch.context() as m:
+            m.setattr(spectra, 'sp_fft', SimpleNamespace(rfft=rfft, rfftfreq=spectra.sp_fft.rfftfreq))
+            m.setattr(spectra, '_MAX_BLOCK', 3 * 256)
+            return spectra.segment_spectra(x, 100.0, nperseg=256)
+
+    runner.submit('welch', espectros, np.zeros((3, 256 * 200)), on_result=recibidos.append,
+                  on_error=errores.append)
+    assert runner.wait(timeout=10)
+    assert recibidos == [] and errores == []
+    # 200 segmentos en bloques de 3: sin puntos de cancelación se harían 67 FFT
+    assert len(bloques) == 3